@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class AccountsConfig(AppConfig):
     name = 'accounts'
+    
+    def ready(self):
+        from backend.search import repair_search_indexes
+        import accounts.search  # noqa
+        post_migrate.connect(repair_search_indexes, sender=self)
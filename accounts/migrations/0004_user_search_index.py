@@ -0,0 +1,124 @@
+# Generated by Django 6.0 on 2026-10-18 10:05
+
+from django.db import migrations
+
+# The SQL is frozen here as it was when the index was added; it must not
+# follow later changes to backend.search. Vectors use the 'english'
+# configuration; `manage.py rebuild_search_index` applies SEARCH_CONFIG.
+
+PG_INSTALL = [
+    'ALTER TABLE accounts_user ADD COLUMN IF NOT EXISTS search_vector tsvector',
+    """
+    CREATE OR REPLACE FUNCTION accounts_user_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english'::regconfig, regexp_replace(coalesce(NEW.username, ''), '[^[:alnum:]]+', ' ', 'g')), 'A')
+            || setweight(to_tsvector('english'::regconfig, regexp_replace(coalesce(NEW.first_name, ''), '[^[:alnum:]]+', ' ', 'g')), 'A')
+            || setweight(to_tsvector('english'::regconfig, regexp_replace(coalesce(NEW.last_name, ''), '[^[:alnum:]]+', ' ', 'g')), 'A')
+            || setweight(to_tsvector('english'::regconfig, regexp_replace(coalesce(NEW.email, ''), '[^[:alnum:]]+', ' ', 'g')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS accounts_user_search_vector ON accounts_user',
+    """
+    CREATE TRIGGER accounts_user_search_vector
+    BEFORE INSERT OR UPDATE OF username, first_name, last_name, email ON accounts_user
+    FOR EACH ROW EXECUTE FUNCTION accounts_user_search_vector()
+    """,
+    'CREATE INDEX IF NOT EXISTS accounts_user_search_idx ON accounts_user USING gin (search_vector)',
+]
+
+# Run per id range, so existing rows are filled in batches
+PG_FILL = """
+    UPDATE accounts_user SET search_vector =
+        setweight(to_tsvector('english'::regconfig, regexp_replace(coalesce(username, ''), '[^[:alnum:]]+', ' ', 'g')), 'A')
+        || setweight(to_tsvector('english'::regconfig, regexp_replace(coalesce(first_name, ''), '[^[:alnum:]]+', ' ', 'g')), 'A')
+        || setweight(to_tsvector('english'::regconfig, regexp_replace(coalesce(last_name, ''), '[^[:alnum:]]+', ' ', 'g')), 'A')
+        || setweight(to_tsvector('english'::regconfig, regexp_replace(coalesce(email, ''), '[^[:alnum:]]+', ' ', 'g')), 'B')
+    WHERE id >= %s AND id < %s
+"""
+
+PG_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS accounts_user_search_vector ON accounts_user',
+    'DROP FUNCTION IF EXISTS accounts_user_search_vector()',
+    'DROP INDEX IF EXISTS accounts_user_search_idx',
+    'ALTER TABLE accounts_user DROP COLUMN IF EXISTS search_vector',
+]
+
+SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS accounts_user_fts USING fts5(
+        username, first_name, last_name, email,
+        content='accounts_user', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS accounts_user_fts_insert AFTER INSERT ON accounts_user BEGIN
+        INSERT INTO accounts_user_fts (rowid, username, first_name, last_name, email)
+        VALUES (new.id, new.username, new.first_name, new.last_name, new.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS accounts_user_fts_delete AFTER DELETE ON accounts_user BEGIN
+        INSERT INTO accounts_user_fts (accounts_user_fts, rowid, username, first_name, last_name, email)
+        VALUES ('delete', old.id, old.username, old.first_name, old.last_name, old.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS accounts_user_fts_update
+    AFTER UPDATE OF username, first_name, last_name, email ON accounts_user BEGIN
+        INSERT INTO accounts_user_fts (accounts_user_fts, rowid, username, first_name, last_name, email)
+        VALUES ('delete', old.id, old.username, old.first_name, old.last_name, old.email);
+        INSERT INTO accounts_user_fts (rowid, username, first_name, last_name, email)
+        VALUES (new.id, new.username, new.first_name, new.last_name, new.email);
+    END
+    """,
+    "INSERT INTO accounts_user_fts (accounts_user_fts) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS accounts_user_fts_insert',
+    'DROP TRIGGER IF EXISTS accounts_user_fts_delete',
+    'DROP TRIGGER IF EXISTS accounts_user_fts_update',
+    'DROP TABLE IF EXISTS accounts_user_fts',
+]
+
+FILL_BATCH_SIZE = 10000
+
+
+def install(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for sql in PG_INSTALL:
+                cursor.execute(sql)
+            cursor.execute('SELECT min(id), max(id) FROM accounts_user')
+            low, high = cursor.fetchone()
+            if low is not None:
+                for start in range(low, high + 1, FILL_BATCH_SIZE):
+                    cursor.execute(PG_FILL, [start, start + FILL_BATCH_SIZE])
+            cursor.execute('ANALYZE accounts_user')
+        elif connection.vendor == 'sqlite':
+            for sql in SQLITE_INSTALL:
+                cursor.execute(sql)
+
+
+def uninstall(apps, schema_editor):
+    connection = schema_editor.connection
+    statements = {'postgresql': PG_UNINSTALL, 'sqlite': SQLITE_UNINSTALL}.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
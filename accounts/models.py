@@ -1,10 +1,15 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from backend.tracking import TrackedFieldsMixin
 
-class User(AbstractUser):
+
+class User(TrackedFieldsMixin, AbstractUser):
     """Custom user model with role-based access."""
     
+    # Old values compared by the dashboard counter signals
+    tracked_fields = ('role', 'is_active')
+    
     class Role(models.TextChoices):
         CITIZEN = 'citizen', 'Citizen'
         COLLECTOR = 'collector', 'Collector'
@@ -27,6 +32,12 @@ class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Keyset pagination sort key
+            models.Index(fields=['created_at', 'id'], name='user_created_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.username} ({self.role})"
 
@@ -0,0 +1,13 @@
+"""
+Full-text search over users for the admin user and collector lists.
+"""
+from backend.search import SearchIndex
+
+# icontains fallback for databases without full-text support
+USER_SEARCH_FIELDS = ['username', 'first_name', 'last_name', 'email']
+
+USER_SEARCH_INDEX = SearchIndex(
+    'accounts',
+    'accounts_user',
+    {'username': 'A', 'first_name': 'A', 'last_name': 'A', 'email': 'B'}
+)
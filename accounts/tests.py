@@ -1,3 +1,51 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .search import USER_SEARCH_INDEX
+
+User = get_user_model()
+
+
+class UserSearchTests(TestCase):
+    """``?search=`` on the admin user list uses the full-text index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='search-admin', role='admin')
+        cls.asha = User.objects.create(
+            username='asha.k', first_name='Asha', last_name='Kumar',
+            email='asha@cleancity.org', role='collector'
+        )
+        cls.ravi = User.objects.create(
+            username='ravi', first_name='Ravi', last_name='Asharaf',
+            email='ravi@example.com', role='citizen'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def search(self, query, **params):
+        response = self.client.get(reverse('user-list'), {'search': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.search('asha kumar'), [self.asha.pk])
+
+    def test_email_words_match(self):
+        self.assertEqual(self.search('cleancity'), [self.asha.pk])
+
+    def test_ranked_by_relevance(self):
+        # Both match the prefix "asha"; the newer user would come first by
+        # date, but a whole-word name match ranks higher
+        self.assertEqual(self.search('asha'), [self.asha.pk, self.ravi.pk])
+        self.assertEqual(self.search('asha', ordering='-created_at'), [self.ravi.pk, self.asha.pk])
 
-# Create your tests here.
+    def test_fallback_without_index_support(self):
+        with mock.patch.object(USER_SEARCH_INDEX, 'supported', return_value=False):
+            self.assertEqual(self.search('umar'), [self.asha.pk])
@@ -5,6 +5,10 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate, get_user_model
 from django.db.models import Count, Q
 
+from backend.pagination import EstimatedCountKeysetPagination
+from backend.search import FullTextSearchFilter
+
+from .search import USER_SEARCH_FIELDS, USER_SEARCH_INDEX
 from .serializers import (
     UserSerializer,
     UserRegistrationSerializer,
@@ -117,8 +121,9 @@ class CollectorListView(generics.ListAPIView):
     """API view to list all collectors (for admin use)."""
     
     serializer_class = CollectorDetailSerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['username', 'first_name', 'last_name', 'email']
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
+    search_index = USER_SEARCH_INDEX
+    search_fields = USER_SEARCH_FIELDS
     ordering_fields = ['created_at', 'username']
     
     def get_queryset(self):
@@ -167,8 +172,10 @@ class AdminUserListView(generics.ListAPIView):
     """API view to list all users with statistics."""
     
     serializer_class = UserSerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['username', 'first_name', 'last_name', 'email']
+    pagination_class = EstimatedCountKeysetPagination
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
+    search_index = USER_SEARCH_INDEX
+    search_fields = USER_SEARCH_FIELDS
     ordering_fields = ['created_at', 'username', 'role']
     
     def get_queryset(self):
@@ -193,8 +193,9 @@ const ReportsAPI = {
         });
     },
     
-    async getMapData() {
-        return apiRequest('/reports/admin/map/');
+    async getMapData(params = {}) {
+        const queryString = new URLSearchParams(params).toString();
+        return apiRequest(`/reports/admin/map/${queryString ? '?' + queryString : ''}`);
     }
 };
 
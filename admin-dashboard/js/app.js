@@ -236,7 +236,7 @@ async function loadRecentReports() {
     const tbody = document.getElementById('recent-reports');
     
     try {
-        const data = await ReportsAPI.getAll({ page: 1 });
+        const data = await ReportsAPI.getAll({ fields: 'id,title,waste_type,status,created_at' });
         const reports = data.results || data;
         
         if (reports.length === 0) {
@@ -268,7 +268,8 @@ async function loadReports() {
     const tbody = document.getElementById('reports-table');
     tbody.innerHTML = '<tr><td colspan="8" class="loading">Loading...</td></tr>';
     
-    const params = {};
+    // The table shows reporter and collector names
+    const params = { expand: 'reported_by,assigned_to' };
     const status = document.getElementById('filter-status')?.value;
     const wasteType = document.getElementById('filter-waste-type')?.value;
     const search = document.getElementById('filter-search')?.value;
@@ -527,67 +528,98 @@ async function toggleCollectorStatus(id) {
 
 // Load Map
 async function loadMap() {
-    const mapContainer = document.getElementById('reports-map');
-    
     // Initialize map if not exists
     if (!map) {
         map = L.map('reports-map').setView([20.5937, 78.9629], 5); // India center
         L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
             attribution: '© OpenStreetMap contributors'
         }).addTo(map);
+        // Clusters are computed server-side for the visible area
+        map.on('moveend', debounce(refreshMapData, 300));
     }
     
-    // Clear existing markers
-    markers.forEach(m => map.removeLayer(m));
-    markers = [];
+    await refreshMapData();
     
+    // Trigger map resize
+    setTimeout(() => {
+        map.invalidateSize();
+    }, 100);
+}
+
+async function refreshMapData() {
     try {
-        const data = await ReportsAPI.getMapData();
-        
-        if (data.length === 0) {
-            return;
-        }
-        
-        const bounds = [];
-        
-        data.forEach(report => {
-            const lat = parseFloat(report.latitude);
-            const lng = parseFloat(report.longitude);
-            
-            if (isNaN(lat) || isNaN(lng)) return;
-            
-            const color = getStatusColor(report.status);
-            const marker = L.circleMarker([lat, lng], {
-                radius: 10,
-                fillColor: color,
-                color: '#fff',
-                weight: 2,
-                opacity: 1,
-                fillOpacity: 0.8
-            }).addTo(map);
-            
-            marker.bindPopup(`
-                <strong>${escapeHtml(report.title)}</strong><br>
-                Status: ${formatStatus(report.status)}<br>
-                Type: ${report.waste_type}<br>
-                <a href="#" onclick="viewReport(${report.id}); return false;">View Details</a>
-            `);
-            
-            markers.push(marker);
-            bounds.push([lat, lng]);
+        const data = await ReportsAPI.getMapData({
+            bbox: map.getBounds().toBBoxString(),
+            zoom: map.getZoom()
         });
         
-        if (bounds.length > 0) {
-            map.fitBounds(bounds, { padding: [50, 50] });
+        // Clear existing markers
+        markers.forEach(m => map.removeLayer(m));
+        markers = [];
+        
+        if (data.mode === 'clusters') {
+            data.clusters.forEach(cluster => markers.push(addClusterMarker(cluster)));
+        } else {
+            data.markers.forEach(report => {
+                const marker = addReportMarker(report);
+                if (marker) markers.push(marker);
+            });
         }
     } catch (error) {
         console.error('Failed to load map data:', error);
     }
+}
+
+function addReportMarker(report) {
+    const lat = parseFloat(report.latitude);
+    const lng = parseFloat(report.longitude);
+    
+    if (isNaN(lat) || isNaN(lng)) return null;
+    
+    const color = getStatusColor(report.status);
+    const marker = L.circleMarker([lat, lng], {
+        radius: 10,
+        fillColor: color,
+        color: '#fff',
+        weight: 2,
+        opacity: 1,
+        fillOpacity: 0.8
+    }).addTo(map);
+    
+    marker.bindPopup(`
+        <strong>${escapeHtml(report.title)}</strong><br>
+        Status: ${formatStatus(report.status)}<br>
+        Type: ${report.waste_type}<br>
+        <a href="#" onclick="viewReport(${report.id}); return false;">View Details</a>
+    `);
+    
+    return marker;
+}
+
+function addClusterMarker(cluster) {
+    // Colour by the most common status in the cluster
+    const [topStatus] = Object.entries(cluster.by_status).sort((a, b) => b[1] - a[1])[0];
+    const marker = L.circleMarker([cluster.latitude, cluster.longitude], {
+        radius: Math.min(10 + Math.log2(cluster.count) * 3, 30),
+        fillColor: getStatusColor(topStatus),
+        color: '#fff',
+        weight: 2,
+        opacity: 1,
+        fillOpacity: 0.8
+    }).addTo(map);
+    
+    const statusLines = Object.entries(cluster.by_status)
+        .map(([status, count]) => `${formatStatus(status)}: ${count}`)
+        .join('<br>');
+    marker.bindTooltip(`<strong>${cluster.count} reports</strong><br>${statusLines}`);
+    
+    // Zoom into the cluster's extent on click
+    const [minLng, minLat, maxLng, maxLat] = cluster.bounds;
+    marker.on('click', () => {
+        map.fitBounds([[minLat, minLng], [maxLat, maxLng]], { padding: [50, 50] });
+    });
     
-    // Trigger map resize
-    setTimeout(() => {
-        map.invalidateSize();
-    }, 100);
+    return marker;
 }
 
 // Chart instances for cleanup
@@ -0,0 +1,277 @@
+"""
+Keyset (cursor) pagination for large lists.
+
+Pages are fetched with a ``WHERE`` on the sort key of the last row seen
+instead of ``OFFSET``, so deep pages cost the same as the first. The sort
+key is the list's active ordering (``?ordering=``, ``?order=distance`` or
+the model default) followed by ``created_at`` and ``id`` as tie-breakers,
+which makes every position unique.
+
+Counts are optional. ``?count=exact`` runs ``COUNT(*)``. ``?count=estimate``
+uses the PostgreSQL planner's row estimate, or a briefly cached exact
+count on other databases. Small results are always counted exactly.
+``?count=none`` skips counting.
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+CURSOR_SALT = 'backend.pagination.cursor'
+
+COUNT_MODES = ('exact', 'estimate', 'none')
+
+
+def get_exact_count_threshold():
+    """Estimated row counts below this are replaced by an exact count."""
+    return getattr(settings, 'PAGINATION_EXACT_COUNT_THRESHOLD', 1000)
+
+
+def get_count_cache_seconds():
+    """How long cached counts are reused on databases without estimates."""
+    return getattr(settings, 'PAGINATION_COUNT_CACHE_SECONDS', 60)
+
+
+def planner_estimate(queryset):
+    """Row estimate from PostgreSQL's planner, or ``None`` elsewhere."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def cached_count(queryset):
+    """Exact count, cached per query for a short time."""
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.md5(f'{sql}|{params!r}'.encode(), usedforsecurity=False).hexdigest()
+    key = f'pagination:count:{digest}'
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout=get_count_cache_seconds())
+    return count
+
+
+def estimate_count(queryset):
+    """
+    Approximate row count.
+
+    Returns:
+        tuple: (count, is_estimate)
+    """
+    estimate = planner_estimate(queryset)
+    if estimate is None:
+        return cached_count(queryset), True
+    if estimate < get_exact_count_threshold():
+        return queryset.count(), False
+    return estimate, True
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on the active ordering plus ``(created_at, id)``.
+
+    Ordering fields must be non-null columns or annotations.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    tiebreakers = ('created_at', 'id')
+    # Default count mode: 'exact', 'estimate' or 'none'
+    count_mode = 'exact'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.keys = self.get_keys(queryset)
+        values, reverse = self.decode_cursor(request)
+
+        self.count, self.count_is_estimate = self.get_count(queryset, request)
+
+        queryset = queryset.order_by(*self.order_by(reverse))
+        if values is not None:
+            queryset = queryset.filter(self.after(values, reverse))
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_next = has_more if not reverse else values is not None
+        self.has_previous = values is not None if not reverse else has_more
+        self.page = rows
+        return rows
+
+    def get_keys(self, queryset):
+        """(field, descending) pairs for the sort key, ending at ``id``."""
+        ordering = list(queryset.query.order_by)
+        if not ordering and queryset.query.default_ordering:
+            ordering = list(queryset.model._meta.ordering)
+
+        keys = []
+        for term in ordering:
+            if not isinstance(term, str) or term == '?':
+                raise ValueError(f'Keyset pagination cannot order by {term!r}')
+            name = term.lstrip('-')
+            name = 'id' if name == 'pk' else name
+            if name not in dict(keys):
+                keys.append((name, term.startswith('-')))
+
+        descending = keys[0][1] if keys else True
+        for name in self.tiebreakers:
+            if name == 'id' or self.has_field(queryset.model, name):
+                if name not in dict(keys):
+                    keys.append((name, dict(keys).get('created_at', descending)))
+        # Everything after the unique key is redundant
+        names = [name for name, _ in keys]
+        return keys[:names.index('id') + 1]
+
+    @staticmethod
+    def has_field(model, name):
+        try:
+            model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return False
+        return True
+
+    def order_by(self, reverse):
+        return [
+            f"{'-' if descending != reverse else ''}{name}"
+            for name, descending in self.keys
+        ]
+
+    def after(self, values, reverse):
+        """
+        Filter for rows after ``values`` in the (possibly reversed) order.
+
+        Expands ``(a, b, c) > (x, y, z)`` into ``a >= x AND (a > x OR
+        (a = x AND b > y) OR ...)``; the leading range keeps the filter
+        usable by an index on the first key.
+        """
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(self.keys, values):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        first, descending = self.keys[0]
+        lead = 'lte' if descending != reverse else 'gte'
+        return Q(**{f'{first}__{lead}': values[0]}) & condition
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param, self.count_mode)
+        if mode not in COUNT_MODES:
+            mode = self.count_mode
+        if mode == 'exact':
+            return queryset.count(), False
+        if mode == 'estimate':
+            return estimate_count(queryset)
+        return None, False
+
+    def position(self, row):
+        values = []
+        for name, _ in self.keys:
+            value = row
+            for part in name.split('__'):
+                value = getattr(value, part)
+            values.append(value)
+        return values
+
+    def encode_cursor(self, row, reverse):
+        # Full-precision strings: DjangoJSONEncoder drops microseconds
+        values = [
+            value.isoformat() if isinstance(value, (datetime, date))
+            else str(value) if isinstance(value, (Decimal, UUID))
+            else value
+            for value in self.position(row)
+        ]
+        payload = {'k': [name for name, _ in self.keys], 'v': values, 'r': reverse}
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+        )
+
+    def decode_cursor(self, request):
+        """
+        Sort key values and direction from the request's cursor.
+
+        Raises:
+            NotFound: If the cursor is malformed or from another ordering
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = signing.loads(encoded, salt=CURSOR_SALT)
+            names = [name for name, _ in self.keys]
+            if payload['k'] != names:
+                raise ValueError
+            values = payload['v']
+            if len(values) != len(names):
+                raise ValueError
+            return values, bool(payload['r'])
+        except (signing.BadSignature, KeyError, TypeError, ValueError):
+            raise NotFound('Invalid cursor')
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict()
+        if self.count is not None:
+            payload['count'] = self.count
+            payload['count_is_estimate'] = self.count_is_estimate
+        payload['next'] = self.get_next_link()
+        payload['previous'] = self.get_previous_link()
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer'},
+                'count_is_estimate': {'type': 'boolean'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class EstimatedCountKeysetPagination(KeysetPagination):
+    """Keyset pagination with approximate counts, for very large lists."""
+
+    count_mode = 'estimate'
@@ -0,0 +1,333 @@
+"""
+Full-text search indexes for admin search.
+
+A ``SearchIndex`` describes the weighted text columns of one table. The
+database keeps the index up to date with triggers, so every write is
+covered, including bulk updates that skip model signals:
+
+- PostgreSQL: a ``search_vector`` tsvector column on the table, filled by a
+  trigger and indexed with GIN. Results are ranked with ``ts_rank_cd``.
+- SQLite: an external-content FTS5 table ``<table>_fts`` fed by insert,
+  update and delete triggers. Results are ranked with ``bm25``.
+- Other databases fall back to ``icontains`` across ``search_fields``.
+
+Terms are matched as prefixes and must all match, like the ``icontains``
+search they replace. Ranking reads every match, so queries matching more
+than ``SEARCH_RANK_MAX_ROWS`` rows keep the list's own ordering instead,
+which the database can stop early on. Indexes are installed by migrations and can be
+recomputed with ``python manage.py rebuild_search_index``.
+"""
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+from backend.pagination import planner_estimate
+
+# Weight -> FTS5 bm25 column weight, mirroring ts_rank's default weights
+BM25_WEIGHTS = {'A': 10.0, 'B': 4.0, 'C': 2.0, 'D': 1.0}
+
+# First SQLite version with MATERIALIZED CTEs, which ranking needs
+SQLITE_MATERIALIZED_CTE = (3, 35, 0)
+
+# Rows per UPDATE when recomputing PostgreSQL vectors
+REBUILD_BATCH_SIZE = 10000
+
+TERM_RE = re.compile(r'[^\W_]+')
+
+
+def get_search_config():
+    """PostgreSQL text search configuration (language) for new vectors."""
+    return getattr(settings, 'SEARCH_CONFIG', 'english')
+
+
+def get_rank_max_rows():
+    """Largest (estimated) number of matches that is ranked by relevance."""
+    return getattr(settings, 'SEARCH_RANK_MAX_ROWS', 10000)
+
+
+def search_terms(query):
+    """Lower-cased alphanumeric terms of a search string."""
+    return TERM_RE.findall(query.lower())
+
+
+class SearchIndex:
+    """
+    Full-text index over weighted text columns of one table.
+
+    Args:
+        app_label: App owning the table, whose migrations install the index
+        table: Database table name
+        columns: Mapping of column name to weight ('A' highest to 'D')
+    """
+
+    registry = []
+
+    def __init__(self, app_label, table, columns):
+        self.app_label = app_label
+        self.table = table
+        self.columns = columns
+        SearchIndex.registry.append(self)
+
+    @property
+    def fts_table(self):
+        return f'{self.table}_fts'
+
+    # PostgreSQL
+
+    def _pg_vector_sql(self, row, config):
+        # Split on punctuation first so e.g. emails index as separate words,
+        # the same way search_terms() splits queries
+        return ' || '.join(
+            f"setweight(to_tsvector('{config}'::regconfig, regexp_replace("
+            f"coalesce({row}{column}, ''), '[^[:alnum:]]+', ' ', 'g')), '{weight}')"
+            for column, weight in self.columns.items()
+        )
+
+    def _pg_install(self, cursor, config):
+        table = self.table
+        columns = ', '.join(self.columns)
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector')
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION {table}_search_vector() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := {self._pg_vector_sql('NEW.', config)};
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        cursor.execute(f'DROP TRIGGER IF EXISTS {table}_search_vector ON {table}')
+        cursor.execute(f"""
+            CREATE TRIGGER {table}_search_vector
+            BEFORE INSERT OR UPDATE OF {columns} ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_search_vector()
+        """)
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {table}_search_idx ON {table} USING gin (search_vector)'
+        )
+
+    def _pg_rebuild(self, cursor, config):
+        cursor.execute(f'SELECT min(id), max(id) FROM {self.table}')
+        low, high = cursor.fetchone()
+        if low is None:
+            return
+        for start in range(low, high + 1, REBUILD_BATCH_SIZE):
+            cursor.execute(
+                f'UPDATE {self.table} SET search_vector = {self._pg_vector_sql("", config)} '
+                f'WHERE id >= %s AND id < %s',
+                [start, start + REBUILD_BATCH_SIZE]
+            )
+        # Fresh statistics, so the planner (and estimated counts) know the
+        # selectivity of search_vector
+        cursor.execute(f'ANALYZE {self.table}')
+
+    def _pg_uninstall(self, cursor):
+        cursor.execute(f'DROP TRIGGER IF EXISTS {self.table}_search_vector ON {self.table}')
+        cursor.execute(f'DROP FUNCTION IF EXISTS {self.table}_search_vector()')
+        cursor.execute(f'DROP INDEX IF EXISTS {self.table}_search_idx')
+        cursor.execute(f'ALTER TABLE {self.table} DROP COLUMN IF EXISTS search_vector')
+
+    # SQLite
+
+    def _sqlite_install_triggers(self, cursor):
+        table, fts = self.table, self.fts_table
+        columns = ', '.join(self.columns)
+        new = ', '.join(f'new.{column}' for column in self.columns)
+        old = ', '.join(f'old.{column}' for column in self.columns)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts} (rowid, {columns}) VALUES (new.id, {new});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {columns}) VALUES ('delete', old.id, {old});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {columns} ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {columns}) VALUES ('delete', old.id, {old});
+                INSERT INTO {fts} (rowid, {columns}) VALUES (new.id, {new});
+            END
+        """)
+
+    def _sqlite_install(self, cursor):
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {self.fts_table} USING fts5(
+                {', '.join(self.columns)},
+                content='{self.table}', content_rowid='id',
+                tokenize='porter unicode61 remove_diacritics 2'
+            )
+        """)
+        self._sqlite_install_triggers(cursor)
+
+    def _sqlite_rebuild(self, cursor):
+        cursor.execute(f"INSERT INTO {self.fts_table} ({self.fts_table}) VALUES ('rebuild')")
+
+    def _sqlite_uninstall(self, cursor):
+        for suffix in ('insert', 'delete', 'update'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {self.fts_table}_{suffix}')
+        cursor.execute(f'DROP TABLE IF EXISTS {self.fts_table}')
+
+    def _sqlite_installed(self, cursor):
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [self.fts_table]
+        )
+        return cursor.fetchone() is not None
+
+    # Lifecycle
+
+    def install(self, connection):
+        """Create the index and its triggers, then fill it."""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                config = get_search_config()
+                self._pg_install(cursor, config)
+                self._pg_rebuild(cursor, config)
+            elif connection.vendor == 'sqlite':
+                self._sqlite_install(cursor)
+                self._sqlite_rebuild(cursor)
+
+    def uninstall(self, connection):
+        """Drop the index and its triggers."""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                self._pg_uninstall(cursor)
+            elif connection.vendor == 'sqlite':
+                self._sqlite_uninstall(cursor)
+
+    def rebuild(self, connection):
+        """
+        Recompute the whole index (e.g. after changing SEARCH_CONFIG).
+
+        Also recreates missing triggers, since install is idempotent.
+        """
+        self.install(connection)
+
+    def repair(self, connection):
+        """
+        Restore SQLite triggers dropped by a migration.
+
+        Django's SQLite backend rebuilds a table to alter it, which drops
+        the table's triggers. The FTS5 table keeps its rows because ids are
+        copied across.
+        """
+        if connection.vendor != 'sqlite':
+            return
+        with connection.cursor() as cursor:
+            if self._sqlite_installed(cursor):
+                self._sqlite_install_triggers(cursor)
+
+    # Querying
+
+    def supported(self, connection):
+        return connection.vendor in ('postgresql', 'sqlite')
+
+    def _too_many_to_rank(self, queryset, expression=None):
+        limit = get_rank_max_rows()
+        estimate = planner_estimate(queryset)
+        if estimate is not None:
+            return estimate > limit
+        # SQLite: count the FTS matches, stopping past the limit
+        fts = self.fts_table
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM (SELECT 1 FROM {fts} WHERE {fts} MATCH %s LIMIT %s)',
+                [expression, limit + 1]
+            )
+            return cursor.fetchone()[0] > limit
+
+    def search(self, queryset, query, rank=True):
+        """
+        Restrict ``queryset`` to rows matching every term of ``query``.
+
+        Args:
+            queryset: Queryset over this index's table
+            query: Free-text search string
+            rank: Annotate ``search_rank`` (higher is more relevant) and
+                order by it, unless the query matches too many rows
+
+        Returns:
+            QuerySet: The filtered queryset, unchanged if the query has
+            no terms
+        """
+        terms = search_terms(query)
+        if not terms:
+            return queryset
+        connection = connections[queryset.db]
+        table = queryset.model._meta.db_table
+
+        if connection.vendor == 'postgresql':
+            tsquery = f"to_tsquery('{get_search_config()}'::regconfig, %s)"
+            expression = ' & '.join(f'{term}:*' for term in terms)
+            queryset = queryset.filter(RawSQL(
+                f'"{table}"."search_vector" @@ {tsquery}',
+                [expression],
+                output_field=BooleanField()
+            ))
+            rank = rank and not self._too_many_to_rank(queryset)
+            if rank:
+                # float4 -> float8, so cursor values round-trip exactly
+                queryset = queryset.annotate(search_rank=RawSQL(
+                    f'ts_rank_cd("{table}"."search_vector", {tsquery})::double precision',
+                    [expression],
+                    output_field=FloatField()
+                ))
+        else:
+            fts = self.fts_table
+            expression = ' '.join(f'"{term}"*' for term in terms)
+            queryset = queryset.filter(pk__in=RawSQL(
+                f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s',
+                [expression]
+            ))
+            # bm25() cannot run in an aggregate query (e.g. one annotated
+            # with counts), so those are filtered without ranking
+            grouped = queryset.query.group_by is not None
+            rank = (
+                rank and not grouped
+                and connection.Database.sqlite_version_info >= SQLITE_MATERIALIZED_CTE
+                and not self._too_many_to_rank(queryset, expression)
+            )
+            if rank:
+                # The CTE is materialized once per query and then looked up
+                # by id; without MATERIALIZED SQLite would re-run the MATCH
+                # for every row
+                weights = ', '.join(str(BM25_WEIGHTS[weight]) for weight in self.columns.values())
+                queryset = queryset.annotate(search_rank=RawSQL(
+                    f'(WITH ranks AS MATERIALIZED ('
+                    f'SELECT rowid AS id, -bm25({fts}, {weights}) AS score FROM {fts} WHERE {fts} MATCH %s'
+                    f') SELECT score FROM ranks WHERE ranks.id = "{table}"."id")',
+                    [expression],
+                    output_field=FloatField()
+                ))
+        if rank:
+            queryset = queryset.order_by('-search_rank')
+        return queryset
+
+
+def repair_search_indexes(sender, using, **kwargs):
+    """post_migrate receiver restoring an app's SQLite search triggers."""
+    connection = connections[using]
+    for index in SearchIndex.registry:
+        if index.app_label == sender.label:
+            index.repair(connection)
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    ``?search=`` backed by the view's ``search_index``.
+
+    Results are ordered by relevance unless the request asks for another
+    ``?ordering=``. Unsupported databases use the regular ``search_fields``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        index = getattr(view, 'search_index', None)
+        if index is None or not index.supported(connections[queryset.db]):
+            return super().filter_queryset(request, queryset, view)
+        query = request.query_params.get(self.search_param, '')
+        return index.search(queryset, query)
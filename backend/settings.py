@@ -86,17 +86,66 @@ TEMPLATES = [
 WSGI_APPLICATION = 'backend.wsgi.application'
 ASGI_APPLICATION = 'backend.asgi.application'
 
-# Channels Layer Configuration
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',  # Use Redis in production
-        # For production with Redis:
-        # 'BACKEND': 'channels_redis.core.RedisChannelLayer',
-        # 'CONFIG': {
-        #     'hosts': [os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379')],
-        # },
+# Channels Layer Configuration: Redis when REDIS_URL is set, so a message
+# sent by one worker reaches WebSockets connected to any worker
+REDIS_URL = os.environ.get('REDIS_URL', os.environ.get('REDISCLOUD_URL'))
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [REDIS_URL],
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
+# Minimum seconds between stats_update pushes to admin dashboards
+DASHBOARD_STATS_PUSH_INTERVAL = float(os.environ.get('DASHBOARD_STATS_PUSH_INTERVAL', '2'))
+
+# Mobile change-feed sync: days of change log kept (older cursors force a
+# full resync) and seconds before a change is considered settled
+SYNC_CHANGE_RETENTION_DAYS = int(os.environ.get('SYNC_CHANGE_RETENTION_DAYS', '30'))
+SYNC_SETTLE_SECONDS = float(os.environ.get('SYNC_SETTLE_SECONDS', '5'))
+
+# Collector route optimisation: refinement time budget and ETA assumptions
+ROUTE_TIME_BUDGET_MS = int(os.environ.get('ROUTE_TIME_BUDGET_MS', '300'))
+ROUTE_AVERAGE_SPEED_KMH = float(os.environ.get('ROUTE_AVERAGE_SPEED_KMH', '20'))
+ROUTE_SERVICE_MINUTES = float(os.environ.get('ROUTE_SERVICE_MINUTES', '5'))
+
+# Batch auto-assignment: default maximum open tasks per collector
+ASSIGNMENT_COLLECTOR_CAPACITY = int(os.environ.get('ASSIGNMENT_COLLECTOR_CAPACITY', '25'))
+
+# Distances for routing and assignment: 'haversine' (straight line) or
+# 'road_network' (offline graph built with `manage.py build_road_graph`).
+# Points further than ROAD_SNAP_RADIUS_M from a road use straight lines.
+DISTANCE_PROVIDER = os.environ.get('DISTANCE_PROVIDER', 'haversine')
+ROAD_GRAPH_PATH = os.environ.get('ROAD_GRAPH_PATH', str(BASE_DIR / 'data' / 'road_graph.npz'))
+ROAD_SNAP_RADIUS_M = float(os.environ.get('ROAD_SNAP_RADIUS_M', '500'))
+ROAD_MATRIX_CACHE_SIZE = int(os.environ.get('ROAD_MATRIX_CACHE_SIZE', '256'))
+
+
+# Cache shared by all workers (dashboard counters, stats push window,
+# response cache): Redis when REDIS_URL is set, otherwise a per-process
+# locmem cache that is only correct with a single worker
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'smart-waste',
+        }
     }
-}
 
 
 # Database
@@ -186,6 +235,22 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
 }
 
+# Keyset-paginated lists: estimated counts below this are counted exactly;
+# databases without planner estimates cache counts for this many seconds
+PAGINATION_EXACT_COUNT_THRESHOLD = int(os.environ.get('PAGINATION_EXACT_COUNT_THRESHOLD', '1000'))
+PAGINATION_COUNT_CACHE_SECONDS = int(os.environ.get('PAGINATION_COUNT_CACHE_SECONDS', '60'))
+
+# PostgreSQL text search configuration for admin search; run
+# `manage.py rebuild_search_index` after changing it
+SEARCH_CONFIG = os.environ.get('SEARCH_CONFIG', 'english')
+
+# Searches matching more rows than this are not ranked by relevance
+SEARCH_RANK_MAX_ROWS = int(os.environ.get('SEARCH_RANK_MAX_ROWS', '10000'))
+
+# Seconds citizen and collector report responses stay in the per-user
+# response cache (0 disables it). Only used with the shared Redis cache
+RESPONSE_CACHE_SECONDS = int(os.environ.get('RESPONSE_CACHE_SECONDS', '300'))
+
 # JWT Configuration
 from datetime import timedelta
 SIMPLE_JWT = {
@@ -0,0 +1,79 @@
+"""
+In-instance change tracking for model fields.
+
+Models list the attributes to watch in ``tracked_fields``. Their values are
+captured when an instance is loaded from the database and refreshed after
+each save, so ``post_save`` receivers can compare old and new values
+without re-reading the row. The snapshot lives on the instance: nothing is
+left behind when a save fails, and nothing is shared between workers.
+
+Instances that were not loaded from the database (built by hand with a pk,
+or loaded with the tracked fields deferred) fall back to one SELECT of the
+missing fields just before saving.
+"""
+
+
+class TrackedFieldsMixin:
+    """Snapshot ``tracked_fields`` (attnames) as they are in the database."""
+
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: getattr(instance, name)
+            for name in cls.tracked_fields
+            if name in field_names
+        }
+        return instance
+
+    def _tracked_in(self, names):
+        """Tracked attnames among field names or attnames (all when ``None``)."""
+        if names is None:
+            return list(self.tracked_fields)
+        names = set(names)
+        return [
+            field.attname for field in self._meta.concrete_fields
+            if field.attname in self.tracked_fields and (field.name in names or field.attname in names)
+        ]
+
+    def mark_saved(self, names=None):
+        """
+        Record the current values as stored, e.g. after a queryset update.
+
+        Args:
+            names: Field names or attnames that were written (all when ``None``)
+        """
+        loaded = getattr(self, '_loaded_values', {})
+        for name in self._tracked_in(names):
+            loaded[name] = getattr(self, name)
+        self._loaded_values = loaded
+
+    def previous_values(self):
+        """
+        Tracked values as last loaded or saved.
+
+        Inside ``post_save`` these are the values the row had before the
+        save. Fields whose old value was never read (a save with
+        ``update_fields`` that left them out) report their current value.
+        """
+        loaded = getattr(self, '_loaded_values', {})
+        return {name: loaded[name] if name in loaded else getattr(self, name) for name in self.tracked_fields}
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if self.pk is not None:
+            loaded = getattr(self, '_loaded_values', {})
+            missing = [name for name in self._tracked_in(update_fields) if name not in loaded]
+            if missing:
+                row = type(self)._base_manager.using(kwargs.get('using') or self._state.db).filter(
+                    pk=self.pk
+                ).values(*missing).first()
+                self._loaded_values = {**loaded, **(row or {})}
+        super().save(*args, **kwargs)
+        self.mark_saved(update_fields)
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self.mark_saved(fields)
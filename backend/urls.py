@@ -42,17 +42,23 @@ def api_root(request):
             'citizen': {
                 'reports': '/api/reports/citizen/reports/',
                 'report_detail': '/api/reports/citizen/reports/<id>/',
+                'sync': '/api/reports/citizen/sync/',
             },
             'collector': {
                 'tasks': '/api/reports/collector/tasks/',
                 'task_detail': '/api/reports/collector/tasks/<id>/',
                 'update_status': '/api/reports/collector/tasks/<id>/update-status/',
+                'sync': '/api/reports/collector/sync/',
+                'route': '/api/reports/collector/tasks/route/',
             },
             'admin': {
                 'reports': '/api/reports/admin/reports/',
+                'export_reports': '/api/reports/admin/reports/export/',
                 'report_detail': '/api/reports/admin/reports/<id>/',
                 'assign_collector': '/api/reports/admin/reports/<id>/assign/',
+                'auto_assign': '/api/reports/admin/reports/auto-assign/',
                 'reject_report': '/api/reports/admin/reports/<id>/reject/',
+                'merge_reports': '/api/reports/admin/reports/<id>/merge/',
                 'dashboard': '/api/reports/admin/dashboard/',
             },
             'django_admin': '/admin/',
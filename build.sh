@@ -11,6 +11,9 @@ python manage.py collectstatic --no-input
 # Apply database migrations
 python manage.py migrate
 
+# Backfill analytics rollups
+python manage.py rebuild_report_stats
+
 # Delete and recreate admin user with proper permissions
 python manage.py shell << EOF
 from django.contrib.auth import get_user_model
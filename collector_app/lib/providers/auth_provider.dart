@@ -295,11 +295,13 @@ class AuthProvider with ChangeNotifier {
     String method,
     String url, {
     Map<String, dynamic>? body,
+    Map<String, String>? extraHeaders,
   }) async {
     try {
       final headers = {
         'Authorization': 'Bearer $_accessToken',
         'Content-Type': 'application/json',
+        ...?extraHeaders,
       };
 
       http.Response response;
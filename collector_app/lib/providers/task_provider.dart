@@ -9,6 +9,7 @@ import 'auth_provider.dart';
 /// Task Provider for managing collector tasks
 class TaskProvider with ChangeNotifier {
   List<Task> _tasks = [];
+  String? _tasksEtag;
   Task? _selectedTask;
   bool _isLoading = false;
   String? _error;
@@ -36,6 +37,7 @@ class TaskProvider with ChangeNotifier {
       final response = await authProvider.authenticatedRequest(
         'GET',
         ApiConstants.collectorTasks,
+        extraHeaders: _tasksEtag != null ? {'If-None-Match': _tasksEtag!} : null,
       );
 
       if (response == null) {
@@ -48,8 +50,11 @@ class TaskProvider with ChangeNotifier {
       print('Fetch tasks response status: ${response.statusCode}');
       print('Fetch tasks response body: ${response.body}');
 
-      if (response.statusCode == 200) {
+      if (response.statusCode == 304) {
+        // Unchanged since the last fetch, keep the current tasks
+      } else if (response.statusCode == 200) {
         final data = jsonDecode(response.body);
+        _tasksEtag = response.headers['etag'];
 
         // Handle both list and paginated response
         List<dynamic> taskList;
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import GarbageReport, ReportUpdate
+from .models import GarbageReport, ReportUpdate, ReportDailyStats
 
 
 @admin.register(GarbageReport)
@@ -18,3 +18,10 @@ class ReportUpdateAdmin(admin.ModelAdmin):
     search_fields = ['report__title', 'note']
     readonly_fields = ['created_at']
     ordering = ['-created_at']
+
+
+@admin.register(ReportDailyStats)
+class ReportDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ['date', 'waste_type', 'status', 'created', 'assigned', 'completed', 'rejected']
+    list_filter = ['waste_type', 'status', 'date']
+    ordering = ['-date']
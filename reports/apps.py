@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ReportsConfig(AppConfig):
@@ -7,3 +8,7 @@ class ReportsConfig(AppConfig):
     def ready(self):
         # Import signals to register them
         import reports.signals  # noqa
+        from backend.search import repair_search_indexes
+        # Registers REPORT_SEARCH_INDEX, so the receiver can repair it
+        import reports.filters  # noqa
+        post_migrate.connect(repair_search_indexes, sender=self)
@@ -0,0 +1,367 @@
+"""
+Batch auto-assignment of pending reports to collectors.
+
+Each collector is anchored at the centroid of their open tasks (or seeded
+from the pending reports if they have none). Reports are handed out in
+regret order: the report that would lose most by missing its nearest
+collector goes first. Each collector's slots are capped by their capacity
+and by an even share of the total workload. Anchors then move to the
+centroid of each collector's work, and the assignment is repeated until
+it settles.
+
+Plans are applied in one transaction with bulk writes. The per-row
+signals are skipped, so the rollup, counters, sync feed and notifications
+are updated here in bulk.
+"""
+import math
+
+import numpy as np
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Avg, Count
+from django.utils import timezone
+
+from . import counters, response_cache, sync
+from .broadcasts import broadcast_reports_updated
+from .distances import get_distance_provider, haversine_matrix
+from .filters import filter_reports
+from .geo import apply_spatial_filters
+from .models import GarbageReport, ReportUpdate
+from .stats import record_status_changes
+from .stats_push import schedule_stats_push
+
+User = get_user_model()
+
+OPEN_TASK_STATUSES = ['assigned', 'in_progress']
+
+# Anchor refinement rounds
+MAX_ITERATIONS = 10
+
+# Pending reports considered per batch, oldest first
+MAX_BATCH_REPORTS = 5000
+
+
+def get_collector_capacity():
+    """Default maximum open tasks per collector."""
+    return getattr(settings, 'ASSIGNMENT_COLLECTOR_CAPACITY', 25)
+
+
+def pending_reports(params=None, report_ids=None):
+    """
+    Oldest pending reports matching the admin list filters.
+
+    Args:
+        params: Mapping with optional waste_type, date_from, date_to and
+            bbox keys
+        report_ids: Optional ids to restrict the batch to
+
+    Raises:
+        ValueError: If a spatial parameter is malformed
+    """
+    params = {key: value for key, value in (params or {}).items() if key != 'status'}
+    queryset = GarbageReport.objects.filter(status=GarbageReport.Status.PENDING)
+    queryset = apply_spatial_filters(filter_reports(queryset, params), params)
+    if report_ids:
+        queryset = queryset.filter(pk__in=report_ids)
+    return list(queryset.order_by('created_at', 'id')[:MAX_BATCH_REPORTS])
+
+
+def active_collectors(collector_ids=None):
+    """Active collectors, optionally restricted to ``collector_ids``."""
+    queryset = User.objects.filter(role='collector', is_active=True)
+    if collector_ids:
+        queryset = queryset.filter(pk__in=collector_ids)
+    return list(queryset.order_by('id'))
+
+
+def collector_loads(collectors):
+    """
+    Open task count and task centroid for each collector, in one query.
+
+    Returns:
+        dict: Collector id -> (count, latitude, longitude); collectors with
+        no open tasks are missing
+    """
+    rows = GarbageReport.objects.filter(
+        assigned_to__in=collectors,
+        status__in=OPEN_TASK_STATUSES
+    ).values('assigned_to').annotate(
+        count=Count('id'),
+        latitude=Avg('geo_lat'),
+        longitude=Avg('geo_lng')
+    ).order_by()
+    return {
+        row['assigned_to']: (row['count'], row['latitude'], row['longitude'])
+        for row in rows
+    }
+
+
+def _seed_anchors(points, anchors, missing):
+    """
+    Place missing anchors on pending reports far from existing ones.
+
+    Seeding only needs a rough spread, so it uses straight-line distances.
+    """
+    placed = [anchor for anchor in anchors if anchor is not None]
+    if placed:
+        nearest = haversine_matrix(points, placed).min(axis=1)
+    else:
+        # Start from the report furthest from the centre of the work
+        nearest = haversine_matrix(points, [points.mean(axis=0)])[:, 0]
+    for index in missing:
+        chosen = int(np.argmax(nearest))
+        anchors[index] = tuple(points[chosen])
+        nearest = np.minimum(nearest, haversine_matrix(points, [points[chosen]])[:, 0])
+    return anchors
+
+
+def _assign(distances, slots):
+    """
+    Regret-ordered assignment of rows (reports) to columns (collectors).
+
+    Returns:
+        numpy.ndarray: Column per row, -1 where no collector had room
+    """
+    n, k = distances.shape
+    choice = np.full(n, -1)
+    remaining = slots.copy()
+    if k > 1:
+        ordered = np.sort(distances, axis=1)
+        regret = ordered[:, 1] - ordered[:, 0]
+    else:
+        regret = -distances[:, 0]
+    preference = np.argsort(distances, axis=1)
+    for row in np.argsort(-regret, kind='stable'):
+        for column in preference[row]:
+            if remaining[column] > 0:
+                choice[row] = column
+                remaining[column] -= 1
+                break
+    return choice
+
+
+def plan_assignments(reports, collectors, capacity=None):
+    """
+    Plan a balanced, capacity-aware assignment of reports to collectors.
+
+    Args:
+        reports: Pending GarbageReport instances
+        collectors: Collector users to assign to
+        capacity: Maximum open tasks per collector (default from settings)
+
+    Returns:
+        dict: ``collectors`` (per-collector load, capacity, planned report
+        ids with their distances, and travel distance), ``unassigned``
+        report ids and ``total_distance_m``, the sum of distances from each
+        collector's anchor to its reports
+    """
+    if capacity is None:
+        capacity = get_collector_capacity()
+    collectors = list(collectors)
+    reports = [report for report in reports if report.geo_lat is not None]
+    loads = collector_loads(collectors)
+
+    current = np.array([loads.get(c.pk, (0,))[0] for c in collectors], dtype=int)
+    plan = {
+        'collectors': [
+            {
+                'id': collector.pk,
+                'username': collector.username,
+                'current_load': int(load),
+                'capacity': capacity,
+                'report_ids': [],
+                'report_distances_m': [],
+                'distance_m': 0.0,
+            }
+            for collector, load in zip(collectors, current)
+        ],
+        'unassigned': [report.pk for report in reports],
+        'total_distance_m': 0.0,
+    }
+    if not reports or not collectors:
+        return plan
+
+    # Even share of the total workload, never above capacity
+    share = math.ceil((current.sum() + len(reports)) / len(collectors))
+    slots = np.clip(min(share, capacity) - current, 0, None)
+
+    points = np.array([(r.geo_lat, r.geo_lng) for r in reports])
+    anchors = [
+        (loads[c.pk][1], loads[c.pk][2]) if c.pk in loads and loads[c.pk][1] is not None else None
+        for c in collectors
+    ]
+    missing = [index for index, anchor in enumerate(anchors) if anchor is None]
+    anchors = _seed_anchors(points, anchors, missing)
+
+    # Travel from each collector's anchor to each report
+    provider = get_distance_provider()
+    choice = None
+    for _ in range(MAX_ITERATIONS):
+        distances = provider.matrix(anchors, points).T
+        new_choice = _assign(distances, slots)
+        if choice is not None and np.array_equal(choice, new_choice):
+            break
+        choice = new_choice
+
+        # Move each anchor to the centroid of existing and planned work
+        for index, collector in enumerate(collectors):
+            mine = points[choice == index]
+            count, lat, lng = loads.get(collector.pk, (0, None, None))
+            if lat is None:
+                count = 0
+            if len(mine) or count:
+                total = mine.sum(axis=0) + (np.array([lat, lng]) * count if count else 0)
+                anchors[index] = tuple(total / (len(mine) + count))
+
+    distances = provider.matrix(anchors, points).T
+    plan['unassigned'] = []
+    for row, column in enumerate(choice):
+        if column < 0:
+            plan['unassigned'].append(reports[row].pk)
+            continue
+        entry = plan['collectors'][column]
+        entry['report_ids'].append(reports[row].pk)
+        entry['report_distances_m'].append(round(float(distances[row, column]), 1))
+
+    _sum_distances(plan)
+    return plan
+
+
+def _sum_distances(plan):
+    """Total the per-report distances for each collector and the plan."""
+    for entry in plan['collectors']:
+        entry['distance_m'] = round(sum(entry['report_distances_m']), 1)
+    plan['total_distance_m'] = round(sum(entry['distance_m'] for entry in plan['collectors']), 1)
+
+
+def apply_plan(plan, actor):
+    """
+    Write a plan in one transaction.
+
+    Reports that stopped being pending since the plan was made are skipped,
+    as are the reports of collectors deactivated or removed since then.
+    Skipped reports are moved to the plan's ``unassigned`` list and the
+    plan's distances updated, so the caller sees what was actually applied.
+
+    Returns:
+        int: Number of reports assigned
+    """
+    collectors = {entry['id']: entry for entry in plan['collectors'] if entry['report_ids']}
+    if not collectors:
+        return 0
+
+    with transaction.atomic():
+        # Locked, so a collector cannot be deactivated while tasks are handed out
+        collector_users = User.objects.select_for_update().filter(
+            role='collector',
+            is_active=True
+        ).in_bulk(list(collectors))
+        for collector_id in set(collectors) - set(collector_users):
+            entry = collectors.pop(collector_id)
+            _unplan(entry, entry['report_ids'], plan)
+        report_ids = [pk for entry in collectors.values() for pk in entry['report_ids']]
+        reports = GarbageReport.objects.select_for_update().filter(
+            pk__in=report_ids,
+            status=GarbageReport.Status.PENDING
+        ).in_bulk()
+
+        now = timezone.now()
+        assigned = []
+        updates = []
+        for collector_id, entry in collectors.items():
+            collector = collector_users[collector_id]
+            stale = [pk for pk in entry['report_ids'] if pk not in reports]
+            if stale:
+                _unplan(entry, stale, plan)
+            mine = [reports[pk] for pk in entry['report_ids']]
+            if not mine:
+                continue
+            GarbageReport.objects.filter(pk__in=[r.pk for r in mine]).update(
+                assigned_to=collector,
+                status=GarbageReport.Status.ASSIGNED,
+                updated_at=now
+            )
+            for report in mine:
+                report.assigned_to = collector
+                report.status = GarbageReport.Status.ASSIGNED
+                report.updated_at = now
+                updates.append(ReportUpdate(
+                    report=report,
+                    status=GarbageReport.Status.ASSIGNED,
+                    note=f'Auto-assigned to {collector.username}',
+                    updated_by=actor
+                ))
+            assigned += mine
+
+        ReportUpdate.objects.bulk_create(updates)
+
+        record_status_changes(
+            [(report.created_at, report.waste_type) for report in assigned],
+            GarbageReport.Status.PENDING,
+            GarbageReport.Status.ASSIGNED
+        )
+        counters.report_status_changed(
+            GarbageReport.Status.PENDING, GarbageReport.Status.ASSIGNED, count=len(assigned)
+        )
+        sync.record_reports_saved(assigned)
+        sync.record_updates_created(updates)
+        response_cache.invalidate_users(
+            {report.reported_by_id for report in assigned} | {report.assigned_to_id for report in assigned}
+        )
+        schedule_stats_push()
+        # The same dashboard and per-report events as any bulk status change
+        broadcast_reports_updated(assigned, {report.pk: GarbageReport.Status.PENDING for report in assigned})
+        transaction.on_commit(lambda: notify_assignments(assigned))
+
+    _sum_distances(plan)
+    return len(assigned)
+
+
+def _unplan(entry, report_ids, plan):
+    """Move some of a collector's planned reports back to ``unassigned``."""
+    dropped = set(report_ids)
+    kept = [
+        (pk, distance)
+        for pk, distance in zip(entry['report_ids'], entry['report_distances_m'])
+        if pk not in dropped
+    ]
+    plan['unassigned'] += [pk for pk in entry['report_ids'] if pk in dropped]
+    entry['report_ids'] = [pk for pk, _ in kept]
+    entry['report_distances_m'] = [distance for _, distance in kept]
+
+
+def notify_assignments(reports):
+    """Send one notification per collector and per reporter."""
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return
+
+    by_collector = {}
+    by_reporter = {}
+    for report in reports:
+        by_collector.setdefault(report.assigned_to_id, []).append(report.pk)
+        by_reporter.setdefault(report.reported_by_id, []).append(report.pk)
+
+    for collector_id, report_ids in by_collector.items():
+        async_to_sync(channel_layer.group_send)(
+            f'user_{collector_id}',
+            {
+                'type': 'notification',
+                'title': 'New Tasks Assigned',
+                'message': f'You have been assigned {len(report_ids)} new task(s)',
+                'data': {'report_ids': report_ids}
+            }
+        )
+    for reporter_id, report_ids in by_reporter.items():
+        async_to_sync(channel_layer.group_send)(
+            f'user_{reporter_id}',
+            {
+                'type': 'notification',
+                'title': 'Report Status Updated',
+                'message': 'Your report has been assigned to a collector',
+                'data': {'report_ids': report_ids, 'status': GarbageReport.Status.ASSIGNED}
+            }
+        )
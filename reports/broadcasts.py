@@ -0,0 +1,247 @@
+"""
+WebSocket broadcasts for saved reports.
+
+Messages are built when the report is saved and sent once the transaction
+commits, so clients never hear about changes that were rolled back.
+"""
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+
+def report_payload(report):
+    """Report fields sent to WebSocket clients."""
+    return {
+        'id': report.id,
+        'title': report.title,
+        'status': report.status,
+        'waste_type': report.waste_type,
+        'latitude': str(report.latitude) if report.latitude else None,
+        'longitude': str(report.longitude) if report.longitude else None,
+        'created_at': report.created_at.isoformat() if report.created_at else None,
+        'reporter_id': report.reported_by_id,
+        'collector_id': report.assigned_to_id,
+    }
+
+
+def broadcast_report_saved(report, created, old_status=None, old_collector_id=None):
+    """
+    Notify dashboards, the reporter and collectors about a saved report.
+
+    Args:
+        report: The saved GarbageReport
+        created: Whether the report is new
+        old_status: Status before the change (updates only)
+        old_collector_id: Collector before the change (updates only)
+    """
+    report_data = report_payload(report)
+    transaction.on_commit(
+        lambda: _send(report_data, created, old_status, old_collector_id)
+    )
+
+
+def _send(report_data, created, old_status, old_collector_id):
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return
+    
+    report_id = report_data['id']
+    reporter_id = report_data['reporter_id']
+    collector_id = report_data['collector_id']
+    new_status = report_data['status']
+    title = report_data['title']
+    
+    if created:
+        # New report created
+        # Notify admins
+        async_to_sync(channel_layer.group_send)(
+            'dashboard_updates',
+            {
+                'type': 'report_update',
+                'report': report_data,
+                'action': 'created'
+            }
+        )
+        
+        # Notify general updates channel
+        async_to_sync(channel_layer.group_send)(
+            'report_updates',
+            {
+                'type': 'report_created',
+                'report': report_data
+            }
+        )
+    else:
+        # Report updated
+        # Notify admins of any update
+        async_to_sync(channel_layer.group_send)(
+            'dashboard_updates',
+            {
+                'type': 'report_update',
+                'report': report_data,
+                'action': 'updated'
+            }
+        )
+        
+        # Notify the reporter
+        if reporter_id:
+            async_to_sync(channel_layer.group_send)(
+                f'user_{reporter_id}',
+                {
+                    'type': 'report_updated',
+                    'report': report_data
+                }
+            )
+        
+        # Handle assignment
+        if collector_id and collector_id != old_collector_id:
+            # Notify the assigned collector
+            async_to_sync(channel_layer.group_send)(
+                f'user_{collector_id}',
+                {
+                    'type': 'task_update',
+                    'task': report_data
+                }
+            )
+            
+            # Also notify collector updates channel
+            async_to_sync(channel_layer.group_send)(
+                'collector_updates',
+                {
+                    'type': 'report_assigned',
+                    'report': report_data,
+                    'collector_id': collector_id
+                }
+            )
+            
+            # Notify user of assignment
+            async_to_sync(channel_layer.group_send)(
+                f'user_{collector_id}',
+                {
+                    'type': 'notification',
+                    'title': 'New Task Assigned',
+                    'message': f'You have been assigned to: {title}',
+                    'data': {'report_id': report_id}
+                }
+            )
+        
+        # Handle status change
+        if old_status and new_status != old_status:
+            # Notify the reporter of status change
+            if reporter_id:
+                status_messages = {
+                    'assigned': 'Your report has been assigned to a collector',
+                    'in_progress': 'Collection is now in progress',
+                    'completed': 'Your report has been completed!',
+                    'rejected': 'Your report has been rejected'
+                }
+                message = status_messages.get(
+                    new_status, 
+                    f'Status changed to {new_status}'
+                )
+                
+                async_to_sync(channel_layer.group_send)(
+                    f'user_{reporter_id}',
+                    {
+                        'type': 'notification',
+                        'title': 'Report Status Updated',
+                        'message': message,
+                        'data': {'report_id': report_id, 'status': new_status}
+                    }
+                )
+        
+        # Notify subscribers of specific report
+        async_to_sync(channel_layer.group_send)(
+            f'report_{report_id}',
+            {
+                'type': 'report_updated',
+                'report': report_data
+            }
+        )
+
+
+def broadcast_reports_updated(reports, old_statuses):
+    """
+    Coalesced notice of a bulk status change, once the transaction commits.
+
+    Sends one ``reports_update`` to admin dashboards, one ``reports_updated``
+    to each affected reporter and collector, and one ``report_updated`` to
+    each report's subscribers, instead of the per-report messages of
+    ``broadcast_report_saved``.
+
+    Args:
+        reports: The changed GarbageReports
+        old_statuses: Mapping of report pk to its status before the change
+    """
+    payloads = [
+        {**report_payload(report), 'old_status': old_statuses.get(report.pk)}
+        for report in reports
+    ]
+    transaction.on_commit(lambda: _send_bulk(payloads))
+
+
+def _send_bulk(payloads):
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return
+    
+    async_to_sync(channel_layer.group_send)(
+        'dashboard_updates',
+        {
+            'type': 'reports_update',
+            'reports': payloads,
+            'action': 'updated'
+        }
+    )
+    
+    by_user = {}
+    for payload in payloads:
+        for user_id in {payload['reporter_id'], payload['collector_id']}:
+            if user_id:
+                by_user.setdefault(user_id, []).append(payload)
+    for user_id, user_payloads in by_user.items():
+        async_to_sync(channel_layer.group_send)(
+            f'user_{user_id}',
+            {
+                'type': 'reports_updated',
+                'reports': user_payloads
+            }
+        )
+    
+    for payload in payloads:
+        async_to_sync(channel_layer.group_send)(
+            f"report_{payload['id']}",
+            {
+                'type': 'report_updated',
+                'report': payload
+            }
+        )
+
+
+def broadcast_reports_imported(report_import):
+    """
+    One notice to admin dashboards that a bulk import finished, once the
+    transaction commits. Imported reports are not broadcast one by one.
+    """
+    payload = {
+        'id': report_import.id,
+        'source': report_import.source,
+        'created': report_import.created,
+        'failed': report_import.failed,
+        'reported_by_id': report_import.reported_by_id,
+    }
+    transaction.on_commit(lambda: _send_imported(payload))
+
+
+def _send_imported(payload):
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return
+    
+    async_to_sync(channel_layer.group_send)(
+        'dashboard_updates',
+        {
+            'type': 'reports_imported',
+            'import': payload
+        }
+    )
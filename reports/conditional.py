@@ -0,0 +1,59 @@
+"""
+Cheap validators for conditional GET (ETag / Last-Modified) responses.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+
+def queryset_validator(queryset):
+    """Latest ``updated_at`` and row count for a queryset, in one query."""
+    return queryset.order_by().aggregate(
+        last_modified=Max('updated_at'),
+        count=Count('id')
+    )
+
+
+def make_etag(*parts):
+    """Quoted ETag hashed from the given parts."""
+    digest = hashlib.md5(
+        '|'.join(str(part) for part in parts).encode(),
+        usedforsecurity=False
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request, etag):
+    """Whether the request's If-None-Match header matches ``etag``."""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag in etags
+
+
+def not_modified_since(request, last_modified):
+    """Whether ``last_modified`` is no later than the If-Modified-Since header."""
+    since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return since is not None and last_modified is not None and int(last_modified.timestamp()) <= since
+
+
+def validator_headers(etag, last_modified):
+    """ETag and, when known, Last-Modified response headers."""
+    headers = {'ETag': etag}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified.timestamp())
+    return headers
+
+
+def is_not_modified(request, etag, last_modified, trust_date=True):
+    """
+    Whether the request's validators match, so a 304 can be sent.
+
+    If-None-Match takes precedence; If-Modified-Since is only consulted
+    without it, and only when ``trust_date``.
+    """
+    if 'HTTP_IF_NONE_MATCH' in request.META:
+        return etag_matches(request, etag)
+    return trust_date and not_modified_since(request, last_modified)
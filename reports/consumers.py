@@ -6,6 +6,8 @@ from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
 
+from .counters import get_dashboard_stats
+
 User = get_user_model()
 
 
@@ -128,6 +130,13 @@ class ReportUpdateConsumer(AsyncWebsocketConsumer):
             'report': event['report']
         }))
     
+    async def reports_updated(self, event):
+        """Handle a bulk status update of several reports"""
+        await self.send(text_data=json.dumps({
+            'type': 'reports_updated',
+            'reports': event['reports']
+        }))
+    
     async def report_assigned(self, event):
         """Handle report assignment event"""
         await self.send(text_data=json.dumps({
@@ -192,6 +201,12 @@ class DashboardConsumer(AsyncWebsocketConsumer):
             'type': 'connection_established',
             'message': 'Connected to dashboard updates'
         }))
+        
+        # Initial snapshot; later changes arrive as coalesced stats_update events
+        await self.send(text_data=json.dumps({
+            'type': 'stats_update',
+            'stats': await self.get_stats()
+        }))
     
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard(
@@ -225,6 +240,21 @@ class DashboardConsumer(AsyncWebsocketConsumer):
             'action': event.get('action', 'updated')
         }))
     
+    async def reports_update(self, event):
+        """Handle a bulk report update event"""
+        await self.send(text_data=json.dumps({
+            'type': 'reports_update',
+            'reports': event['reports'],
+            'action': event.get('action', 'updated')
+        }))
+    
+    async def reports_imported(self, event):
+        """Handle a finished bulk import event"""
+        await self.send(text_data=json.dumps({
+            'type': 'reports_imported',
+            'import': event['import']
+        }))
+    
     @database_sync_to_async
     def get_user_role(self):
         """Get user role from database"""
@@ -233,3 +263,8 @@ class DashboardConsumer(AsyncWebsocketConsumer):
             return user.role
         except User.DoesNotExist:
             return None
+    
+    @database_sync_to_async
+    def get_stats(self):
+        """Get current dashboard stats"""
+        return get_dashboard_stats()
@@ -0,0 +1,164 @@
+"""
+Live dashboard counters kept in the Django cache.
+
+Signals apply deltas as reports and users change, so the admin dashboard
+can be answered without counting rows. Missing keys (cold cache, eviction,
+restart) trigger a reconcile against the database.
+"""
+import logging
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import GarbageReport
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+KEY_PREFIX = 'dashboard_counters'
+
+REPORT_STATUSES = [choice for choice, _ in GarbageReport.Status.choices]
+USER_COUNTERS = ['collectors', 'citizens', 'active_collectors']
+
+
+def _report_key(name):
+    """Cache key for a report counter."""
+    return f'{KEY_PREFIX}:reports:{name}'
+
+
+def _user_key(name):
+    """Cache key for a user counter."""
+    return f'{KEY_PREFIX}:users:{name}'
+
+
+ALL_KEYS = (
+    [_report_key('total')]
+    + [_report_key(name) for name in REPORT_STATUSES]
+    + [_user_key(name) for name in USER_COUNTERS]
+)
+
+
+def _apply(deltas):
+    """Apply counter deltas; drop the whole set if any key is missing."""
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            # Key expired or was never loaded; rebuild on next read
+            cache.delete_many(ALL_KEYS)
+            return
+
+
+def _apply_on_commit(deltas):
+    """Apply deltas once the surrounding transaction commits."""
+    transaction.on_commit(lambda: _apply(deltas))
+
+
+def count_from_database():
+    """Count reports and users with one conditional aggregate per table."""
+    reports = GarbageReport.objects.aggregate(
+        total=Count('id'),
+        **{
+            name: Count('id', filter=Q(status=name))
+            for name in REPORT_STATUSES
+        }
+    )
+    users = User.objects.aggregate(
+        collectors=Count('id', filter=Q(role='collector')),
+        citizens=Count('id', filter=Q(role='citizen')),
+        active_collectors=Count('id', filter=Q(role='collector', is_active=True))
+    )
+    return {'reports': reports, 'users': users}
+
+
+def reconcile():
+    """
+    Reset the cached counters from the database.
+
+    Returns:
+        dict: Counter name -> (cached value, database value) for every
+        counter that had drifted
+    """
+    stats = count_from_database()
+    values = {
+        **{_report_key(name): value for name, value in stats['reports'].items()},
+        **{_user_key(name): value for name, value in stats['users'].items()},
+    }
+    cached = cache.get_many(ALL_KEYS)
+    drift = {
+        key: (cached[key], value)
+        for key, value in values.items()
+        if key in cached and cached[key] != value
+    }
+    cache.set_many(values, timeout=None)
+    if drift:
+        logger.warning(f"Dashboard counters drifted: {drift}")
+    return drift
+
+
+def get_dashboard_stats():
+    """Return dashboard counts in the AdminDashboardStatsView shape."""
+    cached = cache.get_many(ALL_KEYS)
+    if len(cached) != len(ALL_KEYS):
+        reconcile()
+        cached = cache.get_many(ALL_KEYS)
+        if len(cached) != len(ALL_KEYS):
+            # Cache unavailable (e.g. DummyCache); fall back to the database
+            return count_from_database()
+
+    return {
+        'reports': {
+            'total': cached[_report_key('total')],
+            **{name: cached[_report_key(name)] for name in REPORT_STATUSES},
+        },
+        'users': {name: cached[_user_key(name)] for name in USER_COUNTERS},
+    }
+
+
+def report_created(status, count=1):
+    """Count ``count`` newly created reports."""
+    if not count:
+        return
+    _apply_on_commit({_report_key('total'): count, _report_key(status): count})
+
+
+def report_deleted(status):
+    """Uncount a deleted report."""
+    _apply_on_commit({_report_key('total'): -1, _report_key(status): -1})
+
+
+def report_status_changed(old_status, new_status, count=1):
+    """Move ``count`` reports between status counters."""
+    if old_status == new_status or not count:
+        return
+    _apply_on_commit({_report_key(old_status): -count, _report_key(new_status): count})
+
+
+def _user_deltas(role, is_active, sign):
+    """Counter deltas contributed by a user with the given role and state."""
+    deltas = {}
+    if role == 'collector':
+        deltas[_user_key('collectors')] = sign
+        if is_active:
+            deltas[_user_key('active_collectors')] = sign
+    elif role == 'citizen':
+        deltas[_user_key('citizens')] = sign
+    return deltas
+
+
+def user_changed(old_role, old_is_active, new_role, new_is_active):
+    """
+    Record a user being created, changed or deleted.
+
+    Pass ``None`` as the role on the missing side for creates and deletes.
+    """
+    deltas = _user_deltas(old_role, old_is_active, -1)
+    for key, delta in _user_deltas(new_role, new_is_active, 1).items():
+        deltas[key] = deltas.get(key, 0) + delta
+    if any(deltas.values()):
+        _apply_on_commit(deltas)
@@ -0,0 +1,215 @@
+"""
+Distance providers for routing and assignment.
+
+Every consumer asks ``get_distance_provider()`` for a provider and calls
+``matrix(origins, destinations)``. The result is always in metres.
+
+``HaversineDistance`` gives straight-line distances. ``RoadNetworkDistance``
+gives driving distances over an offline road graph built by the
+``build_road_graph`` command. It snaps each point to the nearest road node
+and answers from a contraction hierarchy. Recent matrices and per-node
+searches are kept in LRU caches keyed by the snapped nodes, so repeat
+requests for the same stops skip the graph entirely. Points that cannot be
+snapped fall back to straight-line distance.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .road_graph import EARTH_RADIUS_M, RoadGraph
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_SETTINGS = {
+    'DISTANCE_PROVIDER',
+    'ROAD_GRAPH_PATH',
+    'ROAD_SNAP_RADIUS_M',
+    'ROAD_MATRIX_CACHE_SIZE',
+}
+
+# Upward searches cached per snapped node and direction
+SEARCH_CACHE_SIZE = 20000
+
+
+def haversine_matrix(points, others=None):
+    """
+    Great-circle distances in metres between sets of points.
+
+    Args:
+        points: Sequence of (latitude, longitude) pairs in degrees
+        others: Second sequence of points (defaults to ``points``)
+
+    Returns:
+        numpy.ndarray: (len(points), len(others)) matrix of distances
+    """
+    radians = np.radians(np.asarray(points, dtype=float).reshape(-1, 2))
+    other = radians if others is None else np.radians(
+        np.asarray(others, dtype=float).reshape(-1, 2)
+    )
+    lat, lng = radians[:, 0][:, None], radians[:, 1][:, None]
+    other_lat, other_lng = other[:, 0][None, :], other[:, 1][None, :]
+    a = (np.sin((other_lat - lat) / 2) ** 2
+         + np.cos(lat) * np.cos(other_lat) * np.sin((other_lng - lng) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class LRUCache:
+    """Small thread-safe least-recently-used cache."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class HaversineDistance:
+    """Straight-line distances."""
+
+    name = 'haversine'
+
+    def matrix(self, origins, destinations=None):
+        """(len(origins), len(destinations)) distances in metres."""
+        return haversine_matrix(origins, destinations)
+
+
+class RoadNetworkDistance:
+    """Driving distances over an offline road graph."""
+
+    name = 'road_network'
+
+    def __init__(self, graph, snap_radius_m=500, cache_size=256):
+        self.graph = graph
+        self.snap_radius_m = snap_radius_m
+        self.matrix_cache = LRUCache(cache_size)
+        self.search_cache = LRUCache(SEARCH_CACHE_SIZE)
+
+    def _search(self, node, backward):
+        key = (node, backward)
+        result = self.search_cache.get(key)
+        if result is None:
+            result = self.graph.upward_search(node, backward)
+            self.search_cache.set(key, result)
+        return result
+
+    def _snap(self, points):
+        nodes, offsets = [], []
+        for lat, lng in points:
+            node, offset = self.graph.snap(lat, lng, self.snap_radius_m)
+            nodes.append(node)
+            offsets.append(offset or 0.0)
+        return nodes, np.array(offsets)
+
+    def _node_matrix(self, sources, targets):
+        """Graph distances between unique snapped nodes, cached."""
+        key = (tuple(sources), tuple(targets))
+        result = self.matrix_cache.get(key)
+        if result is None:
+            result = self.graph.matrix(sources, targets, search=self._search)
+            result.setflags(write=False)
+            self.matrix_cache.set(key, result)
+        return result
+
+    def matrix(self, origins, destinations=None):
+        """
+        (len(origins), len(destinations)) driving distances in metres.
+
+        Each distance is the walk from the point to its snapped node, plus
+        the road distance, plus the walk from the destination's node. Pairs
+        where either point is off the graph use straight-line distance.
+        """
+        origins = np.asarray(origins, dtype=float).reshape(-1, 2)
+        destinations = origins if destinations is None else np.asarray(
+            destinations, dtype=float
+        ).reshape(-1, 2)
+        result = haversine_matrix(origins, destinations)
+
+        origin_nodes, origin_offsets = self._snap(origins)
+        destination_nodes, destination_offsets = self._snap(destinations)
+        rows = [i for i, node in enumerate(origin_nodes) if node is not None]
+        columns = [j for j, node in enumerate(destination_nodes) if node is not None]
+        if not rows or not columns:
+            return result
+
+        sources = sorted({origin_nodes[i] for i in rows})
+        targets = sorted({destination_nodes[j] for j in columns})
+        road = self._node_matrix(sources, targets)
+        source_index = {node: index for index, node in enumerate(sources)}
+        target_index = {node: index for index, node in enumerate(targets)}
+
+        row_nodes = [source_index[origin_nodes[i]] for i in rows]
+        column_nodes = [target_index[destination_nodes[j]] for j in columns]
+        block = (
+            road[np.ix_(row_nodes, column_nodes)]
+            + origin_offsets[rows][:, None]
+            + destination_offsets[columns][None, :]
+        )
+        # Snapping two nearby points to the same node must not beat
+        # the straight line between them
+        straight = result[np.ix_(rows, columns)]
+        same_node = road[np.ix_(row_nodes, column_nodes)] == 0
+        block = np.where(same_node, straight, block)
+        result[np.ix_(rows, columns)] = np.where(np.isfinite(block), block, straight)
+        return result
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def _build_provider():
+    name = getattr(settings, 'DISTANCE_PROVIDER', 'haversine')
+    if name == RoadNetworkDistance.name:
+        path = Path(getattr(settings, 'ROAD_GRAPH_PATH', ''))
+        if path.is_file():
+            return RoadNetworkDistance(
+                RoadGraph(path),
+                snap_radius_m=getattr(settings, 'ROAD_SNAP_RADIUS_M', 500),
+                cache_size=getattr(settings, 'ROAD_MATRIX_CACHE_SIZE', 256),
+            )
+        logger.warning(f"Road graph {path} not found; using straight-line distances")
+    elif name != HaversineDistance.name:
+        logger.warning(f"Unknown DISTANCE_PROVIDER {name!r}; using straight-line distances")
+    return HaversineDistance()
+
+
+def get_distance_provider():
+    """The configured distance provider, loaded once per process."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = _build_provider()
+    return _provider
+
+
+@receiver(setting_changed)
+def reset_distance_provider(setting, **kwargs):
+    """Reload the provider when its settings change (e.g. in tests)."""
+    global _provider
+    if setting in PROVIDER_SETTINGS:
+        _provider = None
@@ -0,0 +1,155 @@
+"""
+Nearby-duplicate detection and merging for garbage reports.
+
+Candidates are open reports within DUPLICATE_RADIUS_M that were created
+within DUPLICATE_WINDOW of each other. The lookup is one small range over
+the partial ``report_open_geo_idx`` index, so closed historical reports
+are never scanned.
+"""
+import math
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import response_cache, sync
+from .geo import distance_sq_expression, filter_bbox, radius_bbox
+from .models import GarbageReport, ReportUpdate
+from .transitions import InvalidTransition, bulk_transition, sources_for
+
+Status = GarbageReport.Status
+
+# Must match the condition of report_open_geo_idx
+OPEN_STATUSES = ['pending', 'assigned', 'in_progress']
+
+DUPLICATE_RADIUS_M = 50
+DUPLICATE_WINDOW = timedelta(hours=72)
+MAX_DUPLICATE_CANDIDATES = 5
+
+
+def find_duplicates(latitude, longitude, created_at=None, exclude_pk=None,
+                    limit=MAX_DUPLICATE_CANDIDATES):
+    """
+    Open reports near a point and close to it in time, nearest first.
+
+    Args:
+        latitude, longitude: Location of the report being checked
+        created_at: Creation time of the report (defaults to now)
+        exclude_pk: Report to leave out, normally the one being checked
+        limit: Maximum candidates returned
+
+    Returns:
+        list: GarbageReport instances annotated with ``distance_sq``
+    """
+    created_at = created_at or timezone.now()
+    queryset = GarbageReport.objects.filter(
+        status__in=OPEN_STATUSES,
+        created_at__gte=created_at - DUPLICATE_WINDOW,
+        created_at__lte=created_at + DUPLICATE_WINDOW,
+    )
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    latitude, longitude = float(latitude), float(longitude)
+    queryset = filter_bbox(
+        queryset, radius_bbox(latitude, longitude, DUPLICATE_RADIUS_M)
+    ).annotate(
+        distance_sq=distance_sq_expression(latitude, longitude)
+    ).filter(distance_sq__lte=DUPLICATE_RADIUS_M ** 2)
+    return list(queryset.order_by('distance_sq', 'id')[:limit])
+
+
+def duplicates_of_report(report, limit=MAX_DUPLICATE_CANDIDATES):
+    """Duplicate candidates for an existing report."""
+    if report.geo_lat is None:
+        return []
+    return find_duplicates(
+        report.geo_lat,
+        report.geo_lng,
+        created_at=report.created_at,
+        exclude_pk=report.pk,
+        limit=limit
+    )
+
+
+def distance_m(candidate):
+    """Approximate distance in metres of an annotated candidate."""
+    return round(math.sqrt(candidate.distance_sq), 1)
+
+
+def merge_reports(primary_pk, duplicate_pks, actor, note=''):
+    """
+    Merge duplicate reports into a primary report.
+
+    The duplicates' ReportUpdate history is re-pointed to the primary, and
+    each duplicate gets ``duplicate_of`` set and is rejected through
+    ``bulk_transition``, with a note saying where it went.
+
+    Returns:
+        GarbageReport: The primary report
+
+    Raises:
+        GarbageReport.DoesNotExist: If the primary report does not exist
+        InvalidTransition: If a duplicate is closed and cannot be rejected
+        ValueError: If a duplicate is unknown, the primary itself, or
+        either side has already been merged, or the primary is closed
+    """
+    duplicate_pks = set(duplicate_pks)
+    if primary_pk in duplicate_pks:
+        raise ValueError('A report cannot be merged into itself')
+
+    with transaction.atomic():
+        primary = GarbageReport.objects.select_for_update().get(pk=primary_pk)
+        if primary.duplicate_of_id:
+            raise ValueError(f'Report {primary.pk} has already been merged')
+        if primary.status not in OPEN_STATUSES:
+            raise ValueError(f'Report {primary.pk} is {primary.status} and cannot take duplicates')
+
+        duplicates = list(
+            GarbageReport.objects.select_for_update().filter(pk__in=duplicate_pks).order_by('pk')
+        )
+        missing = duplicate_pks - {report.pk for report in duplicates}
+        if missing:
+            raise ValueError(f'Reports not found: {sorted(missing)}')
+        merged = [report.pk for report in duplicates if report.duplicate_of_id]
+        if merged:
+            raise ValueError(f'Reports already merged: {merged}')
+        closed = [report.pk for report in duplicates if report.status not in sources_for(Status.REJECTED)]
+        if closed:
+            raise InvalidTransition(f'Closed reports cannot be merged: {closed}')
+
+        history = ReportUpdate.objects.filter(report__in=duplicates)
+        moved = list(history.values_list('pk', flat=True))
+        history.update(report=primary)
+        sync.record_updates_moved(primary, moved)
+        # The primary's history changed, so its cache validators must too
+        GarbageReport.objects.filter(pk=primary.pk).update(updated_at=timezone.now())
+        response_cache.invalidate_users([primary.reported_by_id, primary.assigned_to_id])
+
+        # Set before the rejection, which reads the duplicates again and
+        # does the sync, cache, counter and rollup bookkeeping
+        GarbageReport.objects.filter(pk__in=duplicate_pks).update(duplicate_of=primary)
+        results = bulk_transition(
+            [
+                {
+                    'id': report.pk,
+                    'status': Status.REJECTED,
+                    'note': f'Merged into report #{primary.pk} as a duplicate',
+                }
+                for report in duplicates
+            ],
+            actor
+        )
+        failed = [result for result in results if not result['ok']]
+        if failed:
+            # Rolls the whole merge back
+            raise InvalidTransition(failed[0]['error'])
+
+        merged_ids = ', '.join(f'#{report.pk}' for report in duplicates)
+        ReportUpdate.objects.create(
+            report=primary,
+            status=primary.status,
+            note=note or f'Merged duplicate reports {merged_ids}',
+            updated_by=actor
+        )
+
+    return primary
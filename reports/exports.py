@@ -0,0 +1,103 @@
+"""
+Streaming CSV / NDJSON exports of reports and their update history.
+
+Rows are read with ``QuerySet.iterator(chunk_size=...)`` over flat
+``values_list`` queries, so memory use stays constant regardless of how
+many rows are exported.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import ReportUpdate
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+REPORT_COLUMNS = [
+    ('id', 'id'),
+    ('title', 'title'),
+    ('description', 'description'),
+    ('waste_type', 'waste_type'),
+    ('status', 'status'),
+    ('latitude', 'latitude'),
+    ('longitude', 'longitude'),
+    ('address', 'address'),
+    ('image', 'image'),
+    ('reported_by_id', 'reported_by_id'),
+    ('reported_by', 'reported_by__username'),
+    ('assigned_to_id', 'assigned_to_id'),
+    ('assigned_to', 'assigned_to__username'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+    ('completed_at', 'completed_at'),
+]
+
+UPDATE_COLUMNS = [
+    ('id', 'id'),
+    ('report_id', 'report_id'),
+    ('status', 'status'),
+    ('note', 'note'),
+    ('updated_by_id', 'updated_by_id'),
+    ('updated_by', 'updated_by__username'),
+    ('created_at', 'created_at'),
+]
+
+EXPORT_DATASETS = ('reports', 'updates')
+
+
+class Echo:
+    """Pseudo-buffer that returns what is written, for streaming csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def _dataset(dataset, reports):
+    """Columns and row queryset for a dataset over the given reports."""
+    if dataset == 'updates':
+        columns = UPDATE_COLUMNS
+        queryset = ReportUpdate.objects.filter(
+            report__in=reports.order_by().values('pk')
+        ).order_by('id')
+    else:
+        columns = REPORT_COLUMNS
+        queryset = reports
+    return columns, queryset.values_list(*(lookup for _, lookup in columns))
+
+
+def _csv_value(value):
+    """Format a database value for a CSV cell."""
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def iter_export(dataset, reports, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield an export of ``dataset`` ('reports' or 'updates') as text chunks.
+
+    Args:
+        dataset: 'reports' or 'updates' (history of the given reports)
+        reports: Filtered GarbageReport queryset
+        export_format: 'csv' or 'ndjson'
+        chunk_size: Rows fetched from the database per round-trip
+    """
+    columns, rows = _dataset(dataset, reports)
+    names = [name for name, _ in columns]
+
+    if export_format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(names)
+        for row in rows.iterator(chunk_size=chunk_size):
+            yield writer.writerow([_csv_value(value) for value in row])
+    else:
+        for row in rows.iterator(chunk_size=chunk_size):
+            yield json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder) + '\n'
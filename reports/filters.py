@@ -0,0 +1,96 @@
+"""
+Report filters shared by the admin list, export endpoint and commands.
+"""
+from datetime import date, timedelta
+from functools import reduce
+from operator import or_
+
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_date
+
+from backend.search import SearchIndex
+
+from .analytics import day_start
+
+# icontains fallback for databases without full-text support
+REPORT_SEARCH_FIELDS = ['title', 'description', 'address']
+
+REPORT_SEARCH_INDEX = SearchIndex(
+    'reports',
+    'reports_garbagereport',
+    {'title': 'A', 'address': 'B', 'description': 'C'}
+)
+
+
+def parse_day(value, name):
+    """
+    A date from a ``date`` or a YYYY-MM-DD string.
+
+    Raises:
+        ValueError: If the string is not a valid date
+    """
+    if isinstance(value, date):
+        return value
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValueError(f'{name} must be a valid YYYY-MM-DD date')
+    return day
+
+
+def filter_reports(queryset, params):
+    """
+    Apply the admin report filters to a queryset.
+
+    Args:
+        queryset: GarbageReport queryset
+        params: Mapping with optional status, waste_type, collector,
+            date_from and date_to keys
+
+    Returns:
+        QuerySet: The filtered queryset
+
+    Raises:
+        ValueError: If a date is malformed
+    """
+    # Filter by status
+    status_filter = params.get('status')
+    if status_filter:
+        queryset = queryset.filter(status=status_filter)
+
+    # Filter by waste type
+    waste_type = params.get('waste_type')
+    if waste_type:
+        queryset = queryset.filter(waste_type=waste_type)
+
+    # Filter by collector
+    collector_id = params.get('collector')
+    if collector_id:
+        queryset = queryset.filter(assigned_to_id=collector_id)
+
+    # Filter by date range, as timestamp bounds on the bare column (rather
+    # than created_at__date) so the created_at indexes apply
+    date_from = params.get('date_from')
+    date_to = params.get('date_to')
+    if date_from:
+        queryset = queryset.filter(created_at__gte=day_start(parse_day(date_from, 'date_from')))
+    if date_to:
+        next_day = parse_day(date_to, 'date_to') + timedelta(days=1)
+        queryset = queryset.filter(created_at__lt=day_start(next_day))
+
+    return queryset
+
+
+def search_reports(queryset, search):
+    """Match every search term against any search field, like SearchFilter."""
+    if REPORT_SEARCH_INDEX.supported(connections[queryset.db]):
+        return REPORT_SEARCH_INDEX.search(queryset, search, rank=False)
+    for term in search.replace(',', ' ').split():
+        queryset = queryset.filter(reduce(or_, (
+            Q(**{f'{field}__icontains': term})
+            for field in REPORT_SEARCH_FIELDS
+        )))
+    return queryset
@@ -0,0 +1,216 @@
+"""
+Geospatial helpers for report queries.
+
+Lookups run against the indexed ``geo_lat``/``geo_lng`` floats and the
+``geohash`` column on GarbageReport rather than the Decimal coordinates.
+Distances use an equirectangular approximation (plain arithmetic, no trig
+per row), which is accurate to well under 1% at city scale.
+"""
+import math
+
+from django.db.models import Avg, Count, F, Max, Min, Q
+from django.db.models.functions import Floor
+
+from . import geohash
+from .geohash import METERS_PER_DEGREE
+from .models import GarbageReport
+
+# Default radius in metres for ?near= without ?radius=
+DEFAULT_RADIUS_M = 1000
+
+# k-nearest search starts at this radius and grows until k are found
+NEAREST_START_RADIUS_M = 500
+NEAREST_MAX_RADIUS_M = 200000
+
+# At or above this zoom level the map gets individual markers
+CLUSTER_MAX_ZOOM = 16
+
+# Grid cells per 256px map tile; 4 gives roughly 64px clusters
+CLUSTER_CELLS_PER_TILE = 4
+
+
+def parse_bbox(value):
+    """
+    Parse a ``min_lng,min_lat,max_lng,max_lat`` bounding box.
+
+    This is the order produced by Leaflet's ``LatLngBounds.toBBoxString()``.
+    Coordinates are clamped to valid ranges, since zoomed-out web maps
+    report longitudes beyond +/-180.
+
+    Raises:
+        ValueError: If the value is malformed or not in order
+    """
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(part) for part in value.split(','))
+    except (AttributeError, ValueError):
+        raise ValueError('bbox must be min_lng,min_lat,max_lng,max_lat')
+    if min_lat > max_lat or min_lng > max_lng:
+        raise ValueError('bbox minimums must not exceed maximums')
+    return (
+        max(min_lng, -180.0), max(min_lat, -90.0),
+        min(max_lng, 180.0), min(max_lat, 90.0)
+    )
+
+
+def filter_bbox(queryset, bbox):
+    """Restrict a report queryset to a parsed bounding box."""
+    min_lng, min_lat, max_lng, max_lat = bbox
+    return queryset.filter(
+        geo_lat__gte=min_lat,
+        geo_lat__lte=max_lat,
+        geo_lng__gte=min_lng,
+        geo_lng__lte=max_lng
+    )
+
+
+def radius_bbox(latitude, longitude, radius_m):
+    """Bounding box, in ``filter_bbox`` order, enclosing a circle."""
+    half_lat = radius_m / METERS_PER_DEGREE
+    half_lng = half_lat / max(math.cos(math.radians(latitude)), 0.01)
+    return (longitude - half_lng, latitude - half_lat, longitude + half_lng, latitude + half_lat)
+
+
+def parse_point(value):
+    """
+    Parse a ``lat,lng`` point.
+
+    Raises:
+        ValueError: If the value is malformed or out of range
+    """
+    try:
+        latitude, longitude = (float(part) for part in value.split(','))
+    except (AttributeError, ValueError):
+        raise ValueError('near must be lat,lng')
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError('near coordinates are out of range')
+    return latitude, longitude
+
+
+def distance_sq_expression(latitude, longitude):
+    """Squared approximate distance in square metres from a point."""
+    lng_scale = math.cos(math.radians(latitude))
+    dy = (F('geo_lat') - latitude) * METERS_PER_DEGREE
+    dx = (F('geo_lng') - longitude) * (METERS_PER_DEGREE * lng_scale)
+    return dx * dx + dy * dy
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    """Great-circle distance in metres between two points."""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * 6371008.8 * math.asin(math.sqrt(a))
+
+
+def filter_radius(queryset, latitude, longitude, radius_m):
+    """
+    Restrict a report queryset to a circle and annotate ``distance_sq``.
+
+    Candidates come from prefix ranges over the geohash index (3x3 cells
+    around the centre), then the exact approximate distance is applied.
+    """
+    cells = geohash.covering_cells(latitude, longitude, radius_m)
+    if cells:
+        cell_filter = Q()
+        for cell in cells:
+            cell_filter |= Q(geohash__gte=cell, geohash__lt=cell + geohash.PREFIX_END)
+        queryset = queryset.filter(cell_filter)
+    return queryset.annotate(
+        distance_sq=distance_sq_expression(latitude, longitude)
+    ).filter(distance_sq__lte=radius_m * radius_m)
+
+
+def nearest(queryset, latitude, longitude, k):
+    """
+    The ``k`` reports nearest to a point, closest first.
+
+    Searches a growing radius so only nearby index ranges are scanned;
+    falls back to ordering everything once NEAREST_MAX_RADIUS_M is passed.
+    """
+    radius = NEAREST_START_RADIUS_M
+    while radius <= NEAREST_MAX_RADIUS_M:
+        found = list(
+            filter_radius(queryset, latitude, longitude, radius).order_by('distance_sq')[:k]
+        )
+        if len(found) >= k:
+            return found
+        radius *= 4
+    return list(
+        queryset.exclude(geo_lat__isnull=True).annotate(
+            distance_sq=distance_sq_expression(latitude, longitude)
+        ).order_by('distance_sq')[:k]
+    )
+
+
+def apply_spatial_filters(queryset, params):
+    """
+    Apply ``bbox``, ``near``/``radius`` and ``order=distance`` list params.
+
+    Raises:
+        ValueError: If a parameter is malformed
+    """
+    bbox = params.get('bbox')
+    if bbox:
+        queryset = filter_bbox(queryset, parse_bbox(bbox))
+
+    near = params.get('near')
+    if near:
+        latitude, longitude = parse_point(near)
+        try:
+            radius = float(params.get('radius') or DEFAULT_RADIUS_M)
+        except ValueError:
+            raise ValueError('radius must be a number of metres')
+        if radius <= 0:
+            raise ValueError('radius must be positive')
+        queryset = filter_radius(queryset, latitude, longitude, radius)
+        if params.get('order') == 'distance':
+            queryset = queryset.order_by('distance_sq', 'id')
+    elif params.get('order') == 'distance':
+        raise ValueError('order=distance requires near=lat,lng')
+
+    return queryset
+
+
+def cluster_cell_size(zoom):
+    """Grid cell size in degrees for a web map zoom level."""
+    return 360.0 / (2 ** zoom * CLUSTER_CELLS_PER_TILE)
+
+
+def cluster_reports(queryset, zoom):
+    """
+    Group reports into grid clusters in a single aggregated query.
+
+    Returns:
+        list: One dict per non-empty cell with its centroid, bounds, total
+        count and per-status / per-waste-type counts
+    """
+    cell = cluster_cell_size(zoom)
+    statuses = [choice for choice, _ in GarbageReport.Status.choices]
+    waste_types = [choice for choice, _ in GarbageReport.WasteType.choices]
+
+    rows = queryset.exclude(geo_lat__isnull=True).annotate(
+        cell_y=Floor(F('geo_lat') / cell),
+        cell_x=Floor(F('geo_lng') / cell)
+    ).values('cell_x', 'cell_y').annotate(
+        count=Count('id'),
+        centroid_lat=Avg('geo_lat'),
+        centroid_lng=Avg('geo_lng'),
+        min_lat=Min('geo_lat'),
+        max_lat=Max('geo_lat'),
+        min_lng=Min('geo_lng'),
+        max_lng=Max('geo_lng'),
+        **{f'status_{s}': Count('id', filter=Q(status=s)) for s in statuses},
+        **{f'type_{t}': Count('id', filter=Q(waste_type=t)) for t in waste_types}
+    ).order_by()
+
+    return [
+        {
+            'latitude': round(row['centroid_lat'], 6),
+            'longitude': round(row['centroid_lng'], 6),
+            'count': row['count'],
+            'bounds': [row['min_lng'], row['min_lat'], row['max_lng'], row['max_lat']],
+            'by_status': {s: row[f'status_{s}'] for s in statuses if row[f'status_{s}']},
+            'by_waste_type': {t: row[f'type_{t}'] for t in waste_types if row[f'type_{t}']},
+        }
+        for row in rows
+    ]
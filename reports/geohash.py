@@ -0,0 +1,90 @@
+"""
+Minimal geohash encoding for spatial index keys.
+
+A geohash interleaves longitude and latitude bits into a base32 string, so
+nearby points share prefixes and every prefix is a rectangular cell that
+maps to a contiguous range of an ordinary B-tree index.
+"""
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Precision stored on GarbageReport.geohash (~4.8m x 4.8m cells)
+GEOHASH_PRECISION = 9
+
+# Character that sorts after every base32 digit, for prefix range scans
+PREFIX_END = '{'
+
+METERS_PER_DEGREE = 111320.0
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Encode a coordinate as a geohash of ``precision`` characters."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lng_range[0] = mid
+            else:
+                bits <<= 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """Cell (height, width) in degrees for a geohash precision."""
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = math.floor(precision * 5 / 2)
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def covering_cells(latitude, longitude, radius_m):
+    """
+    Geohash cells covering a circle, as the 3x3 block around its centre.
+
+    Uses the finest precision whose cells are at least ``radius_m`` on each
+    side, so the block always contains the circle.
+
+    Returns:
+        set: Geohash prefixes, or ``None`` when the radius is too large for
+        even single-character cells
+    """
+    lng_scale = max(math.cos(math.radians(latitude)), 0.01)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        if (height * METERS_PER_DEGREE >= radius_m
+                and width * METERS_PER_DEGREE * lng_scale >= radius_m):
+            break
+    else:
+        return None
+
+    cells = set()
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            lat = min(max(latitude + dy * height, -90.0), 90.0)
+            lng = (longitude + dx * width + 180.0) % 360.0 - 180.0
+            cells.add(encode(lat, lng, precision))
+    return cells
@@ -0,0 +1,209 @@
+"""
+Bulk report imports from CSV / NDJSON streams.
+
+Rows are validated with ReportImportRowSerializer and inserted in chunks
+with ``bulk_create``, which sends no ``post_save``: none of the per-report
+signal receivers (rollup bumps, counter deltas, sync rows, cache
+invalidation, WebSocket broadcasts) run. Each chunk does their work in
+bulk instead, grouping the rollup and counter deltas by day, waste type
+and status. Admin dashboards get a single ``reports_imported`` event and
+one stats push when the import finishes.
+
+Each chunk commits together with the import's checkpoint (rows read so
+far), so an import that stops part way resumes after its last committed
+chunk when run again over the same input.
+"""
+import csv
+import json
+from collections import Counter
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from . import counters, response_cache, sync
+from .broadcasts import broadcast_reports_imported
+from .models import GarbageReport, ReportImport
+from .serializers import ReportImportRowSerializer
+from .stats import record_reports_created
+from .stats_push import schedule_stats_push
+
+IMPORT_CHUNK_SIZE = 1000
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+# Failed rows described on the import record; later ones are only counted
+MAX_ROW_ERRORS = 100
+
+
+class ImportInterrupted(Exception):
+    """Raised when another run has moved the same import's checkpoint."""
+
+
+def format_for(filename):
+    """Import format implied by a file name, or ``None``."""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension == 'csv':
+        return 'csv'
+    if extension in ('ndjson', 'jsonl'):
+        return 'ndjson'
+    return None
+
+
+def iter_rows(lines, import_format):
+    """
+    Parse text lines into row dicts.
+
+    CSV input needs a header row; empty cells are left out so the field
+    defaults apply. Blank NDJSON lines are skipped.
+
+    Yields:
+        tuple: ``(row, error)`` per input row; ``row`` is ``None`` when the
+        row could not be parsed
+    """
+    if import_format == 'csv':
+        for row in csv.DictReader(lines):
+            yield {name: value for name, value in row.items() if name and value}, None
+        return
+
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield None, f'Invalid JSON: {e}'
+            continue
+        if isinstance(row, dict):
+            yield row, None
+        else:
+            yield None, 'Expected a JSON object'
+
+
+def get_resumable_import(pk):
+    """
+    The import with ``pk``, if it can be continued.
+
+    Raises:
+        ReportImport.DoesNotExist: If there is no such import
+        ValueError: If the import already finished
+    """
+    report_import = ReportImport.objects.get(pk=pk)
+    if report_import.status == ReportImport.Status.COMPLETED:
+        raise ValueError(f'Import {pk} already completed')
+    return report_import
+
+
+def run_import(report_import, lines, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Import reports from ``lines``, yielding progress after each chunk.
+
+    The first ``report_import.rows_read`` rows were imported by an earlier
+    run; they are parsed and skipped. A failure marks the import failed and
+    is re-raised; the committed chunks stay, and the import can be resumed.
+
+    Args:
+        report_import: The ReportImport to run or resume
+        lines: Iterable of text lines in ``report_import.format``
+        chunk_size: Rows validated and inserted per transaction
+
+    Yields:
+        ReportImport: The import after each committed chunk, and once more
+        when it has finished
+
+    Raises:
+        ImportInterrupted: If another run is importing the same rows
+    """
+    rows = iter_rows(lines, report_import.format)
+    for _ in islice(rows, report_import.rows_read):
+        pass
+
+    try:
+        while chunk := list(islice(rows, chunk_size)):
+            _import_chunk(report_import, chunk)
+            yield report_import
+        _finish(report_import)
+    except ImportInterrupted:
+        # The other run owns the import's status
+        raise
+    except Exception as e:
+        report_import.status = ReportImport.Status.FAILED
+        report_import.last_error = str(e)
+        ReportImport.objects.filter(pk=report_import.pk).update(
+            status=report_import.status,
+            last_error=report_import.last_error,
+            updated_at=timezone.now()
+        )
+        raise
+    yield report_import
+
+
+def _import_chunk(report_import, chunk):
+    """Validate and insert one chunk, moving the checkpoint past it."""
+    validator = ReportImportRowSerializer()
+    first_row = report_import.rows_read + 1
+    reports = []
+    errors = []
+    for offset, (row, error) in enumerate(chunk):
+        if error is None:
+            try:
+                data = validator.run_validation(row)
+            except ValidationError as e:
+                error = e.detail
+        else:
+            error = {'non_field_errors': [error]}
+        if error is not None:
+            errors.append({'row': first_row + offset, 'errors': error})
+            continue
+
+        report = GarbageReport(**data, reported_by_id=report_import.reported_by_id)
+        if report.status == GarbageReport.Status.COMPLETED and report.completed_at is None:
+            # Completion day for the rollup
+            report.completed_at = report.created_at
+        report.set_spatial_keys()
+        reports.append(report)
+
+    row_errors = (report_import.row_errors + errors)[:MAX_ROW_ERRORS]
+    with transaction.atomic():
+        # Claims the chunk; a concurrent run of the same import waits here,
+        # then finds the checkpoint moved
+        claimed = ReportImport.objects.filter(
+            pk=report_import.pk,
+            rows_read=report_import.rows_read
+        ).update(
+            rows_read=F('rows_read') + len(chunk),
+            created=F('created') + len(reports),
+            failed=F('failed') + len(errors),
+            row_errors=row_errors,
+            status=ReportImport.Status.RUNNING,
+            updated_at=timezone.now()
+        )
+        if not claimed:
+            raise ImportInterrupted(f'Import {report_import.pk} is being run elsewhere')
+
+        GarbageReport.objects.bulk_create(reports)
+        for status, count in Counter(report.status for report in reports).items():
+            counters.report_created(status, count)
+        sync.record_reports_saved(reports)
+        response_cache.invalidate_users([report_import.reported_by_id])
+        # Last: the rollup rows are shared by every writer
+        record_reports_created(reports)
+
+    report_import.rows_read += len(chunk)
+    report_import.created += len(reports)
+    report_import.failed += len(errors)
+    report_import.row_errors = row_errors
+    report_import.status = ReportImport.Status.RUNNING
+
+
+def _finish(report_import):
+    """Mark the import done and tell admin dashboards once."""
+    with transaction.atomic():
+        report_import.status = ReportImport.Status.COMPLETED
+        report_import.last_error = ''
+        report_import.finished_at = timezone.now()
+        report_import.save(update_fields=['status', 'last_error', 'finished_at', 'updated_at'])
+        schedule_stats_push()
+        broadcast_reports_imported(report_import)
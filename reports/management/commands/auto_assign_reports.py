@@ -0,0 +1,63 @@
+"""
+Auto-assign pending reports to active collectors in one batch.
+
+Usage:
+    python manage.py auto_assign_reports --dry-run
+    python manage.py auto_assign_reports --capacity 30 --waste-type hazardous --actor admin
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.assignment import active_collectors, apply_plan, pending_reports, plan_assignments
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Assign pending reports to collectors, balancing load and travel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Print the plan without saving it')
+        parser.add_argument('--capacity', type=int, help='Maximum open tasks per collector')
+        parser.add_argument('--collector', type=int, action='append', dest='collectors',
+                            help='Collector id to assign to (repeatable; default all active)')
+        parser.add_argument('--actor', help='Username recorded on the report history (default: first admin)')
+        # Same filters as the admin report list
+        parser.add_argument('--waste-type')
+        parser.add_argument('--date-from', help='YYYY-MM-DD')
+        parser.add_argument('--date-to', help='YYYY-MM-DD')
+        parser.add_argument('--bbox', help='min_lng,min_lat,max_lng,max_lat')
+
+    def handle(self, *args, **options):
+        if options['actor']:
+            actor = User.objects.filter(username=options['actor']).first()
+        else:
+            actor = User.objects.filter(role='admin').order_by('id').first()
+        if actor is None and not options['dry_run']:
+            raise CommandError('No actor found; pass --actor <username>')
+
+        try:
+            reports = pending_reports(options)
+        except ValueError as e:
+            raise CommandError(str(e))
+        collectors = active_collectors(options['collectors'])
+        if not collectors:
+            raise CommandError('No active collectors to assign to')
+
+        plan = plan_assignments(reports, collectors, capacity=options['capacity'])
+        for entry in plan['collectors']:
+            self.stdout.write(
+                f"{entry['username']:<20} load {entry['current_load']:>3} "
+                f"+{len(entry['report_ids']):>3} / {entry['capacity']}  "
+                f"{entry['distance_m'] / 1000:.1f} km"
+            )
+        self.stdout.write(
+            f"{len(reports) - len(plan['unassigned'])} planned, "
+            f"{len(plan['unassigned'])} left unassigned, "
+            f"{plan['total_distance_m'] / 1000:.1f} km total"
+        )
+
+        if options['dry_run']:
+            return
+        assigned = apply_plan(plan, actor)
+        self.stdout.write(self.style.SUCCESS(f'Assigned {assigned} reports'))
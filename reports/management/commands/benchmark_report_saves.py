@@ -0,0 +1,101 @@
+"""
+Benchmark the queries run by a report status change.
+
+Seeds synthetic reports inside a transaction that is rolled back at the
+end, then moves them through status changes three ways. Each write starts
+from the report id, as the status endpoints do:
+
+- re-read: fetch, save() with the tracked old values discarded (so the
+  row is read again first, as the old pre_save receiver did on every
+  save), then create the history entry
+- tracked: fetch, save() using the tracked old values, history entry
+- transition: reports.transitions.transition(), which fetches, writes a
+  conditional UPDATE of the changed columns and the history entry in one
+  transaction
+
+Usage:
+    python manage.py benchmark_report_saves --reports 200
+"""
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from reports.models import GarbageReport, ReportUpdate
+from reports.transitions import transition
+
+User = get_user_model()
+
+# Status changes applied to every report, in order
+TRANSITIONS = ['assigned', 'in_progress', 'completed']
+
+
+class Rollback(Exception):
+    """Raised to discard the synthetic rows."""
+
+
+class Command(BaseCommand):
+    help = 'Count the queries per report status change for each write path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reports', type=int, default=200, help='Synthetic reports to save')
+
+    def handle(self, *args, **options):
+        results = {}
+        try:
+            with transaction.atomic():
+                citizen = User.objects.create(username='benchmark-saves-citizen', role='citizen')
+                collector = User.objects.create(username='benchmark-saves-collector', role='collector')
+                for mode in ('re-read', 'tracked', 'transition'):
+                    reports = self.seed(citizen, options['reports'])
+                    results[mode] = self.measure(reports, collector, mode)
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.stdout.write(f"{'mode':<12}{'writes':>7}{'queries/write':>15}{'ms/write':>10}")
+        for mode, (writes, queries, timings) in results.items():
+            self.stdout.write(
+                f'{mode:<12}{writes:>7}{queries / writes:>15.2f}{statistics.median(timings):>10.2f}'
+            )
+
+    def seed(self, citizen, count):
+        reports = []
+        for i in range(count):
+            report = GarbageReport(
+                title='Synthetic report',
+                description='Synthetic',
+                latitude=12.97,
+                longitude=77.59 + i / 100000,
+                address='Synthetic',
+                image='reports/synthetic.jpg',
+                reported_by=citizen,
+            )
+            report.set_spatial_keys()
+            reports.append(report)
+        return GarbageReport.objects.bulk_create(reports)
+
+    def measure(self, reports, collector, mode):
+        """Move every report through TRANSITIONS; returns (writes, queries, ms per write)."""
+        writes, queries, timings = 0, 0, []
+        for status in TRANSITIONS:
+            for report in reports:
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    if mode == 'transition':
+                        transition(report.pk, status, actor=collector, collector=collector)
+                    else:
+                        report = GarbageReport.objects.get(pk=report.pk)
+                        if mode == 're-read':
+                            report._loaded_values = {}
+                        report.status = status
+                        report.assigned_to = collector
+                        report.save()
+                        ReportUpdate.objects.create(report=report, status=status, updated_by=collector)
+                    timings.append((time.perf_counter() - started) * 1000)
+                writes += 1
+                queries += len(captured)
+        return writes, queries, timings
@@ -0,0 +1,69 @@
+"""
+Benchmark route optimisation against the greedy nearest-neighbour route.
+
+The greedy route is what the collector app computed on-device before the
+route endpoint existed. Stops are random points in a synthetic city; no
+database access is needed.
+
+Usage:
+    python manage.py benchmark_routes --sizes 10 50 100 500
+"""
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from reports.distances import haversine_matrix
+from reports.routes import nearest_neighbour, optimize_route, route_length
+
+# Synthetic city roughly 20km x 20km
+CENTER_LAT = 12.97
+CENTER_LNG = 77.59
+SPREAD = 0.09
+
+
+class Command(BaseCommand):
+    help = 'Compare optimised collection routes with greedy nearest-neighbour'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 25, 50, 100, 200, 500])
+        parser.add_argument('--runs', type=int, default=5, help='Random instances per size')
+        parser.add_argument('--budget', type=int, help='Time budget in ms (default ROUTE_TIME_BUDGET_MS)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.stdout.write(
+            f"{'stops':>6}{'greedy km':>12}{'optimised km':>14}{'saving':>9}"
+            f"{'greedy ms':>11}{'optimised ms':>14}"
+        )
+        for size in options['sizes']:
+            greedy_km, optimised_km, greedy_ms, optimised_ms = [], [], [], []
+            for _ in range(options['runs']):
+                points = [
+                    (CENTER_LAT + rng.uniform(-SPREAD, SPREAD), CENTER_LNG + rng.uniform(-SPREAD, SPREAD))
+                    for _ in range(size + 1)
+                ]
+
+                started = time.perf_counter()
+                matrix = haversine_matrix(points)
+                greedy = route_length(matrix, nearest_neighbour(matrix))
+                greedy_ms.append((time.perf_counter() - started) * 1000)
+
+                started = time.perf_counter()
+                route = optimize_route(
+                    points[0], points[1:], time_budget_ms=options['budget'], matrix=matrix
+                )
+                optimised_ms.append((time.perf_counter() - started) * 1000)
+
+                greedy_km.append(greedy / 1000)
+                optimised_km.append(route['total_distance_m'] / 1000)
+
+            greedy_mean = statistics.mean(greedy_km)
+            optimised_mean = statistics.mean(optimised_km)
+            self.stdout.write(
+                f'{size:>6}{greedy_mean:>12.2f}{optimised_mean:>14.2f}'
+                f'{(1 - optimised_mean / greedy_mean) * 100:>8.1f}%'
+                f'{statistics.median(greedy_ms):>11.1f}{statistics.median(optimised_ms):>14.1f}'
+            )
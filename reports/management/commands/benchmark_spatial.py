@@ -0,0 +1,163 @@
+"""
+Benchmark spatial report lookups on synthetic data.
+
+Seeds synthetic reports inside a transaction that is rolled back at the
+end, then times bbox, radius and k-nearest lookups through the indexed
+spatial keys against the equivalent scans over the Decimal columns.
+Most synthetic reports are closed, like a long-running deployment, which
+is what the duplicate check's partial index relies on.
+
+Usage:
+    python manage.py benchmark_spatial --rows 1000000
+"""
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from reports.duplicates import DUPLICATE_RADIUS_M, DUPLICATE_WINDOW, OPEN_STATUSES, find_duplicates
+
+from reports.geo import distance_sq_expression, filter_bbox, filter_radius, nearest
+from reports.models import GarbageReport
+
+User = get_user_model()
+
+# Synthetic city roughly 60km x 60km
+CENTER_LAT = 12.97
+CENTER_LNG = 77.59
+SPREAD = 0.27
+
+# Share of synthetic reports still open
+OPEN_SHARE = 0.05
+
+
+class Rollback(Exception):
+    """Raised to discard the synthetic rows."""
+
+
+class Command(BaseCommand):
+    help = 'Benchmark indexed spatial lookups against Decimal scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000)
+        parser.add_argument('--queries', type=int, default=20)
+        parser.add_argument('--radius', type=float, default=500, help='Radius in metres')
+        parser.add_argument('--k', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        try:
+            with transaction.atomic():
+                self.seed(options['rows'])
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, rows):
+        user = User.objects.create(username='benchmark-spatial', role='citizen')
+        batch = []
+        started = time.perf_counter()
+        for _ in range(rows):
+            report = GarbageReport(
+                title='Synthetic report',
+                description='Synthetic',
+                latitude=round(CENTER_LAT + random.uniform(-SPREAD, SPREAD), 10),
+                longitude=round(CENTER_LNG + random.uniform(-SPREAD, SPREAD), 10),
+                address='Synthetic',
+                image='reports/synthetic.jpg',
+                reported_by=user,
+                status=(
+                    random.choice(OPEN_STATUSES) if random.random() < OPEN_SHARE
+                    else GarbageReport.Status.COMPLETED
+                ),
+            )
+            report.set_spatial_keys()
+            batch.append(report)
+            if len(batch) == 5000:
+                GarbageReport.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            GarbageReport.objects.bulk_create(batch)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE reports_garbagereport')
+        self.stdout.write(
+            f'Seeded {rows} rows on {connection.vendor} '
+            f'in {time.perf_counter() - started:.1f}s'
+        )
+
+    def time_queries(self, points, run):
+        timings = []
+        for latitude, longitude in points:
+            started = time.perf_counter()
+            run(latitude, longitude)
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def run(self, options):
+        radius = options['radius']
+        k = options['k']
+        points = [
+            (CENTER_LAT + random.uniform(-SPREAD, SPREAD), CENTER_LNG + random.uniform(-SPREAD, SPREAD))
+            for _ in range(options['queries'])
+        ]
+        qs = GarbageReport.objects.all()
+        half = radius / 111320.0
+
+        def decimal_bbox(lat, lng):
+            return qs.filter(
+                latitude__gte=lat - half, latitude__lte=lat + half,
+                longitude__gte=lng - half, longitude__lte=lng + half
+            ).count()
+
+        def indexed_bbox(lat, lng):
+            return filter_bbox(qs, (lng - half, lat - half, lng + half, lat + half)).count()
+
+        def scan_radius(lat, lng):
+            return qs.annotate(
+                distance_sq=distance_sq_expression(lat, lng)
+            ).filter(distance_sq__lte=radius * radius).count()
+
+        def indexed_radius(lat, lng):
+            return filter_radius(qs, lat, lng, radius).count()
+
+        def scan_nearest(lat, lng):
+            return list(qs.annotate(
+                distance_sq=distance_sq_expression(lat, lng)
+            ).order_by('distance_sq').values_list('id', flat=True)[:k])
+
+        def indexed_nearest(lat, lng):
+            return nearest(qs, lat, lng, k)
+
+        dup_half = DUPLICATE_RADIUS_M / 111320.0
+        since = timezone.now() - DUPLICATE_WINDOW
+
+        def decimal_duplicates(lat, lng):
+            return list(qs.filter(
+                status__in=OPEN_STATUSES, created_at__gte=since,
+                latitude__gte=lat - dup_half, latitude__lte=lat + dup_half,
+                longitude__gte=lng - dup_half, longitude__lte=lng + dup_half
+            )[:5])
+
+        def indexed_duplicates(lat, lng):
+            return find_duplicates(lat, lng)
+
+        rows = [
+            ('bbox', decimal_bbox, indexed_bbox),
+            (f'radius {radius:.0f}m', scan_radius, indexed_radius),
+            (f'{k}-nearest', scan_nearest, indexed_nearest),
+            ('duplicates', decimal_duplicates, indexed_duplicates),
+        ]
+        self.stdout.write(f"{'lookup':<16}{'scan ms':>12}{'indexed ms':>14}{'speedup':>10}")
+        for name, scan, indexed in rows:
+            scan_ms = self.time_queries(points, scan)
+            indexed_ms = self.time_queries(points, indexed)
+            self.stdout.write(
+                f'{name:<16}{scan_ms:>12.2f}{indexed_ms:>14.2f}{scan_ms / indexed_ms:>9.1f}x'
+            )
@@ -0,0 +1,41 @@
+"""
+Build the offline road graph used by the road network distance provider.
+
+Reads an OSM XML extract (e.g. exported from openstreetmap.org or cut
+with osmium, then converted with ``osmium cat extract.pbf -o extract.osm``),
+keeps drivable roads, and precomputes a contraction hierarchy. Set
+DISTANCE_PROVIDER=road_network to use the output; restart workers after a
+rebuild so they reload it.
+
+Usage:
+    python manage.py build_road_graph extract.osm [--output data/road_graph.npz]
+"""
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from reports.road_graph import build_road_graph
+
+
+class Command(BaseCommand):
+    help = 'Build the offline road graph from an OSM XML extract'
+
+    def add_arguments(self, parser):
+        parser.add_argument('osm_path', help='OSM XML extract')
+        parser.add_argument('--output', help='Output .npz file (defaults to ROAD_GRAPH_PATH)')
+
+    def handle(self, *args, **options):
+        output = Path(options['output'] or settings.ROAD_GRAPH_PATH)
+        output.parent.mkdir(parents=True, exist_ok=True)
+
+        def progress(done, total):
+            self.stdout.write(f'Contracted {done}/{total} nodes')
+
+        started = time.perf_counter()
+        summary = build_road_graph(options['osm_path'], output, progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Built {output}: {summary['nodes']} nodes, {summary['edges']} road edges, "
+            f"{summary['hierarchy_edges']} hierarchy edges in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,124 @@
+"""
+Check that report endpoints run a fixed number of queries per request.
+
+Seeds synthetic users, reports and update history inside a transaction
+that is rolled back at the end. Each endpoint in ENDPOINT_QUERY_BUDGETS is
+requested with one report and with a full page of reports. The command
+fails if the count differs between the two (an N+1) or exceeds the budget.
+Exits non-zero on failure, so it can run in CI.
+
+Usage:
+    python manage.py check_query_budgets
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from reports.models import GarbageReport, ReportUpdate
+from reports.query_budget import ENDPOINT_QUERY_BUDGETS
+from reports.serializers import REPORT_EXPANDABLE
+
+User = get_user_model()
+
+# History entries per synthetic report, each by a different user
+UPDATES_PER_REPORT = 3
+
+# URL name -> role of the requesting user
+ENDPOINT_ROLES = {
+    'citizen-reports': 'citizen',
+    'citizen-report-detail': 'citizen',
+    'citizen-sync': 'citizen',
+    'collector-tasks': 'collector',
+    'collector-task-detail': 'collector',
+    'collector-sync': 'collector',
+    'admin-reports': 'admin',
+    'admin-report-detail': 'admin',
+}
+
+
+class Rollback(Exception):
+    """Raised to discard the synthetic rows."""
+
+
+class Command(BaseCommand):
+    help = 'Fail if report endpoints exceed their query budgets'
+
+    def handle(self, *args, **options):
+        page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 20
+        try:
+            # Measure the database work, not the response cache (whose
+            # on-commit invalidation never fires in this transaction)
+            with transaction.atomic(), override_settings(RESPONSE_CACHE_SECONDS=0):
+                users = self.seed_users()
+                self.seed_reports(users, 1)
+                small = self.measure(users)
+                self.seed_reports(users, page_size - 1)
+                full = self.measure(users)
+                raise Rollback
+        except Rollback:
+            pass
+
+        failures = []
+        self.stdout.write(f"{'endpoint':<26}{'1 report':>10}{f'{page_size} reports':>13}{'budget':>8}")
+        for name, budget in ENDPOINT_QUERY_BUDGETS.items():
+            self.stdout.write(f'{name:<26}{small[name]:>10}{full[name]:>13}{budget:>8}')
+            if full[name] != small[name]:
+                failures.append(f'{name} grows with the page ({small[name]} -> {full[name]} queries)')
+            elif full[name] > budget:
+                failures.append(f'{name} runs {full[name]} queries (budget {budget})')
+
+        if failures:
+            raise CommandError('Query budget exceeded:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('All endpoints within their query budgets'))
+
+    def seed_users(self):
+        return {
+            role: User.objects.create(username=f'query-budget-{role}', role=role)
+            for role in ('citizen', 'collector', 'admin')
+        }
+
+    def seed_reports(self, users, count):
+        for _ in range(count):
+            report = GarbageReport.objects.create(
+                title='Synthetic report',
+                description='Synthetic',
+                latitude=12.97,
+                longitude=77.59,
+                address='Synthetic',
+                image='reports/synthetic.jpg',
+                reported_by=users['citizen'],
+                assigned_to=users['collector'],
+                status=GarbageReport.Status.ASSIGNED,
+            )
+            authors = [users['admin'], users['collector'], users['citizen']]
+            for index in range(UPDATES_PER_REPORT):
+                ReportUpdate.objects.create(
+                    report=report,
+                    status=GarbageReport.Status.ASSIGNED,
+                    note='Synthetic',
+                    updated_by=authors[index % len(authors)]
+                )
+
+    def measure(self, users):
+        """Query count per endpoint for the current data."""
+        report = GarbageReport.objects.filter(reported_by=users['citizen']).latest('id')
+        counts = {}
+        for name, role in ENDPOINT_ROLES.items():
+            client = APIClient()
+            client.force_authenticate(users[role])
+            if name.endswith('detail'):
+                url = reverse(name, kwargs={'pk': report.pk})
+            else:
+                # Exact counts are never cached, so the count is always
+                # measured; lists are expanded to their heaviest shape
+                url = f'{reverse(name)}?count=exact&expand={",".join(REPORT_EXPANDABLE)}'
+            with CaptureQueriesContext(connection) as captured:
+                response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f'{name} returned HTTP {response.status_code}')
+            counts[name] = len(captured)
+        return counts
@@ -0,0 +1,144 @@
+"""
+Check that the hot report queries are answered from indexes.
+
+Seeds a large synthetic dataset (reports spread over a year, across many
+citizens, collectors and statuses, each with some history) inside a
+transaction that is rolled back at the end, refreshes the planner
+statistics, and EXPLAINs every query in HOT_QUERIES. The command fails if
+any of them reads a whole table. Exits non-zero on failure, so it can run
+in CI.
+
+Usage:
+    python manage.py check_query_plans [--reports 20000]
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from reports.analytics import range_bounds
+from reports.models import GarbageReport, ReportUpdate
+from reports.query_plans import HOT_QUERIES, explain_scans
+
+User = get_user_model()
+
+CITIZENS = 200
+COLLECTORS = 50
+DAYS = 365
+
+# Seeded reports are dated this far back, so date-range queries select
+# them rather than whatever real data the database holds
+SEED_AGE = timedelta(days=3650)
+
+# Status mix of the synthetic reports, in tenths
+STATUS_MIX = (
+    ['pending'] + ['assigned'] * 2 + ['in_progress'] + ['completed'] * 5 + ['rejected']
+)
+
+
+class Rollback(Exception):
+    """Raised to discard the synthetic rows."""
+
+
+class Command(BaseCommand):
+    help = 'Fail if a hot report query scans a whole table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reports',
+            type=int,
+            default=20000,
+            help='Synthetic reports to seed (default 20000)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                seed = self.seed(options['reports'])
+                self.analyze()
+                plans = {
+                    name: explain_scans(build(seed))
+                    for name, build in HOT_QUERIES.items()
+                }
+                raise Rollback
+        except Rollback:
+            pass
+
+        failures = []
+        self.stdout.write(f"{'query':<24}indexes")
+        for name, (full_scans, indexes) in plans.items():
+            self.stdout.write(f"{name:<24}{', '.join(indexes) or '-'}")
+            if full_scans:
+                failures.append(f"{name} scans {', '.join(sorted(full_scans))}")
+
+        if failures:
+            raise CommandError('Full table scans:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('All hot queries use indexes'))
+
+    def seed(self, count):
+        citizens = User.objects.bulk_create(
+            User(username=f'query-plan-citizen-{i}', role='citizen') for i in range(CITIZENS)
+        )
+        collectors = User.objects.bulk_create(
+            User(username=f'query-plan-collector-{i}', role='collector') for i in range(COLLECTORS)
+        )
+        newest = timezone.now() - SEED_AGE
+
+        reports = []
+        for i in range(count):
+            status = STATUS_MIX[i % len(STATUS_MIX)]
+            # Spread over the last DAYS days
+            created_at = newest - timedelta(days=i % DAYS, hours=1)
+            report = GarbageReport(
+                title='Synthetic report',
+                description='Synthetic',
+                latitude=12.9 + (i % 1000) / 10000,
+                longitude=77.5 + (i // 1000 % 1000) / 10000,
+                address='Synthetic',
+                image='reports/synthetic.jpg',
+                status=status,
+                reported_by=citizens[i % CITIZENS],
+                assigned_to=None if status == 'pending' else collectors[i % COLLECTORS],
+                created_at=created_at,
+                completed_at=created_at + timedelta(hours=1) if status == 'completed' else None,
+            )
+            report.set_spatial_keys()
+            reports.append(report)
+        reports = GarbageReport.objects.bulk_create(reports, batch_size=1000)
+
+        ReportUpdate.objects.bulk_create(
+            (
+                ReportUpdate(
+                    report=report,
+                    status=report.status,
+                    updated_by=report.assigned_to or report.reported_by
+                )
+                for report in reports
+                for _ in range(2)
+            ),
+            batch_size=1000
+        )
+
+        today = timezone.localdate(newest)
+        week_from = today - timedelta(days=6)
+        return {
+            'citizen': citizens[0],
+            'collector': collectors[0],
+            'collectors': collectors,
+            'report_ids': [report.pk for report in reports[:20]],
+            'today': today,
+            'week_from': week_from,
+            'week': range_bounds(week_from, today),
+        }
+
+    def analyze(self):
+        """Refresh planner statistics so plans reflect the seeded rows."""
+        tables = [GarbageReport._meta.db_table, ReportUpdate._meta.db_table]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f"ANALYZE {', '.join(tables)}")
+            elif connection.vendor == 'sqlite':
+                for table in tables:
+                    cursor.execute(f'ANALYZE {table}')
@@ -0,0 +1,52 @@
+"""
+Stream a bulk export of reports or their update history.
+
+Usage:
+    python manage.py export_reports --output reports.csv
+    python manage.py export_reports --dataset updates --format ndjson --status completed
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.exports import EXPORT_CHUNK_SIZE, EXPORT_DATASETS, EXPORT_FORMATS, iter_export
+from reports.filters import filter_reports, search_reports
+from reports.models import GarbageReport
+
+
+class Command(BaseCommand):
+    help = 'Export reports or report history as CSV or NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', choices=EXPORT_DATASETS, default='reports')
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--output', help='File to write (default: stdout)')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+        # Same filters as the admin report list
+        parser.add_argument('--status')
+        parser.add_argument('--waste-type')
+        parser.add_argument('--collector', type=int)
+        parser.add_argument('--date-from', help='YYYY-MM-DD')
+        parser.add_argument('--date-to', help='YYYY-MM-DD')
+        parser.add_argument('--search')
+
+    def handle(self, *args, **options):
+        try:
+            reports = filter_reports(GarbageReport.objects.all(), options)
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options['search']:
+            reports = search_reports(reports, options['search'])
+
+        chunks = iter_export(
+            options['dataset'],
+            reports,
+            options['format'],
+            chunk_size=options['chunk_size']
+        )
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f"Export written to {options['output']}"))
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
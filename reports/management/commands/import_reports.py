@@ -0,0 +1,97 @@
+"""
+Bulk import reports from a CSV or NDJSON file.
+
+Rows are validated and inserted in chunks without per-report signals (see
+reports.imports), and progress is printed after each chunk. If an import
+stops part way, run it again with ``--resume`` and the same file; it
+continues after the last committed chunk.
+
+Usage:
+    python manage.py import_reports complaints.csv --reporter callcentre
+    python manage.py import_reports - --format ndjson --reporter callcentre < feed.ndjson
+    python manage.py import_reports complaints.csv --resume 12
+"""
+import json
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.imports import (
+    IMPORT_CHUNK_SIZE,
+    IMPORT_FORMATS,
+    format_for,
+    get_resumable_import,
+    run_import,
+)
+from reports.models import ReportImport
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Import reports from CSV or NDJSON in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, or - for stdin')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='Default: from the file extension')
+        parser.add_argument('--reporter', help='Username the reports are filed under')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE)
+        parser.add_argument('--resume', type=int, help='Continue this import id')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if options['resume']:
+            try:
+                report_import = get_resumable_import(options['resume'])
+            except ReportImport.DoesNotExist:
+                raise CommandError(f"Import {options['resume']} not found")
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(f'Resuming import {report_import.pk} after row {report_import.rows_read}')
+        else:
+            import_format = options['format'] or format_for(path)
+            if import_format is None:
+                raise CommandError('Cannot tell the format from the file name; pass --format')
+            if not options['reporter']:
+                raise CommandError('--reporter is required for a new import')
+            try:
+                reporter = User.objects.get(username=options['reporter'])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['reporter']} not found")
+            report_import = ReportImport.objects.create(
+                source='stdin' if path == '-' else path,
+                format=import_format,
+                reported_by=reporter
+            )
+            self.stdout.write(f'Started import {report_import.pk}')
+
+        try:
+            lines = sys.stdin if path == '-' else open(path, encoding='utf-8-sig', newline='')
+        except OSError as e:
+            raise CommandError(str(e))
+        started = time.perf_counter()
+        first_row = report_import.rows_read
+        try:
+            for progress in run_import(report_import, lines, chunk_size=options['chunk_size']):
+                rate = (progress.rows_read - first_row) / max(time.perf_counter() - started, 1e-9)
+                self.stdout.write(
+                    f'{progress.rows_read} rows read, {progress.created} created, '
+                    f'{progress.failed} failed ({rate:.0f} rows/s)'
+                )
+        except Exception as e:
+            raise CommandError(
+                f'Import {report_import.pk} stopped after row {report_import.rows_read}: {e}\n'
+                f'Continue with --resume {report_import.pk}'
+            )
+        finally:
+            if lines is not sys.stdin:
+                lines.close()
+
+        for error in report_import.row_errors[:10]:
+            self.stdout.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f'Import {report_import.pk} completed: {report_import.created} reports created, '
+            f'{report_import.failed} rows failed'
+        ))
@@ -0,0 +1,30 @@
+"""
+Delete sync change-feed rows and recorded offline operations older than
+the retention window.
+
+Clients holding cursors older than the window get a full resync.
+
+Usage:
+    python manage.py prune_sync_changes [--days 30]
+"""
+from django.core.management.base import BaseCommand
+
+from reports.sync import prune_changes, prune_operations
+
+
+class Command(BaseCommand):
+    help = 'Prune the report sync change log'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Retention in days (defaults to SYNC_CHANGE_RETENTION_DAYS)'
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_changes(options['days'])
+        operations = prune_operations(options['days'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Pruned {deleted} sync change rows and {operations} offline operations'
+        ))
@@ -0,0 +1,19 @@
+"""
+Rebuild the ReportDailyStats rollup from scratch.
+
+Usage:
+    python manage.py rebuild_report_stats
+"""
+from django.core.management.base import BaseCommand
+
+from reports.stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = 'Backfill or rebuild the daily report analytics rollup'
+
+    def handle(self, *args, **options):
+        count = rebuild_daily_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt report daily stats ({count} rows)'
+        ))
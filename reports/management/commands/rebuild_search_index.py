@@ -0,0 +1,47 @@
+"""
+Recompute the full-text search indexes for reports and users.
+
+The indexes are kept current by database triggers; rebuild after changing
+SEARCH_CONFIG, restoring a database from a dump without them, or loading
+rows with the triggers disabled.
+
+Usage:
+    python manage.py rebuild_search_index [--index reports|users]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from accounts.search import USER_SEARCH_INDEX
+from reports.filters import REPORT_SEARCH_INDEX
+
+INDEXES = {
+    'reports': REPORT_SEARCH_INDEX,
+    'users': USER_SEARCH_INDEX,
+}
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--index',
+            choices=sorted(INDEXES),
+            action='append',
+            help='Index to rebuild (repeatable; default all)'
+        )
+
+    def handle(self, *args, **options):
+        if not REPORT_SEARCH_INDEX.supported(connection):
+            self.stdout.write(f'{connection.vendor} has no full-text index; nothing to rebuild')
+            return
+
+        for name in options['index'] or sorted(INDEXES):
+            started = time.perf_counter()
+            with transaction.atomic():
+                INDEXES[name].rebuild(connection)
+            self.stdout.write(self.style.SUCCESS(
+                f'Rebuilt {name} search index in {time.perf_counter() - started:.1f}s'
+            ))
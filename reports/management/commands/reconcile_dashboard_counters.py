@@ -0,0 +1,39 @@
+"""
+Correct drift in the cached dashboard counters.
+
+Usage:
+    python manage.py reconcile_dashboard_counters
+    python manage.py reconcile_dashboard_counters --interval 300
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from reports.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Reset the cached dashboard counters from the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Keep running and reconcile every N seconds'
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        while True:
+            drift = reconcile()
+            if drift:
+                for key, (cached, actual) in drift.items():
+                    self.stdout.write(self.style.WARNING(
+                        f'{key}: cached {cached}, database {actual}'
+                    ))
+            else:
+                self.stdout.write(self.style.SUCCESS('Dashboard counters in sync'))
+            if not interval:
+                break
+            time.sleep(interval)
@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-18 05:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_alter_garbagereport_latitude_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('waste_type', models.CharField(choices=[('organic', 'Organic Waste'), ('recyclable', 'Recyclable Waste'), ('hazardous', 'Hazardous Waste'), ('electronic', 'Electronic Waste'), ('mixed', 'Mixed Waste')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('assigned', 'Assigned'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('rejected', 'Rejected')], max_length=20)),
+                ('created', models.IntegerField(default=0)),
+                ('assigned', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('rejected', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'report daily stats',
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'waste_type', 'status'), name='unique_report_daily_stats')],
+            },
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 6.0 on 2026-10-18 06:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode_geohash(latitude, longitude, precision=9):
+    """Frozen copy of reports.geohash.encode, so later edits cannot change this migration."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lng_range[0] = mid
+            else:
+                bits <<= 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(chars)
+
+
+def backfill_spatial_keys(apps, schema_editor):
+    GarbageReport = apps.get_model('reports', 'GarbageReport')
+    batch = []
+    for report in GarbageReport.objects.only('id', 'latitude', 'longitude').iterator(chunk_size=2000):
+        report.geo_lat = float(report.latitude)
+        report.geo_lng = float(report.longitude)
+        report.geohash = encode_geohash(report.geo_lat, report.geo_lng)
+        batch.append(report)
+        if len(batch) >= 2000:
+            GarbageReport.objects.bulk_update(batch, ['geo_lat', 'geo_lng', 'geohash'])
+            batch = []
+    if batch:
+        GarbageReport.objects.bulk_update(batch, ['geo_lat', 'geo_lng', 'geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_reportdailystats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='garbagereport',
+            name='geo_lat',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='garbagereport',
+            name='geo_lng',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='garbagereport',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=12),
+        ),
+        migrations.AddIndex(
+            model_name='garbagereport',
+            index=models.Index(fields=['geo_lat', 'geo_lng'], name='report_geo_lat_lng_idx'),
+        ),
+        migrations.RunPython(backfill_spatial_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 09:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0006_reportchange'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='garbagereport',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='reports.garbagereport'),
+        ),
+        migrations.AddIndex(
+            model_name='garbagereport',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'assigned', 'in_progress'])), fields=['geo_lat', 'geo_lng'], name='report_open_geo_idx'),
+        ),
+    ]
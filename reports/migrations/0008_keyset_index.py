@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-18 09:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0007_duplicate_of'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='garbagereport',
+            index=models.Index(fields=['created_at', 'id'], name='report_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,122 @@
+# Generated by Django 6.0 on 2026-10-18 10:05
+
+from django.db import migrations
+
+# The SQL is frozen here as it was when the index was added; it must not
+# follow later changes to backend.search. Vectors use the 'english'
+# configuration; `manage.py rebuild_search_index` applies SEARCH_CONFIG.
+
+PG_INSTALL = [
+    'ALTER TABLE reports_garbagereport ADD COLUMN IF NOT EXISTS search_vector tsvector',
+    """
+    CREATE OR REPLACE FUNCTION reports_garbagereport_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english'::regconfig, regexp_replace(coalesce(NEW.title, ''), '[^[:alnum:]]+', ' ', 'g')), 'A')
+            || setweight(to_tsvector('english'::regconfig, regexp_replace(coalesce(NEW.address, ''), '[^[:alnum:]]+', ' ', 'g')), 'B')
+            || setweight(to_tsvector('english'::regconfig, regexp_replace(coalesce(NEW.description, ''), '[^[:alnum:]]+', ' ', 'g')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS reports_garbagereport_search_vector ON reports_garbagereport',
+    """
+    CREATE TRIGGER reports_garbagereport_search_vector
+    BEFORE INSERT OR UPDATE OF title, address, description ON reports_garbagereport
+    FOR EACH ROW EXECUTE FUNCTION reports_garbagereport_search_vector()
+    """,
+    'CREATE INDEX IF NOT EXISTS reports_garbagereport_search_idx ON reports_garbagereport USING gin (search_vector)',
+]
+
+# Run per id range, so existing rows are filled in batches
+PG_FILL = """
+    UPDATE reports_garbagereport SET search_vector =
+        setweight(to_tsvector('english'::regconfig, regexp_replace(coalesce(title, ''), '[^[:alnum:]]+', ' ', 'g')), 'A')
+        || setweight(to_tsvector('english'::regconfig, regexp_replace(coalesce(address, ''), '[^[:alnum:]]+', ' ', 'g')), 'B')
+        || setweight(to_tsvector('english'::regconfig, regexp_replace(coalesce(description, ''), '[^[:alnum:]]+', ' ', 'g')), 'C')
+    WHERE id >= %s AND id < %s
+"""
+
+PG_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS reports_garbagereport_search_vector ON reports_garbagereport',
+    'DROP FUNCTION IF EXISTS reports_garbagereport_search_vector()',
+    'DROP INDEX IF EXISTS reports_garbagereport_search_idx',
+    'ALTER TABLE reports_garbagereport DROP COLUMN IF EXISTS search_vector',
+]
+
+SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS reports_garbagereport_fts USING fts5(
+        title, address, description,
+        content='reports_garbagereport', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reports_garbagereport_fts_insert AFTER INSERT ON reports_garbagereport BEGIN
+        INSERT INTO reports_garbagereport_fts (rowid, title, address, description)
+        VALUES (new.id, new.title, new.address, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reports_garbagereport_fts_delete AFTER DELETE ON reports_garbagereport BEGIN
+        INSERT INTO reports_garbagereport_fts (reports_garbagereport_fts, rowid, title, address, description)
+        VALUES ('delete', old.id, old.title, old.address, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reports_garbagereport_fts_update
+    AFTER UPDATE OF title, address, description ON reports_garbagereport BEGIN
+        INSERT INTO reports_garbagereport_fts (reports_garbagereport_fts, rowid, title, address, description)
+        VALUES ('delete', old.id, old.title, old.address, old.description);
+        INSERT INTO reports_garbagereport_fts (rowid, title, address, description)
+        VALUES (new.id, new.title, new.address, new.description);
+    END
+    """,
+    "INSERT INTO reports_garbagereport_fts (reports_garbagereport_fts) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS reports_garbagereport_fts_insert',
+    'DROP TRIGGER IF EXISTS reports_garbagereport_fts_delete',
+    'DROP TRIGGER IF EXISTS reports_garbagereport_fts_update',
+    'DROP TABLE IF EXISTS reports_garbagereport_fts',
+]
+
+FILL_BATCH_SIZE = 10000
+
+
+def install(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for sql in PG_INSTALL:
+                cursor.execute(sql)
+            cursor.execute('SELECT min(id), max(id) FROM reports_garbagereport')
+            low, high = cursor.fetchone()
+            if low is not None:
+                for start in range(low, high + 1, FILL_BATCH_SIZE):
+                    cursor.execute(PG_FILL, [start, start + FILL_BATCH_SIZE])
+            cursor.execute('ANALYZE reports_garbagereport')
+        elif connection.vendor == 'sqlite':
+            for sql in SQLITE_INSTALL:
+                cursor.execute(sql)
+
+
+def uninstall(apps, schema_editor):
+    connection = schema_editor.connection
+    statements = {'postgresql': PG_UNINSTALL, 'sqlite': SQLITE_UNINSTALL}.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0008_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-18 11:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0009_report_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='garbagereport',
+            index=models.Index(fields=['reported_by', 'created_at', 'id'], name='report_reporter_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='garbagereport',
+            index=models.Index(fields=['assigned_to', 'created_at', 'id'], name='report_assignee_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='garbagereport',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='report_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='garbagereport',
+            index=models.Index(condition=models.Q(('status__in', ['assigned', 'in_progress'])), fields=['assigned_to', 'status'], name='report_open_assignee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='garbagereport',
+            index=models.Index(condition=models.Q(('status', 'completed')), fields=['completed_at'], name='report_completed_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reportupdate',
+            index=models.Index(fields=['report', 'created_at'], name='update_report_created_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-18 12:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0010_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='garbagereport',
+            name='report_reporter_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='garbagereport',
+            name='report_assignee_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='garbagereport',
+            index=models.Index(fields=['reported_by', 'created_at', 'id', 'updated_at'], name='report_reporter_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='garbagereport',
+            index=models.Index(fields=['assigned_to', 'created_at', 'id', 'updated_at'], name='report_assignee_created_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-18 16:55
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0013_report_import'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='garbagereport',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
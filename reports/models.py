@@ -1,10 +1,18 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
+from backend.tracking import TrackedFieldsMixin
 
-class GarbageReport(models.Model):
+from . import geohash
+
+
+class GarbageReport(TrackedFieldsMixin, models.Model):
     """Model for garbage reports submitted by citizens."""
     
+    # Old values compared by reports.signals after each save
+    tracked_fields = ('status', 'waste_type', 'assigned_to_id')
+    
     class Status(models.TextChoices):
         PENDING = 'pending', 'Pending'
         ASSIGNED = 'assigned', 'Assigned'
@@ -33,6 +41,17 @@ class GarbageReport(models.Model):
     longitude = models.DecimalField(max_digits=15, decimal_places=10)
     address = models.TextField()
     
+    # Indexed spatial keys derived from latitude/longitude on save
+    geo_lat = models.FloatField(null=True, blank=True, editable=False)
+    geo_lng = models.FloatField(null=True, blank=True, editable=False)
+    geohash = models.CharField(
+        max_length=12,
+        blank=True,
+        default='',
+        db_index=True,
+        editable=False
+    )
+    
     # Image
     image = models.ImageField(upload_to='reports/')
     
@@ -56,17 +75,79 @@ class GarbageReport(models.Model):
         blank=True,
         related_name='assigned_tasks'
     )
+    duplicate_of = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='duplicates'
+    )
     
-    # Timestamps
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Timestamps. created_at defaults to now rather than being auto_now_add,
+    # so bulk imports can keep the dates of legacy reports
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination sort key
+            models.Index(fields=['created_at', 'id'], name='report_created_id_idx'),
+            # Citizen reports, collector tasks and the admin status filter,
+            # each newest first. The per-user ones end in updated_at so the
+            # ETag validators are answered from the index alone
+            models.Index(
+                fields=['reported_by', 'created_at', 'id', 'updated_at'],
+                name='report_reporter_created_idx'
+            ),
+            models.Index(
+                fields=['assigned_to', 'created_at', 'id', 'updated_at'],
+                name='report_assignee_created_idx'
+            ),
+            models.Index(fields=['status', 'created_at', 'id'], name='report_status_created_idx'),
+            # Collector routes and workloads only look at open tasks
+            models.Index(
+                fields=['assigned_to', 'status'],
+                condition=models.Q(status__in=['assigned', 'in_progress']),
+                name='report_open_assignee_idx'
+            ),
+            # Completion series in the analytics
+            models.Index(
+                fields=['completed_at'],
+                condition=models.Q(status='completed'),
+                name='report_completed_at_idx'
+            ),
+            models.Index(fields=['geo_lat', 'geo_lng'], name='report_geo_lat_lng_idx'),
+            # Duplicate detection only searches open reports
+            models.Index(
+                fields=['geo_lat', 'geo_lng'],
+                condition=models.Q(status__in=['pending', 'assigned', 'in_progress']),
+                name='report_open_geo_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.status}"
+    
+    def set_spatial_keys(self):
+        """Derive the indexed float coordinates and geohash from lat/lng."""
+        if self.latitude is None or self.longitude is None:
+            self.geo_lat = self.geo_lng = None
+            self.geohash = ''
+            return
+        self.geo_lat = float(self.latitude)
+        self.geo_lng = float(self.longitude)
+        self.geohash = geohash.encode(self.geo_lat, self.geo_lng)
+    
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.set_spatial_keys()
+        elif {'latitude', 'longitude'} & set(update_fields):
+            self.set_spatial_keys()
+            kwargs['update_fields'] = set(update_fields) | {'geo_lat', 'geo_lng', 'geohash'}
+        super().save(*args, **kwargs)
 
 
 class ReportUpdate(models.Model):
@@ -90,6 +171,175 @@ class ReportUpdate(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # A report's history, newest first
+            models.Index(fields=['report', 'created_at'], name='update_report_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.report.title} - {self.status}"
+
+
+class ReportDailyStats(models.Model):
+    """
+    Per-day rollup of report activity, keyed by waste type and status.
+    
+    ``created`` counts reports created on ``date`` that are currently in
+    ``status``; it moves between rows as reports change status. The
+    ``assigned``, ``completed`` and ``rejected`` columns count transitions
+    into that status on ``date``. Kept up to date by ``reports.signals``
+    and rebuilt with ``manage.py rebuild_report_stats``.
+    """
+    
+    date = models.DateField()
+    waste_type = models.CharField(
+        max_length=20,
+        choices=GarbageReport.WasteType.choices
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=GarbageReport.Status.choices
+    )
+    created = models.IntegerField(default=0)
+    assigned = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    rejected = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-date']
+        verbose_name_plural = 'report daily stats'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'waste_type', 'status'],
+                name='unique_report_daily_stats'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} - {self.waste_type} - {self.status}"
+
+
+class ReportChange(models.Model):
+    """
+    Append-only change log backing the mobile sync feeds.
+    
+    One row is written per affected user (reporter, current and previous
+    collector) whenever a report or one of its updates changes. The
+    auto-increment id is the monotonic change sequence that sync cursors
+    point into.
+    """
+    
+    class Kind(models.TextChoices):
+        REPORT = 'report', 'Report'
+        UPDATE = 'update', 'Report Update'
+    
+    class Action(models.TextChoices):
+        UPSERT = 'upsert', 'Created or Changed'
+        REMOVE = 'remove', 'Removed'
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_index=False
+    )
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    action = models.CharField(max_length=10, choices=Action.choices)
+    report_id = models.BigIntegerField()
+    object_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['user', 'id'], name='report_change_user_seq_idx'),
+        ]
+    
+    def __str__(self):
+        return f"#{self.id} {self.kind} {self.object_id} {self.action}"
+
+
+class SyncOperation(models.Model):
+    """
+    Offline operation replayed by a mobile app, kept so retries are no-ops.
+    
+    Apps tag every queued operation with a key of their choosing; a replayed
+    key is answered from this row instead of being applied again.
+    """
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_index=False
+    )
+    key = models.CharField(max_length=64)
+    report_id = models.BigIntegerField()
+    status = models.CharField(
+        max_length=20,
+        choices=GarbageReport.Status.choices
+    )
+    applied = models.BooleanField()
+    error = models.CharField(max_length=255, blank=True)
+    client_timestamp = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='sync_operation_user_key_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.key} {self.status} #{self.report_id}"
+
+
+class ReportImport(models.Model):
+    """
+    A bulk report import and its resume checkpoint.
+    
+    ``rows_read`` counts the input rows handled by committed chunks; it is
+    updated in the same transaction as each chunk's reports, so an
+    interrupted import resumes exactly after the last committed chunk when
+    given the same input again.
+    """
+    
+    class Status(models.TextChoices):
+        RUNNING = 'running', 'Running'
+        COMPLETED = 'completed', 'Completed'
+        FAILED = 'failed', 'Failed'
+    
+    source = models.CharField(max_length=255, blank=True)
+    format = models.CharField(max_length=10)
+    reported_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    started_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.RUNNING
+    )
+    rows_read = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    # First rows that failed validation, as {row, errors}
+    row_errors = models.JSONField(default=list, blank=True)
+    # Why the import stopped, if it failed
+    last_error = models.TextField(blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-started_at']
+    
+    def __str__(self):
+        return f"Import #{self.id} {self.source} ({self.status})"
@@ -0,0 +1,56 @@
+"""
+Query budgets for report endpoints.
+
+Report endpoints must load their relations with a fixed number of queries,
+however many reports are on the page. ``ENDPOINT_QUERY_BUDGETS`` records
+the allowed count per URL name. ``assert_query_budget`` checks a block of
+code against a budget and can be used from tests::
+
+    with assert_query_budget(3, 'citizen-reports'):
+        client.get(url)
+
+``python manage.py check_query_budgets`` measures every endpoint listed
+here at two page sizes and fails if a count grows with the page or goes
+over its budget.
+"""
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Queries per request, with the user already authenticated. Citizen and
+# collector reads include one ETag validator query
+ENDPOINT_QUERY_BUDGETS = {
+    'citizen-reports': 4,
+    'citizen-report-detail': 3,
+    'citizen-sync': 3,
+    'collector-tasks': 4,
+    'collector-task-detail': 3,
+    'collector-sync': 3,
+    'admin-reports': 3,
+    'admin-report-detail': 3,
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block runs more queries than its budget."""
+
+
+@contextmanager
+def assert_query_budget(budget, label=''):
+    """
+    Fail if the wrapped block runs more than ``budget`` queries.
+
+    Yields:
+        CaptureQueriesContext: The captured queries, for reporting
+
+    Raises:
+        QueryBudgetExceeded: If the budget is exceeded
+    """
+    with CaptureQueriesContext(connection) as captured:
+        yield captured
+    if len(captured) > budget:
+        queries = '\n'.join(query['sql'] for query in captured.captured_queries)
+        raise QueryBudgetExceeded(
+            f'{label or "Block"} ran {len(captured)} queries (budget {budget}):\n{queries}'
+        )
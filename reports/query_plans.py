@@ -0,0 +1,115 @@
+"""
+Index checks for the hot report queries.
+
+``HOT_QUERIES`` rebuilds the queries behind the busiest endpoints from a
+seeded dataset. ``explain_scans`` reads the database's plan for a queryset
+and reports the indexes it uses and the tables it reads in full.
+
+``python manage.py check_query_plans`` seeds a large dataset and fails if
+any hot query reads a whole table.
+"""
+import json
+import re
+
+from django.db import connections
+from django.db.models import Count, Max
+from django.db.models.functions import Trunc
+
+from .assignment import OPEN_TASK_STATUSES
+from .filters import filter_reports
+from .models import GarbageReport, ReportUpdate
+
+# Rows fetched by a keyset page (page size plus one)
+PAGE_ROWS = 21
+
+# SQLite plan lines: "SCAN t", "SCAN t USING INDEX i", "SEARCH t USING INDEX i (...)"
+SQLITE_SCAN_RE = re.compile(r'^(SCAN|SEARCH) (\S+)(?: USING (?:COVERING )?INDEX (\S+))?')
+
+# Label -> queryset built from the seed (see check_query_plans)
+HOT_QUERIES = {
+    'citizen-reports': lambda seed: GarbageReport.objects.filter(
+        reported_by=seed['citizen']
+    ).order_by('-created_at', '-id')[:PAGE_ROWS],
+    'collector-tasks': lambda seed: GarbageReport.objects.filter(
+        assigned_to=seed['collector']
+    ).order_by('-created_at', '-id')[:PAGE_ROWS],
+    'citizen-validator': lambda seed: GarbageReport.objects.filter(
+        reported_by=seed['citizen']
+    ).values('reported_by').annotate(last_modified=Max('updated_at'), count=Count('id')).order_by(),
+    'collector-validator': lambda seed: GarbageReport.objects.filter(
+        assigned_to=seed['collector']
+    ).values('assigned_to').annotate(last_modified=Max('updated_at'), count=Count('id')).order_by(),
+    'collector-route': lambda seed: GarbageReport.objects.filter(
+        assigned_to=seed['collector'],
+        status__in=['assigned', 'in_progress']
+    ).order_by('id'),
+    'collector-loads': lambda seed: GarbageReport.objects.filter(
+        assigned_to__in=seed['collectors'],
+        status__in=OPEN_TASK_STATUSES
+    ).values('assigned_to').annotate(count=Count('id')).order_by(),
+    'admin-reports-status': lambda seed: filter_reports(
+        GarbageReport.objects.all(), {'status': 'pending'}
+    ).order_by('-created_at', '-id')[:PAGE_ROWS],
+    'admin-reports-dates': lambda seed: filter_reports(
+        GarbageReport.objects.all(),
+        {'date_from': seed['week_from'], 'date_to': seed['today']}
+    ).order_by(),
+    'auto-assign-queue': lambda seed: GarbageReport.objects.filter(
+        status=GarbageReport.Status.PENDING
+    ).order_by('created_at', 'id')[:PAGE_ROWS],
+    'completed-series': lambda seed: GarbageReport.objects.filter(
+        status='completed',
+        completed_at__gte=seed['week'][0],
+        completed_at__lt=seed['week'][1]
+    ).annotate(
+        bucket=Trunc('completed_at', 'hour')
+    ).values('bucket').annotate(count=Count('id')).order_by('bucket'),
+    'report-history': lambda seed: ReportUpdate.objects.filter(
+        report__in=seed['report_ids']
+    ).order_by('-created_at'),
+}
+
+
+def _pg_scans(node, full_scans, indexes):
+    if node['Node Type'] == 'Seq Scan':
+        full_scans.add(node['Relation Name'])
+    if 'Index Name' in node:
+        indexes.append(node['Index Name'])
+    for child in node.get('Plans', []):
+        _pg_scans(child, full_scans, indexes)
+
+
+def explain_scans(queryset):
+    """
+    Tables read in full and indexes used by a queryset's plan.
+
+    Returns:
+        tuple: (set of fully scanned tables, list of index names)
+
+    Raises:
+        NotImplementedError: On databases other than PostgreSQL and SQLite
+    """
+    connection = connections[queryset.db]
+    sql, params = queryset.query.sql_with_params()
+    full_scans, indexes = set(), []
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            _pg_scans(plan[0]['Plan'], full_scans, indexes)
+        elif connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            for row in cursor.fetchall():
+                match = SQLITE_SCAN_RE.match(row[3])
+                if not match:
+                    continue
+                operation, table, index = match.groups()
+                if index:
+                    indexes.append(index)
+                elif operation == 'SCAN':
+                    full_scans.add(table)
+        else:
+            raise NotImplementedError(f'Cannot read {connection.vendor} query plans')
+    return full_scans, indexes
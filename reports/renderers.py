@@ -0,0 +1,15 @@
+"""
+Renderers for alternative report payload shapes.
+"""
+from rest_framework.renderers import JSONRenderer
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """
+    JSON renderer selected with ``?format=columnar``.
+
+    Views check ``request.accepted_renderer.format`` and build parallel
+    arrays instead of one object per row.
+    """
+
+    format = 'columnar'
@@ -0,0 +1,139 @@
+"""
+Per-user response cache for the citizen and collector report endpoints.
+
+Rendered responses are cached under the user's current version number,
+the absolute URL and the renderer. Signals (and the bulk write paths) bump
+the version of every user whose view of a report changed, once the write
+commits, which orphans all of that user's entries at once. Entries also
+expire after ``RESPONSE_CACHE_SECONDS``, bounding staleness from changes
+no signal sees (such as a renamed collector nested in a report).
+
+Versions start from the clock rather than 1, so a version key that was
+evicted and recreated never revives entries cached under an old number.
+Needs a cache shared by all workers (Redis); with a per-process backend
+the cache stays off.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+KEY_PREFIX = 'report_responses'
+
+OUTCOMES = ('hits', 'misses')
+
+# URL names of the endpoints served through the cache
+CACHED_ENDPOINTS = (
+    'citizen-reports',
+    'citizen-report-detail',
+    'collector-tasks',
+    'collector-task-detail',
+)
+
+
+# Cache backends private to one process
+LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared_cache():
+    """Whether the default cache is seen by every worker."""
+    return settings.CACHES['default']['BACKEND'] not in LOCAL_BACKENDS
+
+
+def get_cache_seconds():
+    """
+    Lifetime of a cached response; 0 disables the cache.
+
+    The cache is off on a process-local backend: a version bump made by one
+    worker would not reach the stale entries held by the others.
+    """
+    if not is_shared_cache():
+        return 0
+    return getattr(settings, 'RESPONSE_CACHE_SECONDS', 300)
+
+
+def _version_key(user_id):
+    return f'{KEY_PREFIX}:version:{user_id}'
+
+
+def _stats_key(outcome, name):
+    return f'{KEY_PREFIX}:{outcome}:{name}'
+
+
+def get_version(user_id):
+    """The user's current version, starting one if there is none."""
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(user_ids):
+    for user_id in user_ids:
+        try:
+            cache.incr(_version_key(user_id))
+        except ValueError:
+            # No version yet; the next read starts a fresh one
+            pass
+
+
+def invalidate_users(user_ids):
+    """
+    Expire the cached responses of these users once the transaction commits.
+
+    Bumping before the commit would let a concurrent request cache the
+    uncommitted (old) rows under the new version.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if user_ids:
+        transaction.on_commit(lambda: _bump(user_ids))
+
+
+def response_key(request, version):
+    """Cache key for a request under the user's version."""
+    digest = hashlib.md5(
+        f'{request.build_absolute_uri()}|{request.accepted_renderer.format}'.encode(),
+        usedforsecurity=False
+    ).hexdigest()
+    return f'{KEY_PREFIX}:{request.user.pk}:{version}:{digest}'
+
+
+def record(outcome, name):
+    """Count a cache hit or miss for an endpoint."""
+    key = _stats_key(outcome, name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def get_stats(names=CACHED_ENDPOINTS):
+    """
+    Hit/miss counts per endpoint since the counters were last reset.
+
+    Returns:
+        dict: Endpoint name -> ``{hits, misses, hit_rate}``
+    """
+    counts = cache.get_many([_stats_key(outcome, name) for outcome in OUTCOMES for name in names])
+    stats = {}
+    for name in names:
+        hits = counts.get(_stats_key('hits', name), 0)
+        misses = counts.get(_stats_key('misses', name), 0)
+        stats[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+        }
+    return stats
+
+
+def reset_stats(names=CACHED_ENDPOINTS):
+    """Zero the hit/miss counters of these endpoints."""
+    cache.delete_many([_stats_key(outcome, name) for outcome in OUTCOMES for name in names])
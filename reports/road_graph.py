@@ -0,0 +1,452 @@
+"""
+Offline road graph for network distances.
+
+``build_road_graph`` turns an OSM XML extract into a directed graph of
+drivable roads (one-way streets included) and precomputes a contraction
+hierarchy over it. Every node gets a rank, and shortcut edges are added so
+that any shortest path can be found by searching only "upward" in rank from
+both ends. The result is saved as a compressed ``.npz`` file that
+``RoadGraph`` loads.
+
+Queries are many-to-many: one small upward search per origin and per
+destination, joined through per-node buckets. This is far cheaper than a
+full Dijkstra per origin.
+"""
+import heapq
+import math
+import xml.etree.ElementTree as ElementTree
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+
+# OSM highway values treated as drivable
+HIGHWAY_TYPES = {
+    'motorway', 'motorway_link', 'trunk', 'trunk_link', 'primary',
+    'primary_link', 'secondary', 'secondary_link', 'tertiary',
+    'tertiary_link', 'unclassified', 'residential', 'living_street',
+    'service', 'road',
+}
+
+ONEWAY_FORWARD = {'yes', 'true', '1'}
+ONEWAY_REVERSE = {'-1', 'reverse'}
+
+# Witness searches give up after settling this many nodes; a missed
+# witness only adds a redundant shortcut, never a wrong distance
+WITNESS_SETTLE_LIMIT = 200
+
+
+def _way_edges(refs, tags):
+    """Directed (from, to) OSM node pairs for a drivable way."""
+    if tags.get('highway') not in HIGHWAY_TYPES:
+        return []
+    if tags.get('area') == 'yes' or tags.get('access') in ('no', 'private'):
+        return []
+
+    oneway = tags.get('oneway', '').lower()
+    if oneway in ONEWAY_REVERSE:
+        refs = refs[::-1]
+    forward_only = (
+        oneway in ONEWAY_FORWARD or oneway in ONEWAY_REVERSE
+        or tags.get('junction') == 'roundabout'
+        or (tags.get('highway') == 'motorway' and oneway != 'no')
+    )
+
+    edges = []
+    for a, b in zip(refs, refs[1:]):
+        edges.append((a, b))
+        if not forward_only:
+            edges.append((b, a))
+    return edges
+
+
+def parse_osm(path):
+    """
+    Read drivable road segments from an OSM XML extract.
+
+    Returns:
+        tuple: (latitudes, longitudes, sources, targets) as NumPy arrays,
+        with node indexes into the coordinate arrays
+    """
+    coords = {}
+    pairs = []
+    refs = []
+    tags = {}
+    for _, element in ElementTree.iterparse(path, events=('end',)):
+        if element.tag == 'node':
+            coords[element.get('id')] = (float(element.get('lat')), float(element.get('lon')))
+            element.clear()
+        elif element.tag == 'nd':
+            refs.append(element.get('ref'))
+        elif element.tag == 'tag':
+            tags[element.get('k')] = element.get('v')
+        elif element.tag == 'way':
+            pairs += _way_edges(refs, tags)
+            refs, tags = [], {}
+            element.clear()
+        elif element.tag == 'relation':
+            refs, tags = [], {}
+            element.clear()
+
+    index = {}
+    sources, targets = [], []
+    for a, b in pairs:
+        if a not in coords or b not in coords or a == b:
+            continue
+        sources.append(index.setdefault(a, len(index)))
+        targets.append(index.setdefault(b, len(index)))
+
+    latitudes = np.empty(len(index))
+    longitudes = np.empty(len(index))
+    for osm_id, node in index.items():
+        latitudes[node], longitudes[node] = coords[osm_id]
+    return latitudes, longitudes, np.array(sources, dtype=np.int64), np.array(targets, dtype=np.int64)
+
+
+def segment_lengths(latitudes, longitudes, sources, targets):
+    """Great-circle length in metres of each edge."""
+    lat1, lng1 = np.radians(latitudes[sources]), np.radians(longitudes[sources])
+    lat2, lng2 = np.radians(latitudes[targets]), np.radians(longitudes[targets])
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _csr(count, sources, targets, weights=None):
+    """Compressed adjacency arrays (indptr, indices, weights) by source."""
+    order = np.argsort(sources, kind='stable')
+    indptr = np.zeros(count + 1, dtype=np.int64)
+    np.add.at(indptr, sources + 1, 1)
+    indptr = np.cumsum(indptr)
+    return indptr, targets[order], None if weights is None else weights[order]
+
+
+def largest_component(count, sources, targets):
+    """
+    Nodes of the largest strongly connected component (Kosaraju).
+
+    Keeping only this component guarantees every snapped origin can reach
+    every snapped destination.
+    """
+    forward = _csr(count, sources, targets)
+    backward = _csr(count, targets, sources)
+
+    visited = np.zeros(count, dtype=bool)
+    finish_order = []
+    for root in range(count):
+        if visited[root]:
+            continue
+        visited[root] = True
+        stack = [(root, forward[0][root])]
+        while stack:
+            node, position = stack[-1]
+            if position < forward[0][node + 1]:
+                stack[-1] = (node, position + 1)
+                nxt = forward[1][position]
+                if not visited[nxt]:
+                    visited[nxt] = True
+                    stack.append((nxt, forward[0][nxt]))
+            else:
+                stack.pop()
+                finish_order.append(node)
+
+    component = np.full(count, -1)
+    sizes = []
+    for root in reversed(finish_order):
+        if component[root] >= 0:
+            continue
+        label = len(sizes)
+        component[root] = label
+        stack = [root]
+        size = 0
+        while stack:
+            node = stack.pop()
+            size += 1
+            for nxt in backward[1][backward[0][node]:backward[0][node + 1]]:
+                if component[nxt] < 0:
+                    component[nxt] = label
+                    stack.append(nxt)
+        sizes.append(size)
+    return np.flatnonzero(component == int(np.argmax(sizes)))
+
+
+def _witness_search(out, source, skip, limit):
+    """Bounded Dijkstra from ``source`` that ignores node ``skip``."""
+    dist = {source: 0.0}
+    heap = [(0.0, source)]
+    settled = 0
+    while heap and settled < WITNESS_SETTLE_LIMIT:
+        d, node = heapq.heappop(heap)
+        if d > dist.get(node, math.inf):
+            continue
+        if d > limit:
+            break
+        settled += 1
+        for nxt, weight in out[node].items():
+            if nxt == skip:
+                continue
+            nd = d + weight
+            if nd < dist.get(nxt, math.inf):
+                dist[nxt] = nd
+                heapq.heappush(heap, (nd, nxt))
+    return dist
+
+
+def _shortcuts(out, inn, node):
+    """Shortcuts needed to contract ``node`` with witness searches."""
+    shortcuts = []
+    targets = out[node]
+    if not targets:
+        return shortcuts
+    max_out = max(targets.values())
+    for source, w_in in inn[node].items():
+        dist = _witness_search(out, source, node, w_in + max_out)
+        for target, w_out in targets.items():
+            if target == source:
+                continue
+            via = w_in + w_out
+            if dist.get(target, math.inf) > via:
+                shortcuts.append((source, target, via))
+    return shortcuts
+
+
+def contract(count, sources, targets, weights, progress=None):
+    """
+    Build a contraction hierarchy.
+
+    Nodes are contracted in order of edge difference (shortcuts added minus
+    edges removed) plus contracted neighbours, re-evaluated lazily.
+
+    Returns:
+        tuple: (rank, upward forward edges, upward backward edges), each
+        edge list as (sources, targets, weights) arrays
+    """
+    out = [dict() for _ in range(count)]
+    inn = [dict() for _ in range(count)]
+    for u, v, w in zip(sources.tolist(), targets.tolist(), weights.tolist()):
+        if w < out[u].get(v, math.inf):
+            out[u][v] = w
+            inn[v][u] = w
+
+    deleted_neighbours = [0] * count
+
+    def priority(node):
+        added = len(_shortcuts(out, inn, node))
+        return added - len(out[node]) - len(inn[node]) + deleted_neighbours[node]
+
+    heap = [(priority(node), node) for node in range(count)]
+    heapq.heapify(heap)
+    rank = np.empty(count, dtype=np.int64)
+    up_forward = ([], [], [])
+    up_backward = ([], [], [])
+
+    for order in range(count):
+        while True:
+            _, node = heapq.heappop(heap)
+            current = priority(node)
+            if not heap or current <= heap[0][0]:
+                break
+            heapq.heappush(heap, (current, node))
+
+        rank[node] = order
+        for target, weight in out[node].items():
+            up_forward[0].append(node)
+            up_forward[1].append(target)
+            up_forward[2].append(weight)
+        for source, weight in inn[node].items():
+            up_backward[0].append(node)
+            up_backward[1].append(source)
+            up_backward[2].append(weight)
+
+        for source, target, weight in _shortcuts(out, inn, node):
+            if weight < out[source].get(target, math.inf):
+                out[source][target] = weight
+                inn[target][source] = weight
+        for target in out[node]:
+            del inn[target][node]
+            deleted_neighbours[target] += 1
+        for source in inn[node]:
+            del out[source][node]
+            deleted_neighbours[source] += 1
+        out[node] = {}
+        inn[node] = {}
+
+        if progress and order % 1000 == 0:
+            progress(order, count)
+
+    def arrays(edges):
+        return (
+            np.array(edges[0], dtype=np.int64),
+            np.array(edges[1], dtype=np.int64),
+            np.array(edges[2], dtype=float),
+        )
+    return rank, arrays(up_forward), arrays(up_backward)
+
+
+def build_road_graph(osm_path, output_path, progress=None):
+    """
+    Parse an OSM extract, contract it and save it for RoadGraph.
+
+    Returns:
+        dict: Node, edge and shortcut counts
+    """
+    latitudes, longitudes, sources, targets = parse_osm(osm_path)
+    keep = largest_component(len(latitudes), sources, targets)
+    remap = np.full(len(latitudes), -1)
+    remap[keep] = np.arange(len(keep))
+    mask = (remap[sources] >= 0) & (remap[targets] >= 0)
+    sources, targets = remap[sources[mask]], remap[targets[mask]]
+    latitudes, longitudes = latitudes[keep], longitudes[keep]
+    weights = segment_lengths(latitudes, longitudes, sources, targets)
+
+    rank, forward, backward = contract(len(keep), sources, targets, weights, progress)
+    forward_csr = _csr(len(keep), *forward)
+    backward_csr = _csr(len(keep), *backward)
+    np.savez_compressed(
+        output_path,
+        latitudes=latitudes,
+        longitudes=longitudes,
+        rank=rank,
+        forward_indptr=forward_csr[0],
+        forward_indices=forward_csr[1],
+        forward_weights=forward_csr[2],
+        backward_indptr=backward_csr[0],
+        backward_indices=backward_csr[1],
+        backward_weights=backward_csr[2],
+    )
+    return {
+        'nodes': len(keep),
+        'edges': len(sources),
+        'hierarchy_edges': len(forward[0]) + len(backward[0]),
+    }
+
+
+class RoadGraph:
+    """A contracted road graph loaded from ``build_road_graph`` output."""
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            self.latitudes = data['latitudes']
+            self.longitudes = data['longitudes']
+            # Plain lists: the searches index one element at a time, which is
+            # several times faster on lists than on NumPy arrays
+            self.forward = tuple(
+                data[f'forward_{name}'].tolist() for name in ('indptr', 'indices', 'weights')
+            )
+            self.backward = tuple(
+                data[f'backward_{name}'].tolist() for name in ('indptr', 'indices', 'weights')
+            )
+        self._lat_order = np.argsort(self.latitudes)
+        self._sorted_lats = self.latitudes[self._lat_order]
+
+    def __len__(self):
+        return len(self.latitudes)
+
+    def snap(self, latitude, longitude, max_distance_m):
+        """
+        Nearest graph node to a point.
+
+        Returns:
+            tuple: (node, distance in metres), or (None, None) when no node
+            is within ``max_distance_m``
+        """
+        band = max_distance_m / 111320.0
+        lo = np.searchsorted(self._sorted_lats, latitude - band)
+        hi = np.searchsorted(self._sorted_lats, latitude + band, side='right')
+        if lo == hi:
+            return None, None
+        candidates = self._lat_order[lo:hi]
+        dy = (self.latitudes[candidates] - latitude) * 111320.0
+        dx = (self.longitudes[candidates] - longitude) * 111320.0 * math.cos(math.radians(latitude))
+        distances = dx * dx + dy * dy
+        best = int(np.argmin(distances))
+        distance = math.sqrt(distances[best])
+        if distance > max_distance_m:
+            return None, None
+        return int(candidates[best]), distance
+
+    def upward_search(self, node, backward=False):
+        """
+        Distances to every node reachable upward in the hierarchy.
+
+        Uses stall-on-demand: a node that is provably reached more cheaply
+        through a higher-ranked neighbour is not expanded or returned, since
+        no shortest path meets there.
+
+        Returns:
+            tuple: (nodes, distances) arrays
+        """
+        indptr, indices, weights = self.backward if backward else self.forward
+        stall_indptr, stall_indices, stall_weights = self.forward if backward else self.backward
+        dist = {node: 0.0}
+        heap = [(0.0, node)]
+        settled = {}
+        seen = set()
+        inf = math.inf
+        pop, push, get = heapq.heappop, heapq.heappush, dist.get
+        while heap:
+            d, current = pop(heap)
+            if current in seen:
+                continue
+            seen.add(current)
+            stalled = False
+            for position in range(stall_indptr[current], stall_indptr[current + 1]):
+                if get(stall_indices[position], inf) + stall_weights[position] < d:
+                    stalled = True
+                    break
+            if stalled:
+                continue
+            settled[current] = d
+            for position in range(indptr[current], indptr[current + 1]):
+                nxt = indices[position]
+                nd = d + weights[position]
+                if nd < get(nxt, inf):
+                    dist[nxt] = nd
+                    push(heap, (nd, nxt))
+        return np.fromiter(settled.keys(), dtype=np.int64), np.fromiter(settled.values(), dtype=float)
+
+    def matrix(self, sources, targets, search=None):
+        """
+        Shortest path distances from each source node to each target node.
+
+        Args:
+            sources, targets: Graph node indexes
+            search: Optional ``search(node, backward)`` returning
+                ``upward_search`` results, e.g. a cached wrapper
+
+        Returns:
+            numpy.ndarray: (len(sources), len(targets)) distances in metres
+        """
+        search = search or self.upward_search
+        result = np.full((len(sources), len(targets)), np.inf)
+        if not len(sources) or not len(targets):
+            return result
+
+        # Buckets: every (node, target column, distance) from the backward
+        # searches, grouped by node
+        spaces = [search(target, True) for target in targets]
+        nodes = np.concatenate([space[0] for space in spaces])
+        columns = np.repeat(np.arange(len(targets)), [len(space[0]) for space in spaces])
+        dists = np.concatenate([space[1] for space in spaces])
+        order = np.argsort(nodes, kind='stable')
+        nodes, columns, dists = nodes[order], columns[order], dists[order]
+        bucket_nodes, bucket_starts, bucket_sizes = np.unique(
+            nodes, return_index=True, return_counts=True
+        )
+
+        for row, source in enumerate(sources):
+            meeting, meeting_dists = search(source, False)
+            positions = np.searchsorted(bucket_nodes, meeting)
+            positions = np.minimum(positions, len(bucket_nodes) - 1)
+            found = bucket_nodes[positions] == meeting
+            positions, meeting_dists = positions[found], meeting_dists[found]
+            if not len(positions):
+                continue
+            # Expand each meeting node into its bucket entries
+            sizes = bucket_sizes[positions]
+            offsets = np.repeat(bucket_starts[positions] - np.cumsum(sizes) + sizes, sizes)
+            entries = np.arange(sizes.sum()) + offsets
+            np.minimum.at(
+                result[row], columns[entries], dists[entries] + np.repeat(meeting_dists, sizes)
+            )
+        return result
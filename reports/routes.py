@@ -0,0 +1,228 @@
+"""
+Collection route optimisation.
+
+Routes are open paths: they start at the collector's position and end at
+the last stop. A nearest-neighbour tour (the same heuristic the collector
+app used on-device) is refined with 2-opt and Or-opt moves to a local
+optimum, then perturbed with double-bridge kicks and refined again
+(iterated local search) until the time budget runs out or kicks stop
+helping. Every move is evaluated for all candidate positions at once with
+NumPy, and the move deltas do not assume a symmetric matrix, so one-way
+street distances from the road network provider work too.
+"""
+import time
+
+import numpy as np
+from django.conf import settings
+
+from .distances import get_distance_provider
+
+# Improvements smaller than this (in metres) are treated as noise
+MIN_IMPROVEMENT_M = 1e-6
+
+MAX_ROUTE_STOPS = 500
+
+# Stop perturbing after this many kicks in a row (at most, and per stop)
+# fail to improve the route
+MAX_STALE_KICKS = 50
+STALE_KICKS_PER_STOP = 2
+
+
+def get_time_budget_ms():
+    """Default time budget for route refinement."""
+    return getattr(settings, 'ROUTE_TIME_BUDGET_MS', 300)
+
+
+def get_average_speed_kmh():
+    """Average travel speed used for ETAs."""
+    return getattr(settings, 'ROUTE_AVERAGE_SPEED_KMH', 20)
+
+
+def get_service_minutes():
+    """Minutes spent collecting at each stop, for ETAs."""
+    return getattr(settings, 'ROUTE_SERVICE_MINUTES', 5)
+
+
+def nearest_neighbour(matrix):
+    """
+    Greedy route from node 0 that always visits the closest unvisited node.
+
+    Returns:
+        numpy.ndarray: Node order, starting with 0
+    """
+    n = len(matrix)
+    route = np.empty(n, dtype=np.intp)
+    route[0] = 0
+    visited = np.zeros(n, dtype=bool)
+    visited[0] = True
+    for step in range(1, n):
+        distances = np.where(visited, np.inf, matrix[route[step - 1]])
+        route[step] = int(np.argmin(distances))
+        visited[route[step]] = True
+    return route
+
+
+def route_length(matrix, route):
+    """Total length of an open route."""
+    route = np.asarray(route)
+    return float(matrix[route[:-1], route[1:]].sum())
+
+
+def _with_free_end(matrix):
+    """Add a virtual end node at zero distance from everything."""
+    n = len(matrix)
+    padded = np.zeros((n + 1, n + 1))
+    padded[:n, :n] = matrix
+    return padded
+
+
+def _two_opt_pass(matrix, route, deadline):
+    """
+    One sweep of 2-opt moves (segment reversals); both ends stay fixed.
+
+    Returns:
+        bool: Whether any move was applied
+    """
+    improved = False
+    last = len(route) - 1
+    for i in range(1, last - 1):
+        if time.perf_counter() > deadline:
+            break
+        # Change in the cost of traversing each edge backwards, so
+        # asymmetric matrices price the reversed segment correctly
+        forward = matrix[route[:-1], route[1:]]
+        backward = matrix[route[1:], route[:-1]]
+        reverse_cost = np.concatenate(([0.0], np.cumsum(backward - forward)))
+
+        a, b = route[i - 1], route[i]
+        j = np.arange(i + 1, last)
+        c, d = route[j], route[j + 1]
+        delta = (matrix[a, c] + matrix[b, d] - matrix[a, b] - matrix[c, d]
+                 + reverse_cost[j] - reverse_cost[i])
+        best = int(np.argmin(delta))
+        if delta[best] < -MIN_IMPROVEMENT_M:
+            end = j[best]
+            route[i:end + 1] = route[i:end + 1][::-1]
+            improved = True
+    return improved
+
+
+def _or_opt_pass(matrix, route, deadline, max_segment=3):
+    """
+    One sweep of Or-opt moves (relocating runs of 1-3 consecutive stops).
+
+    Returns:
+        numpy.ndarray: The route, possibly rearranged
+        bool: Whether any move was applied
+    """
+    improved = False
+    for length in range(1, max_segment + 1):
+        i = 1
+        while i + length < len(route):
+            if time.perf_counter() > deadline:
+                return route, improved
+            first, last = route[i], route[i + length - 1]
+            prev, nxt = route[i - 1], route[i + length]
+            removal_gain = (matrix[prev, first] + matrix[last, nxt]
+                            - matrix[prev, nxt])
+
+            # Insert between rest[j] and rest[j + 1]
+            rest = np.concatenate((route[:i], route[i + length:]))
+            left, right = rest[:-1], rest[1:]
+            insertion = matrix[left, first] + matrix[last, right] - matrix[left, right]
+            insertion[i - 1] = np.inf
+            best = int(np.argmin(insertion))
+            if insertion[best] - removal_gain < -MIN_IMPROVEMENT_M:
+                segment = route[i:i + length]
+                route = np.concatenate((rest[:best + 1], segment, rest[best + 1:]))
+                improved = True
+            else:
+                i += 1
+    return route, improved
+
+
+def _local_search(matrix, route, deadline):
+    """Apply 2-opt and Or-opt sweeps until neither improves the route."""
+    while time.perf_counter() < deadline:
+        improved = _two_opt_pass(matrix, route, deadline)
+        route, moved = _or_opt_pass(matrix, route, deadline)
+        if not (improved or moved):
+            break
+    return route
+
+
+def _double_bridge(route, rng):
+    """Swap two random interior segments; both ends stay fixed."""
+    cuts = np.sort(rng.choice(np.arange(2, len(route) - 1), size=2, replace=False))
+    start = rng.integers(1, cuts[0])
+    return np.concatenate((
+        route[:start], route[cuts[0]:cuts[1]], route[start:cuts[0]], route[cuts[1]:]
+    ))
+
+
+def improve_route(matrix, route, time_budget_ms=None):
+    """
+    Refine an open route with iterated 2-opt / Or-opt local search.
+
+    Args:
+        matrix: (n, n) distance matrix
+        route: Initial order starting at node 0
+        time_budget_ms: Stop refining after this long
+
+    Returns:
+        numpy.ndarray: Improved node order starting at node 0
+    """
+    if time_budget_ms is None:
+        time_budget_ms = get_time_budget_ms()
+    deadline = time.perf_counter() + time_budget_ms / 1000
+    if len(route) < 4:
+        return np.asarray(route)
+
+    padded = _with_free_end(matrix)
+    best = _local_search(
+        padded, np.append(np.asarray(route, dtype=np.intp), len(matrix)), deadline
+    )
+    best_length = route_length(padded, best)
+
+    # Fixed seed so the same request always gets the same route
+    rng = np.random.default_rng(0)
+    max_stale = min(MAX_STALE_KICKS, STALE_KICKS_PER_STOP * len(matrix))
+    stale = 0
+    while len(best) > 4 and stale < max_stale and time.perf_counter() < deadline:
+        candidate = _local_search(padded, _double_bridge(best, rng), deadline)
+        length = route_length(padded, candidate)
+        if length < best_length - MIN_IMPROVEMENT_M:
+            best, best_length = candidate, length
+            stale = 0
+        else:
+            stale += 1
+    return best[:-1]
+
+
+def optimize_route(start, stops, time_budget_ms=None, matrix=None):
+    """
+    Order stops for a collector starting at ``start``.
+
+    Args:
+        start: (latitude, longitude) of the collector
+        stops: Sequence of (latitude, longitude) stops
+        time_budget_ms: Refinement time budget
+        matrix: Precomputed (n + 1, n + 1) distance matrix with the start
+            as node 0; the configured distance provider is used when omitted
+
+    Returns:
+        dict: ``order`` (indexes into ``stops``), ``legs_m`` (distance
+        of each leg, in visit order), ``total_distance_m`` and
+        ``greedy_distance_m`` (the nearest-neighbour baseline)
+    """
+    if matrix is None:
+        matrix = get_distance_provider().matrix([start, *stops])
+    greedy = nearest_neighbour(matrix)
+    route = improve_route(matrix, greedy.copy(), time_budget_ms)
+    legs = matrix[route[:-1], route[1:]]
+    return {
+        'order': [int(node) - 1 for node in route[1:]],
+        'legs_m': legs.tolist(),
+        'total_distance_m': float(legs.sum()),
+        'greedy_distance_m': route_length(matrix, greedy),
+    }
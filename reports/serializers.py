@@ -1,6 +1,10 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import GarbageReport, ReportUpdate
+from django.db.models import Prefetch
+from .models import GarbageReport, ReportImport, ReportUpdate
+from .duplicates import distance_m, duplicates_of_report
+from .routes import MAX_ROUTE_STOPS
+from .transitions import MAX_BULK_STATUS_ITEMS, MAX_SYNC_OPERATIONS
 
 User = get_user_model()
 
@@ -24,9 +28,44 @@ class ReportUpdateSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'updated_by', 'created_at']
 
 
-class GarbageReportSerializer(serializers.ModelSerializer):
+# Relations nested in full only when expanded
+REPORT_EXPANDABLE = ('updates', 'reported_by', 'assigned_to')
+
+
+class ExpandableFieldsMixin:
+    """
+    Per-request field selection for a model serializer.
+    
+    ``context['fields']`` limits the output to the named fields.
+    ``context['expand']`` names the ``expandable_fields`` to nest in full;
+    the others are sent as ids (foreign keys) or left out (to-many). Without
+    ``expand`` in the context every expandable field is nested.
+    """
+    
+    expandable_fields = ()
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        expand = self.context.get('expand')
+        if expand is not None:
+            for name in self.expandable_fields:
+                if name in expand or name not in fields:
+                    continue
+                if getattr(fields[name], 'many', False):
+                    del fields[name]
+                else:
+                    fields[name] = serializers.PrimaryKeyRelatedField(read_only=True)
+        requested = self.context.get('fields')
+        if requested is not None:
+            fields = {name: field for name, field in fields.items() if name in requested}
+        return fields
+
+
+class GarbageReportSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     """Serializer for garbage reports."""
     
+    expandable_fields = REPORT_EXPANDABLE
+    
     reported_by = ReportUserSerializer(read_only=True)
     assigned_to = ReportUserSerializer(read_only=True)
     updates = ReportUpdateSerializer(many=True, read_only=True)
@@ -45,6 +84,69 @@ class GarbageReportSerializer(serializers.ModelSerializer):
         ]
 
 
+def prefetch_report_relations(queryset, expand=None):
+    """
+    Load what GarbageReportSerializer nests with a fixed number of queries.
+
+    Users are joined in; the update history (newest first, with its users)
+    is fetched in one extra query for the whole page. ``expand`` limits
+    this to the named relations (default all of REPORT_EXPANDABLE).
+    """
+    expand = REPORT_EXPANDABLE if expand is None else expand
+    users = [name for name in ('reported_by', 'assigned_to') if name in expand]
+    if users:
+        queryset = queryset.select_related(*users)
+    if 'updates' in expand:
+        queryset = queryset.prefetch_related(
+            Prefetch('updates', queryset=ReportUpdate.objects.select_related('updated_by'))
+        )
+    return queryset
+
+
+class DuplicateCandidateSerializer(serializers.ModelSerializer):
+    """Nearby open report that may describe the same pile."""
+    
+    distance_m = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = GarbageReport
+        fields = [
+            'id', 'title', 'waste_type', 'status',
+            'latitude', 'longitude', 'address', 'image',
+            'created_at', 'distance_m'
+        ]
+    
+    def get_distance_m(self, obj):
+        return distance_m(obj)
+
+
+class AdminReportDetailSerializer(GarbageReportSerializer):
+    """Report detail for admins, with merge state and duplicate candidates."""
+    
+    possible_duplicates = serializers.SerializerMethodField()
+    
+    class Meta(GarbageReportSerializer.Meta):
+        fields = GarbageReportSerializer.Meta.fields + ['duplicate_of', 'possible_duplicates']
+        read_only_fields = GarbageReportSerializer.Meta.read_only_fields + ['duplicate_of']
+    
+    def get_possible_duplicates(self, obj):
+        if obj.duplicate_of_id:
+            return []
+        return DuplicateCandidateSerializer(
+            duplicates_of_report(obj), many=True, context=self.context
+        ).data
+
+
+class MergeReportsSerializer(serializers.Serializer):
+    """Serializer for merging duplicate reports into one."""
+    
+    duplicate_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False
+    )
+    note = serializers.CharField(required=False, allow_blank=True)
+
+
 class GarbageReportCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating garbage reports."""
     
@@ -58,6 +160,47 @@ class GarbageReportCreateSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'status', 'created_at', 'updated_at']
 
 
+class ReportImportRowSerializer(serializers.ModelSerializer):
+    """
+    One row of a bulk report import.
+    
+    Imported reports have no collector, so they can only be open
+    (``pending``) or closed. ``image`` is the storage path of an
+    already-uploaded file, if any; ``created_at`` keeps legacy dates.
+    """
+    
+    image = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    status = serializers.ChoiceField(
+        choices=[
+            GarbageReport.Status.PENDING,
+            GarbageReport.Status.COMPLETED,
+            GarbageReport.Status.REJECTED,
+        ],
+        default=GarbageReport.Status.PENDING
+    )
+    created_at = serializers.DateTimeField(required=False)
+    
+    class Meta:
+        model = GarbageReport
+        fields = [
+            'title', 'description', 'waste_type',
+            'latitude', 'longitude', 'address', 'image',
+            'status', 'created_at', 'completed_at'
+        ]
+
+
+class ReportImportSerializer(serializers.ModelSerializer):
+    """Progress of a bulk report import."""
+    
+    class Meta:
+        model = ReportImport
+        fields = [
+            'id', 'source', 'format', 'reported_by', 'started_by', 'status',
+            'rows_read', 'created', 'failed', 'row_errors', 'last_error',
+            'started_at', 'updated_at', 'finished_at'
+        ]
+
+
 class AssignCollectorSerializer(serializers.Serializer):
     """Serializer for assigning a collector to a report."""
     
@@ -82,6 +225,61 @@ class UpdateStatusSerializer(serializers.Serializer):
     note = serializers.CharField(required=False, allow_blank=True)
 
 
+class BulkStatusItemSerializer(UpdateStatusSerializer):
+    """One report in a bulk status update."""
+    
+    id = serializers.IntegerField()
+
+
+class BulkStatusUpdateSerializer(serializers.Serializer):
+    """Serializer for bulk status updates."""
+    
+    items = BulkStatusItemSerializer(many=True, allow_empty=False, max_length=MAX_BULK_STATUS_ITEMS)
+
+
+class SyncOperationSerializer(BulkStatusItemSerializer):
+    """A status change queued by the collector app while offline."""
+    
+    key = serializers.CharField(max_length=64)
+    client_timestamp = serializers.DateTimeField()
+
+
+class SyncOperationBatchSerializer(serializers.Serializer):
+    """Serializer for a batch of replayed offline operations."""
+    
+    operations = SyncOperationSerializer(many=True, allow_empty=False, max_length=MAX_SYNC_OPERATIONS)
+
+
+class RouteRequestSerializer(serializers.Serializer):
+    """Serializer for collector route optimisation requests."""
+    
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+    task_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        max_length=MAX_ROUTE_STOPS
+    )
+    time_budget_ms = serializers.IntegerField(
+        required=False,
+        min_value=10,
+        max_value=5000
+    )
+
+
+class AutoAssignSerializer(serializers.Serializer):
+    """Serializer for batch auto-assignment requests."""
+    
+    dry_run = serializers.BooleanField(default=False)
+    capacity = serializers.IntegerField(required=False, min_value=1, max_value=500)
+    collector_ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    report_ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    waste_type = serializers.ChoiceField(choices=GarbageReport.WasteType.choices, required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    bbox = serializers.CharField(required=False)
+
+
 class MapReportSerializer(serializers.ModelSerializer):
     """Lightweight serializer for map markers."""
     
@@ -105,3 +303,88 @@ class MapReportSerializer(serializers.ModelSerializer):
         if obj.assigned_to:
             return f"{obj.assigned_to.first_name} {obj.assigned_to.last_name}".strip() or obj.assigned_to.username
         return None
+
+
+class SyncReportSerializer(serializers.ModelSerializer):
+    """Report as sent by the sync feed; history arrives as separate updates."""
+    
+    reported_by = ReportUserSerializer(read_only=True)
+    assigned_to = ReportUserSerializer(read_only=True)
+    
+    class Meta:
+        model = GarbageReport
+        fields = [
+            'id', 'title', 'description', 'waste_type',
+            'latitude', 'longitude', 'address', 'image',
+            'status', 'reported_by', 'assigned_to',
+            'created_at', 'updated_at', 'completed_at'
+        ]
+
+
+class SyncReportUpdateSerializer(ReportUpdateSerializer):
+    """Report history entry as sent by the sync feed."""
+    
+    class Meta(ReportUpdateSerializer.Meta):
+        fields = ['id', 'report', 'status', 'note', 'updated_by', 'created_at']
+
+
+def _display_name(first_name, last_name, username):
+    """Full name, falling back to the username."""
+    return f"{first_name or ''} {last_name or ''}".strip() or username
+
+
+def columnar_map_data(queryset):
+    """
+    Map markers as parallel arrays with interned lookup tables.
+
+    Statuses and waste types are sent as indexes into ``statuses`` and
+    ``waste_types``; reporter and collector names as indexes into
+    ``names`` (-1 when unassigned). Built from a single flat query.
+    """
+    statuses = [choice for choice, _ in GarbageReport.Status.choices]
+    waste_types = [choice for choice, _ in GarbageReport.WasteType.choices]
+    status_codes = {value: i for i, value in enumerate(statuses)}
+    type_codes = {value: i for i, value in enumerate(waste_types)}
+    name_index = {}
+    names = []
+
+    def intern(user_id, first_name, last_name, username):
+        if user_id is None:
+            return -1
+        if user_id not in name_index:
+            name_index[user_id] = len(names)
+            names.append(_display_name(first_name, last_name, username))
+        return name_index[user_id]
+
+    data = {
+        'format': 'columnar',
+        'statuses': statuses,
+        'waste_types': waste_types,
+        'names': names,
+        'ids': [],
+        'titles': [],
+        'latitudes': [],
+        'longitudes': [],
+        'status_codes': [],
+        'type_codes': [],
+        'reported_by': [],
+        'assigned_to': [],
+    }
+    rows = queryset.values_list(
+        'id', 'title', 'geo_lat', 'geo_lng', 'status', 'waste_type',
+        'reported_by_id', 'reported_by__first_name',
+        'reported_by__last_name', 'reported_by__username',
+        'assigned_to_id', 'assigned_to__first_name',
+        'assigned_to__last_name', 'assigned_to__username',
+    )
+    for row in rows:
+        data['ids'].append(row[0])
+        data['titles'].append(row[1])
+        data['latitudes'].append(row[2])
+        data['longitudes'].append(row[3])
+        data['status_codes'].append(status_codes[row[4]])
+        data['type_codes'].append(type_codes[row[5]])
+        data['reported_by'].append(intern(*row[6:10]))
+        data['assigned_to'].append(intern(*row[10:14]))
+    data['count'] = len(data['ids'])
+    return data
@@ -1,159 +1,129 @@
 """
-Django signals for broadcasting WebSocket updates.
+Django signals for broadcasting WebSocket updates and maintaining rollups.
 """
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-from .models import GarbageReport
+from django.contrib.auth import get_user_model
+from .models import GarbageReport, ReportUpdate
+from . import counters, response_cache, sync
+from .broadcasts import broadcast_report_saved
+from .stats_push import schedule_stats_push
+from .stats import (
+    record_report_created,
+    record_report_changed,
+    record_report_deleted,
+)
 
+User = get_user_model()
 
-# Store previous status for comparison
-_previous_status = {}
 
-
-@receiver(pre_save, sender=GarbageReport)
-def store_previous_status(sender, instance, **kwargs):
-    """Store the previous status before saving."""
-    if instance.pk:
-        try:
-            old_instance = GarbageReport.objects.get(pk=instance.pk)
-            _previous_status[instance.pk] = {
-                'status': old_instance.status,
-                'collector_id': old_instance.assigned_to_id if old_instance.assigned_to else None
-            }
-        except GarbageReport.DoesNotExist:
-            pass
+@receiver(post_save, sender=GarbageReport)
+def update_daily_stats(sender, instance, created, **kwargs):
+    """Keep the ReportDailyStats rollup in step with report changes."""
+    if created:
+        record_report_created(instance)
+        return
+    
+    previous = instance.previous_values()
+    record_report_changed(
+        instance,
+        old_status=previous['status'],
+        old_waste_type=previous['waste_type']
+    )
 
 
 @receiver(post_save, sender=GarbageReport)
-def broadcast_report_update(sender, instance, created, **kwargs):
-    """Broadcast report updates via WebSocket."""
-    channel_layer = get_channel_layer()
-    if not channel_layer:
+def update_report_counters(sender, instance, created, **kwargs):
+    """Apply report deltas to the live dashboard counters."""
+    if created:
+        counters.report_created(instance.status)
         return
     
-    # Prepare report data for broadcasting
-    report_data = {
-        'id': instance.id,
-        'title': instance.title,
-        'status': instance.status,
-        'waste_type': instance.waste_type,
-        'latitude': str(instance.latitude) if instance.latitude else None,
-        'longitude': str(instance.longitude) if instance.longitude else None,
-        'created_at': instance.created_at.isoformat() if instance.created_at else None,
-        'reporter_id': instance.reported_by_id if instance.reported_by else None,
-        'collector_id': instance.assigned_to_id if instance.assigned_to else None,
-    }
-    
+    counters.report_status_changed(instance.previous_values()['status'], instance.status)
+
+
+@receiver(post_delete, sender=GarbageReport)
+def handle_report_deleted(sender, instance, **kwargs):
+    """Drop deleted reports from the ReportDailyStats rollup and counters."""
+    record_report_deleted(instance)
+    counters.report_deleted(instance.status)
+
+
+@receiver(post_save, sender=GarbageReport)
+def record_report_sync_change(sender, instance, created, **kwargs):
+    """Append to the sync change feed of the reporter and collectors."""
+    previous = {} if created else instance.previous_values()
+    sync.record_report_saved(instance, old_collector_id=previous.get('assigned_to_id'))
+
+
+@receiver(post_delete, sender=GarbageReport)
+def record_report_sync_removal(sender, instance, **kwargs):
+    """Tell synced clients a report is gone."""
+    sync.record_report_deleted(instance)
+
+
+@receiver(post_save, sender=ReportUpdate)
+def record_update_sync_change(sender, instance, created, **kwargs):
+    """Append new report history entries to the sync change feed."""
     if created:
-        # New report created
-        # Notify admins
-        async_to_sync(channel_layer.group_send)(
-            'dashboard_updates',
-            {
-                'type': 'report_update',
-                'report': report_data,
-                'action': 'created'
-            }
-        )
-        
-        # Notify general updates channel
-        async_to_sync(channel_layer.group_send)(
-            'report_updates',
-            {
-                'type': 'report_created',
-                'report': report_data
-            }
-        )
-    else:
-        # Report updated
-        previous = _previous_status.pop(instance.pk, {})
-        old_status = previous.get('status')
-        old_collector_id = previous.get('collector_id')
-        
-        # Notify admins of any update
-        async_to_sync(channel_layer.group_send)(
-            'dashboard_updates',
-            {
-                'type': 'report_update',
-                'report': report_data,
-                'action': 'updated'
-            }
-        )
-        
-        # Notify the reporter
-        if instance.reported_by_id:
-            async_to_sync(channel_layer.group_send)(
-                f'user_{instance.reported_by_id}',
-                {
-                    'type': 'report_updated',
-                    'report': report_data
-                }
-            )
-        
-        # Handle assignment
-        if instance.assigned_to_id and instance.assigned_to_id != old_collector_id:
-            # Notify the assigned collector
-            async_to_sync(channel_layer.group_send)(
-                f'user_{instance.assigned_to_id}',
-                {
-                    'type': 'task_update',
-                    'task': report_data
-                }
-            )
-            
-            # Also notify collector updates channel
-            async_to_sync(channel_layer.group_send)(
-                'collector_updates',
-                {
-                    'type': 'report_assigned',
-                    'report': report_data,
-                    'collector_id': instance.assigned_to_id
-                }
-            )
-            
-            # Notify user of assignment
-            async_to_sync(channel_layer.group_send)(
-                f'user_{instance.assigned_to_id}',
-                {
-                    'type': 'notification',
-                    'title': 'New Task Assigned',
-                    'message': f'You have been assigned to: {instance.title}',
-                    'data': {'report_id': instance.id}
-                }
-            )
-        
-        # Handle status change
-        if old_status and instance.status != old_status:
-            # Notify the reporter of status change
-            if instance.reported_by_id:
-                status_messages = {
-                    'assigned': 'Your report has been assigned to a collector',
-                    'in_progress': 'Collection is now in progress',
-                    'completed': 'Your report has been completed!',
-                    'rejected': 'Your report has been rejected'
-                }
-                message = status_messages.get(
-                    instance.status, 
-                    f'Status changed to {instance.status}'
-                )
-                
-                async_to_sync(channel_layer.group_send)(
-                    f'user_{instance.reported_by_id}',
-                    {
-                        'type': 'notification',
-                        'title': 'Report Status Updated',
-                        'message': message,
-                        'data': {'report_id': instance.id, 'status': instance.status}
-                    }
-                )
-        
-        # Notify subscribers of specific report
-        async_to_sync(channel_layer.group_send)(
-            f'report_{instance.pk}',
-            {
-                'type': 'report_updated',
-                'report': report_data
-            }
-        )
+        sync.record_update_created(instance)
+
+
+@receiver(post_save, sender=GarbageReport)
+def invalidate_report_responses(sender, instance, created, **kwargs):
+    """Expire cached responses of the reporter and current/previous collector."""
+    previous = {} if created else instance.previous_values()
+    response_cache.invalidate_users(
+        [instance.reported_by_id, instance.assigned_to_id, previous.get('assigned_to_id')]
+    )
+
+
+@receiver(post_delete, sender=GarbageReport)
+def invalidate_deleted_report_responses(sender, instance, **kwargs):
+    """Expire cached responses that listed a deleted report."""
+    response_cache.invalidate_users([instance.reported_by_id, instance.assigned_to_id])
+
+
+@receiver(post_save, sender=ReportUpdate)
+def invalidate_update_responses(sender, instance, created, **kwargs):
+    """Expire cached report details that nest the report's history."""
+    report = instance.report
+    response_cache.invalidate_users([report.reported_by_id, report.assigned_to_id])
+
+
+@receiver(post_save, sender=GarbageReport)
+@receiver(post_delete, sender=GarbageReport)
+def push_dashboard_stats(sender, instance, **kwargs):
+    """Schedule a coalesced stats_update for admin dashboards."""
+    schedule_stats_push()
+
+
+@receiver(post_save, sender=User)
+def update_user_counters(sender, instance, created, update_fields=None, **kwargs):
+    """Apply user role/is_active deltas to the live dashboard counters."""
+    if created:
+        counters.user_changed(None, False, instance.role, instance.is_active)
+        return
+    if update_fields is not None and not {'role', 'is_active'} & set(update_fields):
+        return
+    
+    previous = instance.previous_values()
+    counters.user_changed(previous['role'], previous['is_active'], instance.role, instance.is_active)
+
+
+@receiver(post_delete, sender=User)
+def remove_user_from_counters(sender, instance, **kwargs):
+    """Uncount deleted users."""
+    counters.user_changed(instance.role, instance.is_active, None, False)
+
+
+@receiver(post_save, sender=GarbageReport)
+def broadcast_report_update(sender, instance, created, **kwargs):
+    """Broadcast report updates via WebSocket."""
+    previous = {} if created else instance.previous_values()
+    broadcast_report_saved(
+        instance,
+        created,
+        old_status=previous.get('status'),
+        old_collector_id=previous.get('assigned_to_id')
+    )
@@ -0,0 +1,206 @@
+"""
+Daily rollup maintenance for report analytics.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import GarbageReport, ReportUpdate, ReportDailyStats
+
+
+# Statuses whose transitions are counted in their own rollup column
+TRACKED_TRANSITIONS = {
+    GarbageReport.Status.ASSIGNED: 'assigned',
+    GarbageReport.Status.COMPLETED: 'completed',
+    GarbageReport.Status.REJECTED: 'rejected',
+}
+
+
+def _bump(date, waste_type, status, **deltas):
+    """Atomically add ``deltas`` to a rollup row, creating it if needed."""
+    lookup = {'date': date, 'waste_type': waste_type, 'status': status}
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+
+    if ReportDailyStats.objects.filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            ReportDailyStats.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # Another writer created the row first
+        ReportDailyStats.objects.filter(**lookup).update(**updates)
+
+
+def record_report_created(report):
+    """Count a newly created report."""
+    _bump(
+        timezone.localdate(report.created_at),
+        report.waste_type,
+        report.status,
+        created=1
+    )
+
+
+def record_reports_created(reports):
+    """
+    Rollup bookkeeping for reports created without signals (bulk_create).
+
+    Reports created closed also count as a transition into their status:
+    completed ones on the day of ``completed_at``, rejected ones on the day
+    they were created.
+
+    Args:
+        reports: Iterable of the new GarbageReports
+    """
+    created = Counter()
+    transitions = Counter()
+    for report in reports:
+        created_date = timezone.localdate(report.created_at)
+        created[(created_date, report.waste_type, report.status)] += 1
+        if report.status == GarbageReport.Status.COMPLETED and report.completed_at:
+            day = timezone.localdate(report.completed_at)
+            transitions[(day, report.waste_type, report.status)] += 1
+        elif report.status == GarbageReport.Status.REJECTED:
+            transitions[(created_date, report.waste_type, report.status)] += 1
+
+    for (created_date, waste_type, status), count in created.items():
+        _bump(created_date, waste_type, status, created=count)
+    for (day, waste_type, status), count in transitions.items():
+        _bump(day, waste_type, status, **{TRACKED_TRANSITIONS[status]: count})
+
+
+def record_report_deleted(report):
+    """Remove a deleted report from the created counts."""
+    _bump(
+        timezone.localdate(report.created_at),
+        report.waste_type,
+        report.status,
+        created=-1
+    )
+
+
+def record_report_changed(report, old_status, old_waste_type):
+    """Move a report between rollup rows after a status or type change."""
+    if old_status == report.status and old_waste_type == report.waste_type:
+        return
+
+    created_date = timezone.localdate(report.created_at)
+    _bump(created_date, old_waste_type, old_status, created=-1)
+    _bump(created_date, report.waste_type, report.status, created=1)
+
+    column = TRACKED_TRANSITIONS.get(report.status)
+    if column and old_status != report.status:
+        if report.status == GarbageReport.Status.COMPLETED and report.completed_at:
+            day = timezone.localdate(report.completed_at)
+        else:
+            day = timezone.localdate()
+        _bump(day, report.waste_type, report.status, **{column: 1})
+
+
+def record_status_changes(reports, old_status, new_status):
+    """
+    Rollup bookkeeping for a bulk status change made without signals.
+
+    Args:
+        reports: Iterable of (created_at, waste_type) for the changed reports
+        old_status: Status every report had before the change
+        new_status: Status every report has now
+    """
+    if old_status == new_status:
+        return
+    created = Counter(
+        (timezone.localdate(created_at), waste_type)
+        for created_at, waste_type in reports
+    )
+    for (created_date, waste_type), count in created.items():
+        _bump(created_date, waste_type, old_status, created=-count)
+        _bump(created_date, waste_type, new_status, created=count)
+
+    column = TRACKED_TRANSITIONS.get(new_status)
+    if column:
+        transitions = Counter(waste_type for _, waste_type in created.elements())
+        for waste_type, count in transitions.items():
+            _bump(timezone.localdate(), waste_type, new_status, **{column: count})
+
+
+@transaction.atomic
+def rebuild_daily_stats():
+    """
+    Recompute the whole rollup table from reports and their update history.
+
+    Completions are counted from ``completed_at``; other transitions from
+    the update history, falling back to ``created_at`` for rejected
+    reports that have none.
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    rows = {}
+
+    def row(date, waste_type, status):
+        key = (date, waste_type, status)
+        if key not in rows:
+            rows[key] = ReportDailyStats(
+                date=date, waste_type=waste_type, status=status
+            )
+        return rows[key]
+
+    created = GarbageReport.objects.annotate(
+        date=TruncDate('created_at')
+    ).values('date', 'waste_type', 'status').annotate(
+        count=Count('id')
+    ).order_by()
+    for item in created:
+        row(item['date'], item['waste_type'], item['status']).created = item['count']
+
+    # Completions are dated by completed_at, which imported reports have
+    # without any update history
+    completed = GarbageReport.objects.filter(
+        status=GarbageReport.Status.COMPLETED,
+        completed_at__isnull=False
+    ).annotate(
+        date=TruncDate('completed_at')
+    ).values('date', 'waste_type').annotate(
+        count=Count('id')
+    ).order_by()
+    for item in completed:
+        stats = row(item['date'], item['waste_type'], GarbageReport.Status.COMPLETED)
+        stats.completed = item['count']
+
+    # Other transitions come from the update history
+    transitions = ReportUpdate.objects.filter(
+        Q(status__in=[GarbageReport.Status.ASSIGNED, GarbageReport.Status.REJECTED])
+        | Q(status=GarbageReport.Status.COMPLETED, report__completed_at__isnull=True)
+    ).annotate(
+        date=TruncDate('created_at')
+    ).values(
+        'date', 'report__waste_type', 'status'
+    ).annotate(
+        count=Count('report', distinct=True)
+    ).order_by()
+    for item in transitions:
+        stats = row(item['date'], item['report__waste_type'], item['status'])
+        column = TRACKED_TRANSITIONS[item['status']]
+        setattr(stats, column, getattr(stats, column) + item['count'])
+
+    # Reports imported as rejected have no history; they count on the day
+    # they were created
+    rejected = GarbageReport.objects.filter(
+        status=GarbageReport.Status.REJECTED
+    ).exclude(
+        updates__status=GarbageReport.Status.REJECTED
+    ).annotate(
+        date=TruncDate('created_at')
+    ).values('date', 'waste_type').annotate(
+        count=Count('id')
+    ).order_by()
+    for item in rejected:
+        stats = row(item['date'], item['waste_type'], GarbageReport.Status.REJECTED)
+        stats.rejected += item['count']
+
+    ReportDailyStats.objects.all().delete()
+    ReportDailyStats.objects.bulk_create(rows.values(), batch_size=1000)
+    return len(rows)
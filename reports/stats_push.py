@@ -0,0 +1,78 @@
+"""
+Coalesced stats_update pushes to the admin dashboard WebSocket group.
+
+Report changes open a push window guarded by a cache key; the first change
+in a window schedules one push at the end of it and every later change in
+the same window is absorbed. With REDIS_URL set, the window key and the
+counters live in Redis and the message goes through the Redis channel
+layer. A burst of changes on any number of workers then yields a single
+message, with the same numbers, to every connected dashboard. The locmem
+fallback gives each process its own window and counters, which is only
+correct with a single worker.
+"""
+import logging
+import threading
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+
+from .counters import get_dashboard_stats
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = 'dashboard_stats_push:pending'
+
+
+def get_push_interval():
+    """Seconds between dashboard stats pushes."""
+    return getattr(settings, 'DASHBOARD_STATS_PUSH_INTERVAL', 2.0)
+
+
+def push_stats():
+    """Send the current stats snapshot to the dashboard group."""
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return
+
+    try:
+        async_to_sync(channel_layer.group_send)(
+            'dashboard_updates',
+            {
+                'type': 'stats_update',
+                'stats': get_dashboard_stats()
+            }
+        )
+    except Exception as e:
+        logger.error(f"Failed to push dashboard stats: {e}")
+
+
+def _flush():
+    """Timer callback: push, then release this thread's DB connections."""
+    try:
+        push_stats()
+    finally:
+        connections.close_all()
+
+
+def _open_window():
+    """Schedule a push unless one is already pending for this window."""
+    interval = get_push_interval()
+    if interval <= 0:
+        push_stats()
+        return
+
+    if not cache.add(PENDING_KEY, True, timeout=interval):
+        # A push is already scheduled for this window
+        return
+
+    timer = threading.Timer(interval, _flush)
+    timer.daemon = True
+    timer.start()
+
+
+def schedule_stats_push():
+    """Request a dashboard stats push once the current transaction commits."""
+    transaction.on_commit(_open_window)
@@ -0,0 +1,251 @@
+"""
+Change-feed sync for the citizen and collector apps.
+
+Signals append ReportChange rows for every user whose view of a report
+changed. Clients send back the opaque cursor from their last sync and get
+only the reports, updates and removals recorded after it.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+from .models import ReportChange, ReportUpdate, SyncOperation
+
+CURSOR_SALT = 'reports.sync.cursor'
+
+# Change rows returned per sync request
+SYNC_BATCH_SIZE = 500
+
+
+def get_retention_days():
+    """Days of change log kept; older cursors trigger a full resync."""
+    return getattr(settings, 'SYNC_CHANGE_RETENTION_DAYS', 30)
+
+
+def get_settle_seconds():
+    """
+    Seconds before a change row counts as settled.
+
+    Auto-increment ids can commit out of order under concurrent writers,
+    so cursors only advance past rows at least this old; newer rows are
+    sent again on the next sync, which clients apply idempotently.
+    """
+    return getattr(settings, 'SYNC_SETTLE_SECONDS', 5)
+
+
+def encode_cursor(seq):
+    """Opaque, signed cursor for a change sequence number."""
+    return signing.TimestampSigner(salt=CURSOR_SALT).sign_object({'seq': seq})
+
+
+def decode_cursor(cursor):
+    """
+    Sequence number from a cursor.
+
+    Returns:
+        int: The sequence number, or ``None`` if the cursor is invalid or
+        older than the retention window (the client must resync in full)
+    """
+    try:
+        data = signing.TimestampSigner(salt=CURSOR_SALT).unsign_object(
+            cursor,
+            max_age=timedelta(days=get_retention_days())
+        )
+        return int(data['seq'])
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return None
+
+
+def _changes(kind, action, report_id, object_id, user_ids):
+    return [
+        ReportChange(
+            user_id=user_id,
+            kind=kind,
+            action=action,
+            report_id=report_id,
+            object_id=object_id
+        )
+        for user_id in user_ids
+        if user_id
+    ]
+
+
+def record_reports_saved(reports, old_collector_ids=None):
+    """
+    Log report changes for their reporters and current/previous collectors.
+
+    Args:
+        reports: Saved GarbageReport instances
+        old_collector_ids: Optional mapping of report pk to the collector
+            it was assigned to before the change
+    """
+    old_collector_ids = old_collector_ids or {}
+    changes = []
+    for report in reports:
+        changes += _changes(
+            ReportChange.Kind.REPORT, ReportChange.Action.UPSERT,
+            report.pk, report.pk,
+            {report.reported_by_id, report.assigned_to_id}
+        )
+        old_collector_id = old_collector_ids.get(report.pk)
+        if old_collector_id and old_collector_id != report.assigned_to_id:
+            changes += _changes(
+                ReportChange.Kind.REPORT, ReportChange.Action.REMOVE,
+                report.pk, report.pk, [old_collector_id]
+            )
+    ReportChange.objects.bulk_create(changes)
+
+
+def record_report_saved(report, old_collector_id=None):
+    """Log a report change for its reporter and current/previous collector."""
+    record_reports_saved([report], {report.pk: old_collector_id})
+
+
+def record_report_deleted(report):
+    """Log a report removal for everyone who could see it."""
+    ReportChange.objects.bulk_create(_changes(
+        ReportChange.Kind.REPORT, ReportChange.Action.REMOVE,
+        report.pk, report.pk,
+        {report.reported_by_id, report.assigned_to_id}
+    ))
+
+
+def record_updates_created(updates):
+    """Log new ReportUpdates for their reports' reporters and collectors."""
+    changes = []
+    for update in updates:
+        report = update.report
+        changes += _changes(
+            ReportChange.Kind.UPDATE, ReportChange.Action.UPSERT,
+            report.pk, update.pk,
+            {report.reported_by_id, report.assigned_to_id}
+        )
+    ReportChange.objects.bulk_create(changes)
+
+
+def record_update_created(update):
+    """Log a new ReportUpdate for the report's reporter and collector."""
+    record_updates_created([update])
+
+
+def record_updates_moved(report, update_ids):
+    """Log history entries re-pointed to ``report`` (e.g. by a merge)."""
+    recipients = {report.reported_by_id, report.assigned_to_id}
+    changes = []
+    for update_id in update_ids:
+        changes += _changes(
+            ReportChange.Kind.UPDATE, ReportChange.Action.UPSERT,
+            report.pk, update_id, recipients
+        )
+    ReportChange.objects.bulk_create(changes)
+
+
+def build_feed(user, view_queryset, cursor=None):
+    """
+    Collect the changes to a user's view of reports since ``cursor``.
+
+    Args:
+        user: The syncing user
+        view_queryset: GarbageReport queryset defining the user's view
+        cursor: Cursor from the previous sync, or ``None`` for a full sync
+
+    Returns:
+        dict: ``reports`` and ``updates`` querysets to serialize,
+        ``removed`` report ids, the next ``cursor``, ``has_more`` and
+        ``reset`` (True when this is a full snapshot)
+    """
+    seq = decode_cursor(cursor) if cursor else None
+    settled_before = timezone.now() - timedelta(seconds=get_settle_seconds())
+
+    if seq is None:
+        # Full snapshot. The cursor stops at the last settled change, like
+        # an incremental sync: rows after it may still be committing with
+        # lower ids, and are sent again (harmlessly) next time
+        latest = ReportChange.objects.filter(
+            user=user,
+            created_at__lte=settled_before
+        ).order_by('-id').values_list('id', flat=True).first() or 0
+        return {
+            'reports': view_queryset,
+            'updates': ReportUpdate.objects.filter(report__in=view_queryset.order_by().values('pk')),
+            'removed': [],
+            'cursor': encode_cursor(latest),
+            'has_more': False,
+            'reset': True,
+        }
+
+    rows = list(
+        ReportChange.objects.filter(user=user, id__gt=seq).order_by('id').values_list(
+            'id', 'kind', 'action', 'report_id', 'object_id', 'created_at'
+        )[:SYNC_BATCH_SIZE + 1]
+    )
+    has_more = len(rows) > SYNC_BATCH_SIZE
+    rows = rows[:SYNC_BATCH_SIZE]
+
+    # Last action per report wins; collect new update ids
+    report_actions = {}
+    update_ids = set()
+    for _, kind, action, report_id, object_id, _ in rows:
+        if kind == ReportChange.Kind.REPORT:
+            report_actions[report_id] = action
+        else:
+            update_ids.add(object_id)
+
+    upserted = {
+        report_id for report_id, action in report_actions.items()
+        if action == ReportChange.Action.UPSERT
+    }
+    reports = view_queryset.filter(pk__in=upserted)
+    visible = set(reports.values_list('pk', flat=True)) if upserted else set()
+    removed = sorted(set(report_actions) - visible)
+
+    next_seq = seq
+    for row_id, *_, created_at in rows:
+        if created_at > settled_before:
+            break
+        next_seq = row_id
+    # Only ask for more when the whole batch settled: rows after an unsettled
+    # one are newer still, so fetching again at once gets the same cursor back
+    if rows and next_seq != rows[-1][0]:
+        has_more = False
+
+    return {
+        'reports': reports,
+        'updates': ReportUpdate.objects.filter(
+            pk__in=update_ids,
+            report__in=view_queryset.order_by().values('pk')
+        ),
+        'removed': removed,
+        'cursor': encode_cursor(next_seq),
+        'has_more': has_more,
+        'reset': False,
+    }
+
+
+def prune_changes(days=None):
+    """
+    Delete change rows older than the retention window.
+
+    Returns:
+        int: Number of rows deleted
+    """
+    cutoff = timezone.now() - timedelta(days=days or get_retention_days())
+    deleted, _ = ReportChange.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+def prune_operations(days=None):
+    """
+    Delete recorded offline operations older than the retention window.
+
+    A batch replayed after this is applied again (and rejected if the
+    report has moved on since).
+
+    Returns:
+        int: Number of rows deleted
+    """
+    cutoff = timezone.now() - timedelta(days=days or get_retention_days())
+    deleted, _ = SyncOperation.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
@@ -1,3 +1,1502 @@
-from django.test import TestCase
+import importlib
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.db.models.signals import post_save
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from . import counters, geohash, response_cache, stats_push
+from .assignment import _assign, apply_plan, plan_assignments
+from .distances import (
+    HaversineDistance,
+    LRUCache,
+    RoadNetworkDistance,
+    get_distance_provider,
+    haversine_matrix,
+)
+from .duplicates import merge_reports
+from .imports import run_import
+from .filters import REPORT_SEARCH_INDEX
+from .geo import CLUSTER_MAX_ZOOM
+from .management.commands.check_query_plans import Command as CheckQueryPlans
+from .models import GarbageReport, ReportDailyStats, ReportImport, ReportUpdate
+from .query_budget import ENDPOINT_QUERY_BUDGETS, assert_query_budget
+from .query_plans import HOT_QUERIES, explain_scans
+from .road_graph import RoadGraph, build_road_graph
+from .routes import improve_route, optimize_route, route_length
+from .serializers import REPORT_EXPANDABLE
+from .stats import rebuild_daily_stats
+
+User = get_user_model()
+
+
+def make_report(reported_by, **fields):
+    """A report with placeholder content."""
+    return GarbageReport.objects.create(**{
+        'title': 'Overflowing bin',
+        'description': 'Bin by the bus stop',
+        'latitude': 12.97,
+        'longitude': 77.59,
+        'address': 'MG Road',
+        'reported_by': reported_by,
+        **fields,
+    })
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+# Role of the user requesting each endpoint in ENDPOINT_QUERY_BUDGETS
+ENDPOINT_ROLES = {
+    'citizen-reports': 'citizen',
+    'citizen-report-detail': 'citizen',
+    'citizen-sync': 'citizen',
+    'collector-tasks': 'collector',
+    'collector-task-detail': 'collector',
+    'collector-sync': 'collector',
+    'admin-reports': 'admin',
+    'admin-report-detail': 'admin',
+}
+
+
+@override_settings(RESPONSE_CACHE_SECONDS=0)
+class QueryBudgetTests(TestCase):
+    """Report endpoints stay within their budgets with one report and a full page."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            role: User.objects.create(username=f'budget-{role}', role=role)
+            for role in ('citizen', 'collector', 'admin')
+        }
+
+    def seed_reports(self, count):
+        for _ in range(count):
+            report = make_report(
+                self.users['citizen'],
+                image='reports/synthetic.jpg',
+                assigned_to=self.users['collector'],
+                status=GarbageReport.Status.ASSIGNED
+            )
+            for author in self.users.values():
+                ReportUpdate.objects.create(
+                    report=report,
+                    status=GarbageReport.Status.ASSIGNED,
+                    updated_by=author
+                )
+        return report
+
+    def assert_budgets(self, report, page_size):
+        for name, budget in ENDPOINT_QUERY_BUDGETS.items():
+            with self.subTest(endpoint=name, reports=page_size):
+                if name.endswith('detail'):
+                    url = reverse(name, kwargs={'pk': report.pk})
+                else:
+                    url = f'{reverse(name)}?count=exact&expand={",".join(REPORT_EXPANDABLE)}'
+                client = client_for(self.users[ENDPOINT_ROLES[name]])
+                with assert_query_budget(budget, name):
+                    response = client.get(url)
+                self.assertEqual(response.status_code, 200)
+                if not name.endswith('detail'):
+                    rows = response.data.get('results', response.data.get('reports'))
+                    self.assertEqual(len(rows), page_size)
+
+    def test_one_report(self):
+        self.assert_budgets(self.seed_reports(1), 1)
+
+    def test_full_page(self):
+        self.assert_budgets(self.seed_reports(20), 20)
+
+
+class QueryPlanTests(TestCase):
+    """The hot report queries are answered from indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Smaller than check_query_plans' default; the fresh planner
+        # statistics still steer it to the indexes
+        command = CheckQueryPlans()
+        cls.seed = command.seed(2000)
+        command.analyze()
+
+    def test_no_full_scans(self):
+        for name, build in HOT_QUERIES.items():
+            with self.subTest(query=name):
+                full_scans, indexes = explain_scans(build(self.seed))
+                self.assertEqual(full_scans, set())
+                self.assertTrue(indexes)
+
+
+class TransitionTests(TestCase):
+    """Status changes follow ALLOWED_TRANSITIONS."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = User.objects.create(username='transition-citizen', role='citizen')
+        cls.collector = User.objects.create(username='transition-collector', role='collector')
+        cls.admin = User.objects.create(username='transition-admin', role='admin')
+
+    def assert_conflict(self, response, report, status):
+        self.assertEqual(response.status_code, 409)
+        report.refresh_from_db()
+        self.assertEqual(report.status, status)
+        self.assertFalse(report.updates.exists())
+
+    def test_collector_cannot_reopen_completed_task(self):
+        report = make_report(
+            self.citizen, assigned_to=self.collector, status=GarbageReport.Status.COMPLETED
+        )
+        response = client_for(self.collector).post(
+            reverse('collector-update-status', kwargs={'pk': report.pk}),
+            {'status': GarbageReport.Status.IN_PROGRESS}
+        )
+        self.assert_conflict(response, report, GarbageReport.Status.COMPLETED)
+
+    def test_admin_cannot_reject_completed_report(self):
+        report = make_report(
+            self.citizen, assigned_to=self.collector, status=GarbageReport.Status.COMPLETED
+        )
+        response = client_for(self.admin).post(
+            reverse('admin-reject-report', kwargs={'pk': report.pk})
+        )
+        self.assert_conflict(response, report, GarbageReport.Status.COMPLETED)
+
+    def test_admin_cannot_assign_rejected_report(self):
+        report = make_report(self.citizen, status=GarbageReport.Status.REJECTED)
+        response = client_for(self.admin).post(
+            reverse('admin-assign-collector', kwargs={'pk': report.pk}),
+            {'collector_id': self.collector.pk}
+        )
+        self.assert_conflict(response, report, GarbageReport.Status.REJECTED)
+
+    def test_allowed_transition(self):
+        report = make_report(
+            self.citizen, assigned_to=self.collector, status=GarbageReport.Status.ASSIGNED
+        )
+        response = client_for(self.collector).post(
+            reverse('collector-update-status', kwargs={'pk': report.pk}),
+            {'status': GarbageReport.Status.COMPLETED}
+        )
+        self.assertEqual(response.status_code, 200)
+        report.refresh_from_db()
+        self.assertEqual(report.status, GarbageReport.Status.COMPLETED)
+        self.assertIsNotNone(report.completed_at)
+        self.assertEqual(report.updates.count(), 1)
+
+
+class SyncOperationTests(TestCase):
+    """Offline operations are applied at most once per key."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = User.objects.create(username='offline-citizen', role='citizen')
+        cls.collector = User.objects.create(username='offline-collector', role='collector')
+
+    def test_replayed_keys_are_not_applied_again(self):
+        report = make_report(
+            self.citizen, assigned_to=self.collector, status=GarbageReport.Status.ASSIGNED
+        )
+        batch = {'operations': [
+            {
+                'key': 'start-1',
+                'id': report.pk,
+                'status': GarbageReport.Status.IN_PROGRESS,
+                'client_timestamp': '2026-10-18T09:00:00Z',
+            },
+            {
+                'key': 'finish-1',
+                'id': report.pk,
+                'status': GarbageReport.Status.COMPLETED,
+                'client_timestamp': '2026-10-18T09:30:00Z',
+            },
+        ]}
+        client = client_for(self.collector)
+        url = reverse('collector-sync-operations')
+
+        first = client.post(url, batch, format='json')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual((first.data['applied'], first.data['replayed']), (2, 0))
+        report.refresh_from_db()
+        completed_at = report.completed_at
+
+        replay = client.post(url, batch, format='json')
+        self.assertEqual(replay.status_code, 200)
+        self.assertEqual((replay.data['applied'], replay.data['replayed']), (0, 2))
+        self.assertTrue(all(result['ok'] for result in replay.data['results']))
+        report.refresh_from_db()
+        self.assertEqual(report.status, GarbageReport.Status.COMPLETED)
+        self.assertEqual(report.completed_at, completed_at)
+        self.assertEqual(report.updates.count(), 2)
+
+
+class ReportImportTests(TestCase):
+    """Imports resume after their last committed chunk."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = User.objects.create(username='import-citizen', role='citizen')
+
+    def test_resume_skips_committed_chunks(self):
+        lines = [
+            json.dumps({
+                'title': f'Imported {i}',
+                'description': 'Legacy report',
+                'latitude': 12.97,
+                'longitude': 77.59,
+                'address': 'MG Road',
+            }) + '\n'
+            for i in range(250)
+        ]
+
+        def interrupted():
+            yield from lines[:170]
+            raise OSError('Connection reset')
+
+        report_import = ReportImport.objects.create(
+            source='legacy.ndjson', format='ndjson', reported_by=self.citizen
+        )
+        with self.assertRaises(OSError):
+            for _ in run_import(report_import, interrupted(), chunk_size=50):
+                pass
+        report_import.refresh_from_db()
+        self.assertEqual(report_import.status, ReportImport.Status.FAILED)
+        self.assertEqual((report_import.rows_read, report_import.created), (150, 150))
+
+        for _ in run_import(report_import, lines, chunk_size=50):
+            pass
+        report_import.refresh_from_db()
+        self.assertEqual(report_import.status, ReportImport.Status.COMPLETED)
+        self.assertEqual((report_import.rows_read, report_import.created), (250, 250))
+        titles = GarbageReport.objects.filter(reported_by=self.citizen).values_list('title', flat=True)
+        self.assertEqual(sorted(titles), sorted(f'Imported {i}' for i in range(250)))
+
+
+class BulkWriteMixin:
+    """Runs the write paths that skip the per-report signals."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = User.objects.create(username='bulk-citizen', role='citizen')
+        cls.collector = User.objects.create(username='bulk-collector', role='collector')
+        cls.admin = User.objects.create(username='bulk-admin', role='admin')
+
+    def run_bulk_writes(self):
+        # Counter deltas are applied on commit, so run each step's callbacks
+        with self.captureOnCommitCallbacks(execute=True):
+            tasks = [
+                make_report(self.citizen, assigned_to=self.collector, status=GarbageReport.Status.ASSIGNED)
+                for _ in range(3)
+            ]
+            pending = [make_report(self.citizen, waste_type='organic') for _ in range(4)]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client_for(self.collector).post(
+                reverse('collector-bulk-update-status'),
+                {'items': [{'id': task.pk, 'status': GarbageReport.Status.COMPLETED} for task in tasks]},
+                format='json'
+            )
+        self.assertEqual(response.data['updated'], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client_for(self.admin).post(
+                reverse('admin-bulk-update-status'),
+                {'items': [{'id': pending[0].pk, 'status': GarbageReport.Status.REJECTED}]},
+                format='json'
+            )
+        self.assertEqual(response.data['updated'], 1)
+
+        rows = [
+            {'status': 'pending', 'created_at': '2026-09-01T08:00:00Z'},
+            {'status': 'completed', 'created_at': '2026-09-02T08:00:00Z', 'completed_at': '2026-09-05T08:00:00Z'},
+            {'status': 'completed', 'created_at': '2026-09-03T08:00:00Z'},
+            {'status': 'rejected', 'created_at': '2026-09-04T08:00:00Z'},
+        ]
+        lines = [
+            json.dumps({
+                'title': 'Imported report',
+                'description': 'Legacy report',
+                'latitude': 12.97,
+                'longitude': 77.59,
+                'address': 'MG Road',
+                **row,
+            }) + '\n'
+            for row in rows
+        ]
+        report_import = ReportImport.objects.create(
+            source='legacy.ndjson', format='ndjson', reported_by=self.citizen
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in run_import(report_import, lines):
+                pass
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client_for(self.admin).post(
+                reverse('admin-merge-reports', kwargs={'pk': pending[1].pk}),
+                {'duplicate_ids': [pending[2].pk, pending[3].pk]},
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+
+
+class DailyStatsTests(BulkWriteMixin, TestCase):
+    """The live rollup matches a rebuild after bulk writes."""
+
+    def rollup(self):
+        return sorted(
+            ReportDailyStats.objects.exclude(
+                created=0, assigned=0, completed=0, rejected=0
+            ).values_list('date', 'waste_type', 'status', 'created', 'assigned', 'completed', 'rejected')
+        )
+
+    def test_rollup_matches_rebuild(self):
+        self.run_bulk_writes()
+        live = self.rollup()
+        # Imported closed reports count as transitions too
+        imported = ReportDailyStats.objects.filter(date__month=9)
+        self.assertEqual(sum(imported.values_list('completed', flat=True)), 2)
+        self.assertEqual(sum(imported.values_list('rejected', flat=True)), 1)
+        rebuild_daily_stats()
+        self.assertEqual(live, self.rollup())
+
+
+class DashboardCounterTests(BulkWriteMixin, TestCase):
+    """The cached dashboard counters stay exact through bulk writes."""
+
+    def setUp(self):
+        cache.delete_many(counters.ALL_KEYS)
+
+    def test_counters_match_reconcile(self):
+        counters.get_dashboard_stats()
+        self.run_bulk_writes()
+        self.assertEqual(counters.get_dashboard_stats(), counters.count_from_database())
+        self.assertEqual(counters.reconcile(), {})
+
+
+class KeysetPaginationTests(TestCase):
+    """Report lists page with signed keyset cursors."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = User.objects.create(username='keyset-citizen', role='citizen')
+        cls.admin = User.objects.create(username='keyset-admin', role='admin')
+        for _ in range(25):
+            make_report(cls.citizen)
+
+    def setUp(self):
+        self.client = client_for(self.admin)
+        self.url = reverse('admin-reports')
+
+    def test_next_page(self):
+        first = self.client.get(self.url)
+        second = self.client.get(first.data['next'])
+        self.assertEqual(second.status_code, 200)
+        ids = [row['id'] for row in first.data['results'] + second.data['results']]
+        self.assertEqual(len(set(ids)), 25)
+
+    def test_tampered_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_from_another_ordering(self):
+        next_url = self.client.get(self.url).data['next']
+        response = self.client.get(f'{next_url}&ordering=status')
+        self.assertEqual(response.status_code, 404)
+
+
+class ConditionalGetTests(TestCase):
+    """Report lists and details answer unchanged conditional GETs with 304."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = User.objects.create(username='etag-citizen', role='citizen')
+        cls.report = make_report(cls.citizen)
+
+    def setUp(self):
+        self.client = client_for(self.citizen)
+
+    def assert_revalidates(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        self.report.title = 'Overflowing bin, now cleared'
+        self.report.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list(self):
+        self.assert_revalidates(reverse('citizen-reports'))
+
+    def test_detail(self):
+        self.assert_revalidates(reverse('citizen-report-detail', kwargs={'pk': self.report.pk}))
+
+
+class ReportSearchTests(TestCase):
+    """``?search=`` on the admin report list uses the full-text index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = User.objects.create(username='search-citizen', role='citizen')
+        cls.admin = User.objects.create(username='search-admin', role='admin')
+
+    def setUp(self):
+        self.client = client_for(self.admin)
+
+    def search(self, query):
+        response = self.client.get(reverse('admin-reports'), {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_finds_new_report(self):
+        # The index is fed by triggers, which must survive table rebuilds
+        # in later migrations
+        report = make_report(self.citizen, title='Overflowing Bin')
+        self.assertEqual(self.search('bin'), [report.pk])
+
+    def test_all_terms_must_match(self):
+        glass = make_report(self.citizen, title='Broken glass', address='Station Road')
+        make_report(self.citizen, title='Broken bench', address='Station Road')
+        self.assertEqual(self.search('broken glass road'), [glass.pk])
+
+    def test_terms_match_as_prefixes(self):
+        report = make_report(self.citizen, title='Overflowing dumpster')
+        self.assertEqual(self.search('overfl dump'), [report.pk])
+        self.assertEqual(self.search('flowing'), [])
+
+    def test_ranked_by_relevance(self):
+        # Newest first without a search; title matches outrank
+        # description matches
+        in_title = make_report(self.citizen, title='Plastic heap', description='Near the park')
+        in_description = make_report(self.citizen, title='Heap', description='Mostly plastic')
+        self.assertEqual(self.search('plastic'), [in_title.pk, in_description.pk])
+        response = self.client.get(reverse('admin-reports'), {'search': 'plastic', 'ordering': '-created_at'})
+        self.assertEqual([row['id'] for row in response.data['results']], [in_description.pk, in_title.pk])
+
+    def test_fallback_without_index_support(self):
+        report = make_report(self.citizen, title='Overflowing dumpster')
+        with mock.patch.object(REPORT_SEARCH_INDEX, 'supported', return_value=False):
+            # icontains over REPORT_SEARCH_FIELDS: substrings match too
+            self.assertEqual(self.search('flowing'), [report.pk])
+            self.assertEqual(self.search('glass'), [])
+
+    def test_index_registered_at_startup(self):
+        # In a fresh process, before anything imports the views: the
+        # post_migrate repair only sees indexes registered by then
+        script = (
+            'import django; django.setup(); '
+            'from backend.search import SearchIndex; '
+            'print(sorted(index.app_label for index in SearchIndex.registry))'
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', script],
+            capture_output=True, text=True, check=True
+        ).stdout
+        self.assertEqual(output.strip(), "['accounts', 'reports']")
+
+
+class SyncFeedTests(TestCase):
+    """The change feed sends each change to the users whose view it touched."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = User.objects.create(username='feed-citizen', role='citizen')
+        cls.collector = User.objects.create(username='feed-collector', role='collector')
+        cls.other_collector = User.objects.create(username='feed-collector-2', role='collector')
+
+    def sync(self, user, url_name, cursor=None):
+        params = {'cursor': cursor} if cursor else {}
+        response = client_for(user).get(reverse(url_name), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    @override_settings(SYNC_SETTLE_SECONDS=0)
+    def test_incremental_sync(self):
+        first = make_report(self.citizen)
+        snapshot = self.sync(self.citizen, 'citizen-sync')
+        self.assertTrue(snapshot['reset'])
+        self.assertEqual([row['id'] for row in snapshot['reports']], [first.pk])
+
+        second = make_report(self.citizen)
+        feed = self.sync(self.citizen, 'citizen-sync', snapshot['cursor'])
+        self.assertFalse(feed['reset'])
+        self.assertEqual([row['id'] for row in feed['reports']], [second.pk])
+
+        feed = self.sync(self.citizen, 'citizen-sync', feed['cursor'])
+        self.assertEqual((feed['reports'], feed['removed']), ([], []))
+
+    def test_snapshot_cursor_stops_before_unsettled_changes(self):
+        report = make_report(self.citizen)
+        snapshot = self.sync(self.citizen, 'citizen-sync')
+        # The report's change row has not settled, so it comes again
+        feed = self.sync(self.citizen, 'citizen-sync', snapshot['cursor'])
+        self.assertEqual([row['id'] for row in feed['reports']], [report.pk])
+        self.assertEqual(feed['cursor'], snapshot['cursor'])
+        self.assertFalse(feed['has_more'])
+
+    @override_settings(SYNC_SETTLE_SECONDS=0)
+    def test_reassigned_task_is_removed(self):
+        report = make_report(self.citizen, assigned_to=self.collector, status=GarbageReport.Status.ASSIGNED)
+        snapshot = self.sync(self.collector, 'collector-sync')
+        self.assertEqual([row['id'] for row in snapshot['reports']], [report.pk])
+        other_snapshot = self.sync(self.other_collector, 'collector-sync')
+        self.assertEqual(other_snapshot['reports'], [])
+
+        report.assigned_to = self.other_collector
+        report.save()
+        feed = self.sync(self.collector, 'collector-sync', snapshot['cursor'])
+        self.assertEqual((feed['reports'], feed['removed']), ([], [report.pk]))
+        feed = self.sync(self.other_collector, 'collector-sync', other_snapshot['cursor'])
+        self.assertEqual([row['id'] for row in feed['reports']], [report.pk])
+
+    def test_invalid_cursor_resets(self):
+        make_report(self.citizen)
+        feed = self.sync(self.citizen, 'citizen-sync', 'not-a-cursor')
+        self.assertTrue(feed['reset'])
+        self.assertEqual(len(feed['reports']), 1)
+
+
+class AssignmentTests(TestCase):
+    """Auto-assignment plans respect capacity and share, and apply what still holds."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = User.objects.create(username='assign-citizen', role='citizen')
+        cls.admin = User.objects.create(username='assign-admin', role='admin')
+        cls.north = User.objects.create(username='assign-north', role='collector')
+        cls.south = User.objects.create(username='assign-south', role='collector')
+
+    def make_pending(self, count, latitude=12.97):
+        return [
+            make_report(self.citizen, latitude=latitude + index * 0.001, longitude=77.59)
+            for index in range(count)
+        ]
+
+    def test_assign_fills_slots_in_regret_order(self):
+        distances = np.array([
+            [1.0, 2.0],   # regret 1
+            [1.0, 9.0],   # regret 8, placed first
+            [5.0, 6.0],
+        ])
+        choice = _assign(distances, np.array([1, 1]))
+        self.assertEqual(choice.tolist(), [1, 0, -1])
+
+    def test_plan_caps_capacity(self):
+        reports = self.make_pending(4)
+        plan = plan_assignments(reports, [self.north, self.south], capacity=1)
+        self.assertEqual([len(entry['report_ids']) for entry in plan['collectors']], [1, 1])
+        self.assertEqual(len(plan['unassigned']), 2)
+
+    def test_plan_shares_workload_evenly(self):
+        for report in self.make_pending(2):
+            report.assigned_to = self.north
+            report.status = GarbageReport.Status.ASSIGNED
+            report.save()
+        reports = self.make_pending(4, latitude=12.90)
+        plan = plan_assignments(reports, [self.north, self.south], capacity=25)
+        north, south = plan['collectors']
+        # Six tasks in all, three each
+        self.assertEqual((north['current_load'], len(north['report_ids'])), (2, 1))
+        self.assertEqual((south['current_load'], len(south['report_ids'])), (0, 3))
+        self.assertEqual(plan['unassigned'], [])
+        self.assertAlmostEqual(
+            plan['total_distance_m'], north['distance_m'] + south['distance_m'], places=1
+        )
+
+    def test_dry_run_writes_nothing(self):
+        reports = self.make_pending(2)
+        response = client_for(self.admin).post(
+            reverse('admin-auto-assign'), {'dry_run': True}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['assigned'], 0)
+        self.assertEqual(
+            sorted(pk for entry in response.data['collectors'] for pk in entry['report_ids']),
+            sorted(report.pk for report in reports)
+        )
+        self.assertFalse(
+            GarbageReport.objects.exclude(status=GarbageReport.Status.PENDING).exists()
+        )
+        self.assertFalse(ReportUpdate.objects.exists())
+
+    def test_apply_assigns_and_broadcasts(self):
+        reports = self.make_pending(2)
+        with mock.patch('reports.broadcasts._send_bulk') as send_bulk, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = client_for(self.admin).post(
+                reverse('admin-auto-assign'), {'dry_run': False}, format='json'
+            )
+        self.assertEqual(response.data['assigned'], 2)
+        for report in reports:
+            report.refresh_from_db()
+            self.assertEqual(report.status, GarbageReport.Status.ASSIGNED)
+            self.assertIsNotNone(report.assigned_to_id)
+            self.assertEqual(report.updates.get().updated_by, self.admin)
+        payloads = send_bulk.call_args.args[0]
+        self.assertEqual(
+            {(payload['id'], payload['old_status'], payload['status']) for payload in payloads},
+            {(report.pk, 'pending', 'assigned') for report in reports}
+        )
+
+    def test_reports_no_longer_pending_are_returned_as_unassigned(self):
+        reports = self.make_pending(3)
+        plan = plan_assignments(reports, [self.north, self.south], capacity=25)
+        rejected = reports[0]
+        GarbageReport.objects.filter(pk=rejected.pk).update(status=GarbageReport.Status.REJECTED)
+
+        self.assertEqual(apply_plan(plan, self.admin), 2)
+        self.assertEqual(plan['unassigned'], [rejected.pk])
+        planned = [pk for entry in plan['collectors'] for pk in entry['report_ids']]
+        self.assertNotIn(rejected.pk, planned)
+        self.assertAlmostEqual(
+            plan['total_distance_m'],
+            sum(sum(entry['report_distances_m']) for entry in plan['collectors']),
+            places=1
+        )
+        rejected.refresh_from_db()
+        self.assertEqual(rejected.status, GarbageReport.Status.REJECTED)
+        self.assertFalse(rejected.updates.exists())
+
+
+def grid_osm(path, size=3, step=0.001, oneway_column=1):
+    """
+    A ``size`` x ``size`` street grid as OSM XML, with one one-way column
+    (southbound) and a footpath diagonal that cars cannot use.
+
+    Returns:
+        tuple: Node coordinates and the directed drivable (from, to) pairs
+    """
+    coords = [
+        (12.97 - row * step, 77.59 + column * step)
+        for row in range(size) for column in range(size)
+    ]
+    ways = []
+    for row in range(size):
+        ways.append(([row * size + column for column in range(size)], {'highway': 'residential'}))
+    for column in range(size):
+        tags = {'highway': 'residential'}
+        if column == oneway_column:
+            tags['oneway'] = 'yes'
+        ways.append(([row * size + column for row in range(size)], tags))
+    ways.append(([0, size * size - 1], {'highway': 'footway'}))
+
+    lines = ['<osm version="0.6">']
+    for node, (lat, lng) in enumerate(coords):
+        lines.append(f'<node id="{node + 1}" lat="{lat}" lon="{lng}"/>')
+    for way_id, (refs, tags) in enumerate(ways, start=1):
+        lines.append(f'<way id="{way_id}">')
+        lines += [f'<nd ref="{ref + 1}"/>' for ref in refs]
+        lines += [f'<tag k="{key}" v="{value}"/>' for key, value in tags.items()]
+        lines.append('</way>')
+    lines.append('</osm>')
+    Path(path).write_text('\n'.join(lines))
+
+    pairs = []
+    for refs, tags in ways:
+        if tags['highway'] == 'footway':
+            continue
+        for a, b in zip(refs, refs[1:]):
+            pairs.append((a, b))
+            if tags.get('oneway') != 'yes':
+                pairs.append((b, a))
+    return coords, pairs
+
+
+class RoadGraphTests(SimpleTestCase):
+    """The contraction hierarchy answers the same distances as a plain search."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp = tempfile.TemporaryDirectory()
+        osm_path = Path(cls.tmp.name) / 'grid.osm'
+        cls.graph_path = Path(cls.tmp.name) / 'grid.npz'
+        cls.coords, pairs = grid_osm(osm_path)
+        build_road_graph(osm_path, cls.graph_path)
+        cls.graph = RoadGraph(cls.graph_path)
+
+        # Floyd-Warshall over the same streets, in input node order
+        n = len(cls.coords)
+        cls.expected = np.full((n, n), np.inf)
+        np.fill_diagonal(cls.expected, 0.0)
+        for a, b in pairs:
+            cls.expected[a, b] = haversine_matrix([cls.coords[a]], [cls.coords[b]])[0, 0]
+        for k in range(n):
+            cls.expected = np.minimum(cls.expected, cls.expected[:, [k]] + cls.expected[[k], :])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+        super().tearDownClass()
+
+    def nodes(self):
+        return [self.graph.snap(lat, lng, 10)[0] for lat, lng in self.coords]
+
+    def test_matches_shortest_paths(self):
+        nodes = self.nodes()
+        self.assertEqual(len(set(nodes)), len(self.coords))
+        np.testing.assert_allclose(self.graph.matrix(nodes, nodes), self.expected, rtol=1e-9)
+
+    def test_one_way_street_is_asymmetric(self):
+        nodes = self.nodes()
+        top, bottom = nodes[1], nodes[7]
+        distances = self.graph.matrix([top, bottom], [top, bottom])
+        # Southbound straight down the one-way column, northbound around it
+        self.assertLess(distances[0, 1], distances[1, 0])
+
+    def test_snap_outside_radius(self):
+        self.assertEqual(self.graph.snap(13.5, 77.59, 500), (None, None))
+
+    def test_provider_falls_back_off_graph(self):
+        provider = RoadNetworkDistance(self.graph, snap_radius_m=50)
+        points = [self.coords[1], self.coords[7], (13.5, 77.59)]
+        result = provider.matrix(points)
+        self.assertAlmostEqual(result[0, 1], self.expected[1, 7])
+        self.assertAlmostEqual(result[1, 0], self.expected[7, 1])
+        self.assertAlmostEqual(result[0, 2], haversine_matrix(points[:1], points[2:])[0, 0])
+
+    def test_provider_setting(self):
+        with override_settings(DISTANCE_PROVIDER='road_network', ROAD_GRAPH_PATH=str(self.graph_path)):
+            self.assertIsInstance(get_distance_provider(), RoadNetworkDistance)
+        with override_settings(DISTANCE_PROVIDER='road_network', ROAD_GRAPH_PATH='/missing.npz'), \
+                self.assertLogs('reports.distances', 'WARNING'):
+            self.assertIsInstance(get_distance_provider(), HaversineDistance)
+
+
+class DistanceTests(SimpleTestCase):
+    """Straight-line distances and the matrix cache."""
+
+    def test_haversine(self):
+        distances = haversine_matrix([(0.0, 0.0), (1.0, 0.0)])
+        self.assertEqual(distances.shape, (2, 2))
+        self.assertEqual(distances[0, 0], 0.0)
+        # One degree of latitude
+        self.assertAlmostEqual(distances[0, 1], 111195.1, places=0)
+        self.assertEqual(distances[0, 1], distances[1, 0])
+
+    def test_lru_cache_evicts_least_recent(self):
+        lru = LRUCache(2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual((lru.get('a'), lru.get('b'), lru.get('c')), (1, None, 3))
+        self.assertEqual(len(lru), 2)
+
+
+class RouteTests(SimpleTestCase):
+    """Route refinement never makes a route longer."""
+
+    def test_never_longer_than_input_order(self):
+        rng = np.random.default_rng(7)
+        for n in (3, 5, 12, 40):
+            for symmetric in (True, False):
+                points = rng.uniform(0, 1000, size=(n + 1, 2))
+                matrix = np.linalg.norm(points[:, None] - points[None, :], axis=2)
+                if not symmetric:
+                    matrix = matrix * rng.uniform(1.0, 1.5, size=matrix.shape)
+                    np.fill_diagonal(matrix, 0.0)
+                initial = np.arange(n + 1)
+                route = improve_route(matrix, initial.copy(), time_budget_ms=50)
+                self.assertEqual(route[0], 0)
+                self.assertEqual(sorted(route.tolist()), initial.tolist())
+                self.assertLessEqual(
+                    route_length(matrix, route), route_length(matrix, initial) + 1e-6
+                )
+
+    def test_untangles_stops_on_a_line(self):
+        positions = np.array([0.0, 3.0, 1.0, 4.0, 2.0])
+        matrix = np.abs(positions[:, None] - positions[None, :])
+        result = optimize_route(None, [None] * 4, time_budget_ms=50, matrix=matrix)
+        # Stops at 3, 1, 4, 2 visited in order of position: 1, 2, 3, 4
+        self.assertEqual(result['order'], [1, 3, 0, 2])
+        self.assertEqual(result['total_distance_m'], 4.0)
+        self.assertLessEqual(result['total_distance_m'], result['greedy_distance_m'])
+
+
+class MergeReportsTests(TestCase):
+    """Duplicates are merged only into an open report."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = User.objects.create(username='merge-citizen', role='citizen')
+        cls.collector = User.objects.create(username='merge-collector', role='collector')
+        cls.admin = User.objects.create(username='merge-admin', role='admin')
+
+    def merge(self, primary, duplicate):
+        return client_for(self.admin).post(
+            reverse('admin-merge-reports', kwargs={'pk': primary.pk}),
+            {'duplicate_ids': [duplicate.pk]},
+            format='json'
+        )
+
+    def test_merge_into_open_report(self):
+        primary, duplicate = make_report(self.citizen), make_report(self.citizen)
+        response = self.merge(primary, duplicate)
+        self.assertEqual(response.status_code, 200)
+        duplicate.refresh_from_db()
+        self.assertEqual(duplicate.duplicate_of, primary)
+        self.assertEqual(duplicate.status, GarbageReport.Status.REJECTED)
+
+    def test_closed_primary_is_rejected(self):
+        for status in (GarbageReport.Status.COMPLETED, GarbageReport.Status.REJECTED):
+            with self.subTest(status=status):
+                primary = make_report(self.citizen, assigned_to=self.collector, status=status)
+                duplicate = make_report(self.citizen)
+                with self.assertRaisesMessage(ValueError, 'cannot take duplicates'):
+                    merge_reports(primary.pk, [duplicate.pk], self.admin)
+
+                response = self.merge(primary, duplicate)
+                self.assertEqual(response.status_code, 400)
+                duplicate.refresh_from_db()
+                self.assertIsNone(duplicate.duplicate_of_id)
+                self.assertEqual(duplicate.status, GarbageReport.Status.PENDING)
+
+
+class GeohashTests(SimpleTestCase):
+    """Geohash keys and the cells covering a search circle."""
+
+    def test_encode(self):
+        self.assertEqual(geohash.encode(42.6, -5.6, 5), 'ezs42')
+        self.assertEqual(geohash.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(len(geohash.encode(12.97, 77.59)), geohash.GEOHASH_PRECISION)
+
+    def test_migration_encoder_matches(self):
+        migration = importlib.import_module('reports.migrations.0005_garbagereport_spatial_keys')
+        for lat, lng in [(12.97, 77.59), (-33.86, 151.21), (0.0, 0.0), (89.9, -179.9)]:
+            self.assertEqual(migration.encode_geohash(lat, lng), geohash.encode(lat, lng))
+
+    def test_covering_cells_contain_circle(self):
+        rng = np.random.default_rng(3)
+        for radius in (20, 500, 5000):
+            for lat, lng in [(12.97, 77.59), (59.9, 10.75), (0.0, 179.999)]:
+                cells = geohash.covering_cells(lat, lng, radius)
+                precision = len(next(iter(cells)))
+                self.assertLessEqual(len(cells), 9)
+                for bearing in rng.uniform(0, 2 * np.pi, 50):
+                    dlat = radius * np.cos(bearing) / geohash.METERS_PER_DEGREE
+                    dlng = radius * np.sin(bearing) / (
+                        geohash.METERS_PER_DEGREE * np.cos(np.radians(lat))
+                    )
+                    point_lng = (lng + dlng + 180.0) % 360.0 - 180.0
+                    self.assertIn(geohash.encode(lat + dlat, point_lng, precision), cells)
+
+    def test_huge_radius_has_no_cells(self):
+        self.assertIsNone(geohash.covering_cells(12.97, 77.59, 10_000_000))
+
+
+class SpatialFilterTests(TestCase):
+    """?bbox=, ?near=&radius= and ?order=distance on report lists."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = User.objects.create(username='spatial-citizen', role='citizen')
+        cls.admin = User.objects.create(username='spatial-admin', role='admin')
+        # Roughly 110 m, 550 m and 11 km north of the search point
+        cls.near = make_report(cls.citizen, latitude=12.971, longitude=77.59)
+        cls.middle = make_report(cls.citizen, latitude=12.975, longitude=77.59)
+        cls.far = make_report(cls.citizen, latitude=13.07, longitude=77.59)
+
+    def ids(self, **params):
+        response = client_for(self.admin).get(reverse('admin-reports'), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [row['id'] for row in response.data['results']]
+
+    def test_bbox(self):
+        self.assertEqual(
+            set(self.ids(bbox='77.58,12.96,77.60,12.98')), {self.near.pk, self.middle.pk}
+        )
+
+    def test_near_radius(self):
+        self.assertEqual(self.ids(near='12.97,77.59', radius=200), [self.near.pk])
+        self.assertEqual(
+            set(self.ids(near='12.97,77.59', radius=1000)), {self.near.pk, self.middle.pk}
+        )
+
+    def test_order_by_distance(self):
+        # Newest first without it
+        self.assertEqual(
+            self.ids(near='12.97,77.59', radius=20000),
+            [self.far.pk, self.middle.pk, self.near.pk]
+        )
+        self.assertEqual(
+            self.ids(near='12.97,77.59', radius=20000, order='distance'),
+            [self.near.pk, self.middle.pk, self.far.pk]
+        )
+
+    def test_invalid_params(self):
+        client = client_for(self.admin)
+        for params in (
+            {'bbox': '77.60,12.96,77.58,12.98'},
+            {'near': '95,77.59'},
+            {'near': '12.97,77.59', 'radius': '-5'},
+            {'order': 'distance'},
+        ):
+            with self.subTest(params=params):
+                response = client.get(reverse('admin-reports'), params)
+                self.assertEqual(response.status_code, 400)
+
+
+class StatsPushTests(TestCase):
+    """Report changes reach admin dashboards as coalesced stats_update pushes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = User.objects.create(username='push-citizen', role='citizen')
+        cls.admin = User.objects.create(username='push-admin', role='admin')
+
+    def setUp(self):
+        cache.delete_many([*counters.ALL_KEYS, stats_push.PENDING_KEY])
+        self.channel_layer = get_channel_layer()
+        self.channel = async_to_sync(self.channel_layer.new_channel)()
+        async_to_sync(self.channel_layer.group_add)('dashboard_updates', self.channel)
+
+    def tearDown(self):
+        async_to_sync(self.channel_layer.flush)()
+
+    def receive(self):
+        return async_to_sync(self.channel_layer.receive)(self.channel)
+
+    @override_settings(DASHBOARD_STATS_PUSH_INTERVAL=0)
+    def test_push_after_commit_has_new_counts(self):
+        report = make_report(self.citizen)
+        counters.get_dashboard_stats()
+        with self.captureOnCommitCallbacks(execute=True):
+            client_for(self.admin).post(reverse('admin-reject-report', kwargs={'pk': report.pk}))
+
+        # Skip the per-report reports_update sent to the same group
+        message = self.receive()
+        while message['type'] != 'stats_update':
+            message = self.receive()
+        reports = message['stats']['reports']
+        self.assertEqual((reports['pending'], reports['rejected']), (0, 1))
+
+    @override_settings(DASHBOARD_STATS_PUSH_INTERVAL=2.0)
+    def test_burst_schedules_one_push(self):
+        with mock.patch('reports.stats_push.threading.Timer') as timer:
+            for _ in range(5):
+                with self.captureOnCommitCallbacks(execute=True):
+                    stats_push.schedule_stats_push()
+        timer.assert_called_once_with(2.0, stats_push._flush)
+        timer.return_value.start.assert_called_once_with()
+
+        # The next window schedules again
+        cache.delete(stats_push.PENDING_KEY)
+        with mock.patch('reports.stats_push.threading.Timer') as timer:
+            with self.captureOnCommitCallbacks(execute=True):
+                stats_push.schedule_stats_push()
+        timer.assert_called_once()
+
+    def test_waits_for_commit(self):
+        with mock.patch('reports.stats_push._open_window') as open_window:
+            with self.captureOnCommitCallbacks() as callbacks:
+                stats_push.schedule_stats_push()
+            open_window.assert_not_called()
+            callbacks[0]()
+        open_window.assert_called_once_with()
+
+
+@override_settings(ROUTE_AVERAGE_SPEED_KMH=36, ROUTE_SERVICE_MINUTES=5)
+class CollectorRouteTests(TestCase):
+    """The route endpoint orders a collector's open tasks and estimates arrival times."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = User.objects.create(username='route-citizen', role='citizen')
+        cls.collector = User.objects.create(username='route-collector', role='collector')
+        cls.other = User.objects.create(username='route-other', role='collector')
+        # North of the start along one meridian, created out of order
+        cls.far, cls.near, cls.middle = [
+            make_report(
+                cls.citizen, latitude=latitude, longitude=77.59,
+                assigned_to=cls.collector, status=GarbageReport.Status.ASSIGNED
+            )
+            for latitude in (12.973, 12.971, 12.972)
+        ]
+        cls.completed = make_report(
+            cls.citizen, latitude=12.9705, longitude=77.59,
+            assigned_to=cls.collector, status=GarbageReport.Status.COMPLETED
+        )
+        cls.not_mine = make_report(
+            cls.citizen, latitude=12.9705, longitude=77.59,
+            assigned_to=cls.other, status=GarbageReport.Status.ASSIGNED
+        )
+
+    def route(self, user=None, **data):
+        return client_for(user or self.collector).post(
+            reverse('collector-route'),
+            {'latitude': 12.97, 'longitude': 77.59, **data},
+            format='json'
+        )
+
+    def test_orders_open_tasks(self):
+        response = self.route()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['order'], [self.near.pk, self.middle.pk, self.far.pk])
+        self.assertEqual(response.data['distance_provider'], 'haversine')
+
+        stops = response.data['stops']
+        legs = [stop['leg_distance_m'] for stop in stops]
+        self.assertAlmostEqual(legs[0], 111.2, places=0)
+        self.assertAlmostEqual(stops[-1]['distance_from_start_m'], sum(legs), places=0)
+        self.assertAlmostEqual(response.data['total_distance_m'], sum(legs), places=0)
+        self.assertLessEqual(response.data['total_distance_m'], response.data['greedy_distance_m'])
+        self.assertEqual([stop['eta'] for stop in stops], sorted(stop['eta'] for stop in stops))
+
+        # 10 m/s travel plus five minutes at each of the three stops
+        expected = (response.data['total_distance_m'] / 10 + 3 * 300) / 60
+        self.assertAlmostEqual(response.data['estimated_duration_minutes'], expected, places=0)
+
+    def test_chosen_tasks(self):
+        response = self.route(task_ids=[self.far.pk, self.completed.pk])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['order'], [self.completed.pk, self.far.pk])
+
+    def test_other_collectors_tasks_rejected(self):
+        response = self.route(task_ids=[self.near.pk, self.not_mine.pk])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(self.not_mine.pk), response.data['error'])
+
+    def test_no_open_tasks(self):
+        GarbageReport.objects.filter(pk=self.not_mine.pk).update(status=GarbageReport.Status.COMPLETED)
+        response = self.route(user=self.other)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['order'], response.data['total_distance_m']), ([], 0.0))
+
+    def test_citizens_forbidden(self):
+        self.assertEqual(self.route(user=self.citizen).status_code, 403)
+
+
+@override_settings(RESPONSE_CACHE_SECONDS=0)
+class SparseFieldsTests(TestCase):
+    """?fields= and ?expand= shape report responses and what is queried."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = User.objects.create(username='sparse-citizen', role='citizen')
+        cls.collector = User.objects.create(username='sparse-collector', role='collector')
+        cls.report = make_report(
+            cls.citizen, assigned_to=cls.collector, status=GarbageReport.Status.ASSIGNED
+        )
+        ReportUpdate.objects.create(
+            report=cls.report, status=GarbageReport.Status.ASSIGNED, updated_by=cls.collector
+        )
+
+    def setUp(self):
+        self.client = client_for(self.citizen)
+        self.list_url = reverse('citizen-reports')
+        self.detail_url = reverse('citizen-report-detail', kwargs={'pk': self.report.pk})
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data['results'][0] if 'results' in response.data else response.data
+
+    def test_list_sends_ids_by_default(self):
+        with CaptureQueriesContext(connection) as queries:
+            row = self.get(self.list_url)
+        self.assertEqual(row['reported_by'], self.citizen.pk)
+        self.assertEqual(row['assigned_to'], self.collector.pk)
+        self.assertNotIn('updates', row)
+        self.assertFalse(any('reports_reportupdate' in query['sql'] for query in queries))
+
+    def test_detail_nests_everything_by_default(self):
+        data = self.get(self.detail_url)
+        self.assertEqual(data['reported_by']['username'], 'sparse-citizen')
+        self.assertEqual(data['assigned_to']['username'], 'sparse-collector')
+        self.assertEqual(len(data['updates']), 1)
+
+    def test_fields(self):
+        self.assertEqual(set(self.get(self.list_url, fields='id,status')), {'id', 'status'})
+        # Default expansions apply only to the fields asked for
+        data = self.get(self.detail_url, fields='id,assigned_to')
+        self.assertEqual(set(data), {'id', 'assigned_to'})
+        self.assertEqual(data['assigned_to']['id'], self.collector.pk)
+
+    def test_expand(self):
+        row = self.get(self.list_url, expand='updates')
+        self.assertEqual(row['reported_by'], self.citizen.pk)
+        self.assertEqual(row['updates'][0]['status'], GarbageReport.Status.ASSIGNED)
+
+        # Expanded relations are added to ?fields=
+        row = self.get(self.list_url, fields='id', expand='assigned_to')
+        self.assertEqual(set(row), {'id', 'assigned_to'})
+        self.assertEqual(row['assigned_to']['username'], 'sparse-collector')
+
+        # An empty ?expand= turns the detail's nesting off
+        data = self.get(self.detail_url, expand='')
+        self.assertEqual(data['assigned_to'], self.collector.pk)
+        self.assertNotIn('updates', data)
+
+    def test_unknown_names(self):
+        for params in ({'fields': 'id,secret'}, {'expand': 'owner'}):
+            with self.subTest(params=params):
+                response = self.client.get(self.list_url, params)
+                self.assertEqual(response.status_code, 400)
+
+
+class ResponseCacheTests(TestCase):
+    """Per-user response caching on a shared cache, invalidated by writes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = User.objects.create(username='cache-citizen', role='citizen')
+        cls.neighbour = User.objects.create(username='cache-neighbour', role='citizen')
+        cls.collector = User.objects.create(username='cache-collector', role='collector')
+        cls.admin = User.objects.create(username='cache-admin', role='admin')
+        cls.report = make_report(
+            cls.citizen, assigned_to=cls.collector, status=GarbageReport.Status.ASSIGNED
+        )
+        make_report(cls.neighbour)
+
+    def setUp(self):
+        # A file cache is shared by all workers, unlike locmem
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        shared = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': tmp.name,
+        }})
+        shared.enable()
+        self.addCleanup(shared.disable)
+        self.url = reverse('citizen-reports')
+
+    def statuses(self, user):
+        response = client_for(user).get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return [row['status'] for row in json.loads(response.content)['results']]
+
+    def test_repeat_request_is_served_from_cache(self):
+        self.assertEqual(self.statuses(self.citizen), ['assigned'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.statuses(self.citizen), ['assigned'])
+        stats = client_for(self.admin).get(reverse('admin-response-cache')).data
+        self.assertTrue(stats['enabled'])
+        self.assertEqual(
+            stats['endpoints']['citizen-reports'], {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+        )
+
+    def test_entries_are_per_user(self):
+        self.statuses(self.citizen)
+        self.assertEqual(self.statuses(self.neighbour), ['pending'])
+
+    def test_write_invalidates_affected_users(self):
+        self.statuses(self.citizen)
+        self.statuses(self.neighbour)
+        with self.captureOnCommitCallbacks(execute=True):
+            client_for(self.collector).post(
+                reverse('collector-update-status', kwargs={'pk': self.report.pk}),
+                {'status': GarbageReport.Status.IN_PROGRESS}
+            )
+        self.assertEqual(self.statuses(self.citizen), ['in_progress'])
+        # Untouched users keep their entries
+        with self.assertNumQueries(0):
+            self.statuses(self.neighbour)
+
+    def test_process_local_cache_is_off(self):
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}):
+            self.assertEqual(response_cache.get_cache_seconds(), 0)
+            self.statuses(self.citizen)
+            self.assertEqual(response_cache.get_stats()['citizen-reports']['misses'], 0)
+
+
+class ChangeTrackingTests(TestCase):
+    """post_save receivers see the values a row had before the save."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = User.objects.create(username='tracking-citizen', role='citizen')
+        cls.collector = User.objects.create(username='tracking-collector', role='collector')
+
+    def setUp(self):
+        self.report = make_report(self.citizen)
+        self.seen = []
+
+        def receiver(sender, instance, created, **kwargs):
+            if not created:
+                self.seen.append(instance.previous_values())
+        post_save.connect(receiver, sender=GarbageReport, weak=False)
+        self.addCleanup(post_save.disconnect, receiver, sender=GarbageReport)
+
+    def assign(self, report, **save_kwargs):
+        report.status = GarbageReport.Status.ASSIGNED
+        report.assigned_to = self.collector
+        report.save(**save_kwargs)
+
+    def test_loaded_instance_needs_no_extra_select(self):
+        report = GarbageReport.objects.get(pk=self.report.pk)
+        with CaptureQueriesContext(connection) as queries:
+            self.assign(report)
+        selects = [q['sql'] for q in queries if q['sql'].startswith('SELECT') and 'garbagereport' in q['sql']]
+        self.assertEqual(selects, [])
+        self.assertEqual(self.seen[-1]['status'], GarbageReport.Status.PENDING)
+        self.assertIsNone(self.seen[-1]['assigned_to_id'])
+        # The snapshot moves on with each save
+        self.assertEqual(report.previous_values()['status'], GarbageReport.Status.ASSIGNED)
+
+    def test_hand_built_and_deferred_instances(self):
+        for report in (
+            GarbageReport.objects.only('id', 'title').get(pk=self.report.pk),
+            GarbageReport(**{
+                field.attname: getattr(self.report, field.attname)
+                for field in GarbageReport._meta.concrete_fields
+            }),
+        ):
+            with self.subTest(report=report):
+                GarbageReport.objects.filter(pk=self.report.pk).update(
+                    status=GarbageReport.Status.PENDING, assigned_to=None
+                )
+                self.assign(report)
+                self.assertEqual(self.seen[-1]['status'], GarbageReport.Status.PENDING)
+
+    def test_update_fields(self):
+        report = GarbageReport.objects.get(pk=self.report.pk)
+        report.title = 'Renamed'
+        report.status = GarbageReport.Status.REJECTED
+        report.save(update_fields=['title'])
+        # Status was not written, so it has not changed
+        self.assertEqual(self.seen[-1]['status'], GarbageReport.Status.PENDING)
+        self.assertEqual(report.previous_values()['status'], GarbageReport.Status.PENDING)
+
+    def test_failed_save_keeps_snapshot(self):
+        report = GarbageReport.objects.get(pk=self.report.pk)
+        report.status = GarbageReport.Status.ASSIGNED
+        with mock.patch('django.db.models.Model.save', side_effect=DatabaseError), \
+                self.assertRaises(DatabaseError):
+            report.save()
+        self.assertEqual(report.previous_values()['status'], GarbageReport.Status.PENDING)
+
+    def test_counters_and_user_roles(self):
+        cache.delete_many(counters.ALL_KEYS)
+        counters.get_dashboard_stats()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assign(GarbageReport.objects.get(pk=self.report.pk))
+            citizen = User.objects.get(pk=self.citizen.pk)
+            citizen.role = 'collector'
+            citizen.save()
+        self.assertEqual(counters.get_dashboard_stats(), counters.count_from_database())
+
+
+class MapClusterTests(TestCase):
+    """The admin map clusters reports in the database below CLUSTER_MAX_ZOOM."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = User.objects.create(username='map-citizen', role='citizen')
+        cls.collector = User.objects.create(username='map-collector', role='collector')
+        cls.admin = User.objects.create(username='map-admin', role='admin')
+        # Two reports a few hundred metres apart, one far away, one rejected
+        make_report(cls.citizen, latitude=12.97, longitude=77.59, waste_type='organic')
+        make_report(
+            cls.citizen, latitude=12.971, longitude=77.592, waste_type='hazardous',
+            assigned_to=cls.collector, status=GarbageReport.Status.ASSIGNED
+        )
+        make_report(cls.citizen, latitude=13.5, longitude=77.0)
+        make_report(cls.citizen, latitude=12.97, longitude=77.59, status=GarbageReport.Status.REJECTED)
+
+    def get(self, **params):
+        return client_for(self.admin).get(reverse('admin-map'), params)
+
+    def test_clusters(self):
+        with self.assertNumQueries(2):
+            response = self.get(zoom=10)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['mode'], 'clusters')
+        clusters = sorted(response.data['clusters'], key=lambda cluster: -cluster['count'])
+        self.assertEqual([cluster['count'] for cluster in clusters], [2, 1])
+        pair = clusters[0]
+        self.assertEqual(pair['by_status'], {'pending': 1, 'assigned': 1})
+        self.assertEqual(pair['by_waste_type'], {'organic': 1, 'hazardous': 1})
+        self.assertEqual(pair['bounds'], [77.59, 12.97, 77.592, 12.971])
+        self.assertAlmostEqual(pair['latitude'], 12.9705)
+
+    def test_low_zoom_merges_everything(self):
+        clusters = self.get(zoom=3).data['clusters']
+        self.assertEqual([cluster['count'] for cluster in clusters], [3])
+
+    def test_markers_at_high_zoom(self):
+        data = self.get(zoom=CLUSTER_MAX_ZOOM).data
+        self.assertEqual(data['mode'], 'markers')
+        self.assertEqual(len(data['markers']), 3)
+
+    def test_bbox(self):
+        clusters = self.get(zoom=10, bbox='77.5,12.9,77.7,13.0').data['clusters']
+        self.assertEqual([cluster['count'] for cluster in clusters], [2])
+
+    def test_invalid_params(self):
+        for params in ({'zoom': '23'}, {'zoom': 'x'}, {'bbox': '1,2,3'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.get(**params).status_code, 400)
+
+
+class MapPayloadTests(TestCase):
+    """The columnar map payload and its ETag."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = User.objects.create(
+            username='payload-citizen', first_name='Meera', last_name='Rao', role='citizen'
+        )
+        cls.collector = User.objects.create(username='payload-collector', role='collector')
+        cls.admin = User.objects.create(username='payload-admin', role='admin')
+        cls.pending = make_report(cls.citizen, waste_type='organic')
+        cls.assigned = make_report(
+            cls.citizen, waste_type='mixed',
+            assigned_to=cls.collector, status=GarbageReport.Status.ASSIGNED
+        )
+
+    def setUp(self):
+        self.client = client_for(self.admin)
+        self.url = reverse('admin-map')
+
+    def test_columnar(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'format': 'columnar'})
+        data = json.loads(response.content)
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(data['names'], ['Meera Rao', 'payload-collector'])
+        rows = sorted(zip(
+            data['ids'], data['status_codes'], data['type_codes'], data['reported_by'], data['assigned_to']
+        ))
+        self.assertEqual(
+            [
+                (pk, data['statuses'][status], data['waste_types'][waste_type], reporter, collector)
+                for pk, status, waste_type, reporter, collector in rows
+            ],
+            [
+                (self.pending.pk, 'pending', 'organic', 0, -1),
+                (self.assigned.pk, 'assigned', 'mixed', 0, 1),
+            ]
+        )
+
+    def test_etag(self):
+        first = self.client.get(self.url)
+        etag = first['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        # Each format and zoom is its own representation
+        columnar = self.client.get(self.url, {'format': 'columnar'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(columnar.status_code, 200)
+        self.assertNotEqual(columnar['ETag'], etag)
+
+        # Any change to a mapped report changes the ETag
+        self.pending.status = GarbageReport.Status.ASSIGNED
+        self.pending.assigned_to = self.collector
+        self.pending.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class BulkStatusTests(TestCase):
+    """Bulk status updates apply valid items and report each failure."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = User.objects.create(username='bulk-citizen', role='citizen')
+        cls.collector = User.objects.create(username='bulk-collector', role='collector')
+        cls.other = User.objects.create(username='bulk-other', role='collector')
+        cls.admin = User.objects.create(username='bulk-admin', role='admin')
+
+    def task(self, collector=None, status=GarbageReport.Status.ASSIGNED):
+        return make_report(self.citizen, assigned_to=collector or self.collector, status=status)
+
+    def post(self, name, user, items):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client_for(user).post(reverse(name), {'items': items}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_collector_updates_own_tasks(self):
+        started, finished, not_mine, closed = (
+            self.task(), self.task(), self.task(self.other),
+            self.task(status=GarbageReport.Status.COMPLETED),
+        )
+        data = self.post('collector-bulk-update-status', self.collector, [
+            {'id': started.pk, 'status': 'in_progress'},
+            {'id': finished.pk, 'status': 'completed', 'note': 'Cleared'},
+            {'id': not_mine.pk, 'status': 'completed'},
+            {'id': closed.pk, 'status': 'in_progress'},
+            {'id': started.pk, 'status': 'completed'},
+            {'id': finished.pk, 'status': 'rejected'},
+        ])
+        self.assertEqual((data['updated'], data['failed']), (2, 4))
+        self.assertEqual(
+            [result['ok'] for result in data['results']], [True, True, False, False, False, False]
+        )
+        self.assertIn('not found', data['results'][2]['error'])
+        self.assertIn('more than once', data['results'][4]['error'])
+
+        for report, status in ((started, 'in_progress'), (finished, 'completed'), (not_mine, 'assigned')):
+            report.refresh_from_db()
+            self.assertEqual(report.status, status)
+        self.assertIsNotNone(finished.completed_at)
+        self.assertEqual(finished.updates.get().note, 'Cleared')
+        self.assertFalse(not_mine.updates.exists())
+
+    def test_admin_rejects_any_report(self):
+        pending, assigned = make_report(self.citizen), self.task(self.other)
+        data = self.post('admin-bulk-update-status', self.admin, [
+            {'id': pending.pk, 'status': 'rejected'},
+            {'id': assigned.pk, 'status': 'assigned'},
+        ])
+        self.assertEqual(data['updated'], 1)
+        self.assertIn('assign endpoint', data['results'][1]['error'])
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, GarbageReport.Status.REJECTED)
+
+    def test_bookkeeping(self):
+        reports = [self.task() for _ in range(3)]
+        cache.delete_many(counters.ALL_KEYS)
+        counters.get_dashboard_stats()
+        with mock.patch('reports.broadcasts._send_bulk') as send_bulk, \
+                CaptureQueriesContext(connection) as queries:
+            self.post('collector-bulk-update-status', self.collector, [
+                {'id': report.pk, 'status': 'completed'} for report in reports
+            ])
+        # One read, one UPDATE and one history INSERT for the whole batch
+        sql = [query['sql'] for query in queries]
+        for prefix in (
+            'SELECT "reports_garbagereport"',
+            'UPDATE "reports_garbagereport"',
+            'INSERT INTO "reports_reportupdate"',
+        ):
+            self.assertEqual(len([q for q in sql if q.startswith(prefix)]), 1, prefix)
+        self.assertEqual(counters.get_dashboard_stats(), counters.count_from_database())
+        send_bulk.assert_called_once()
+        self.assertEqual(len(send_bulk.call_args.args[0]), 3)
+
+    def test_invalid_requests(self):
+        client = client_for(self.collector)
+        url = reverse('collector-bulk-update-status')
+        self.assertEqual(client.post(url, {'items': []}, format='json').status_code, 400)
+        self.assertEqual(client.post(url, {'items': [{'id': 1}]}, format='json').status_code, 400)
+        response = client_for(self.citizen).post(
+            url, {'items': [{'id': 1, 'status': 'completed'}]}, format='json'
+        )
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,402 @@
+"""
+Report status transitions.
+
+``transition`` is the one write path for single-report status changes
+(collector progress, admin assignment and rejection). It checks the move
+against ALLOWED_TRANSITIONS and writes it as a conditional UPDATE of just
+the changed columns, guarded by the status and collector it read, so two
+concurrent requests cannot both move the same report; the loser re-reads
+and re-checks. The history entry and rollup bookkeeping commit in the
+same transaction; broadcasts, counter deltas and cache invalidation run
+once it commits.
+
+``bulk_transition`` and ``replay_operations`` (offline batches from the
+collector app, applied at most once per idempotency key) write many
+reports with one locking read, one bulk UPDATE and one history INSERT.
+
+The UPDATEs bypass the model signals, so the bookkeeping their receivers
+do for a save is done here explicitly, as in ``assignment.apply_plan``.
+"""
+from operator import itemgetter
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import counters, response_cache, sync
+from .broadcasts import broadcast_report_saved, broadcast_reports_updated
+from .models import GarbageReport, ReportUpdate, SyncOperation
+from .stats import record_report_changed, record_status_changes
+from .stats_push import schedule_stats_push
+
+Status = GarbageReport.Status
+
+# Current status -> statuses a report may move to. Assigned to assigned is
+# a reassignment; completed and rejected reports are final.
+ALLOWED_TRANSITIONS = {
+    Status.PENDING: {Status.ASSIGNED, Status.REJECTED},
+    Status.ASSIGNED: {Status.ASSIGNED, Status.IN_PROGRESS, Status.COMPLETED, Status.REJECTED},
+    Status.IN_PROGRESS: {Status.ASSIGNED, Status.COMPLETED, Status.REJECTED},
+    Status.COMPLETED: set(),
+    Status.REJECTED: set(),
+}
+
+# Statuses collectors may set on their own tasks
+COLLECTOR_STATUSES = {Status.IN_PROGRESS, Status.COMPLETED}
+
+# Re-reads after losing a race before giving up
+MAX_ATTEMPTS = 3
+
+# Reports per bulk status update
+MAX_BULK_STATUS_ITEMS = 200
+
+# Operations per offline sync batch
+MAX_SYNC_OPERATIONS = 200
+
+
+class InvalidTransition(ValueError):
+    """Raised when a report cannot move to the requested status."""
+
+
+class _Stale(Exception):
+    """Rolls back a transition whose report changed after it was read."""
+
+
+def sources_for(to_status):
+    """Statuses a report can move to ``to_status`` from."""
+    return {source for source, targets in ALLOWED_TRANSITIONS.items() if to_status in targets}
+
+
+def check_transition(report, to_status):
+    """
+    Raises:
+        InvalidTransition: If ``report`` cannot move to ``to_status``
+    """
+    if to_status not in ALLOWED_TRANSITIONS[report.status]:
+        raise InvalidTransition(f'Cannot move report {report.pk} from {report.status} to {to_status}')
+
+
+def _changes(to_status, now):
+    """Column values written by a move to ``to_status``."""
+    changes = {'status': to_status, 'updated_at': now}
+    if to_status == Status.COMPLETED:
+        changes['completed_at'] = now
+    return changes
+
+
+def transition(report_id, to_status, actor, note='', collector=None, queryset=None):
+    """
+    Move a report to ``to_status`` and record it in the report's history.
+
+    Args:
+        report_id: Primary key of the report
+        to_status: Target status
+        actor: User making the change, recorded on the history entry
+        note: History note
+        collector: Collector to assign; required when assigning
+        queryset: Reports the actor may change (default all)
+
+    Returns:
+        GarbageReport: The report with its new values
+
+    Raises:
+        GarbageReport.DoesNotExist: If the report is not in ``queryset``
+        InvalidTransition: If the move is not allowed from the report's
+            current status, or the report kept changing underneath
+        ValueError: If an assignment has no collector
+    """
+    if to_status == Status.ASSIGNED and collector is None:
+        raise ValueError('A collector is required to assign a report')
+    queryset = GarbageReport.objects.all() if queryset is None else queryset
+
+    for _ in range(MAX_ATTEMPTS):
+        report = queryset.get(pk=report_id)
+        old_status, old_collector_id = report.status, report.assigned_to_id
+        check_transition(report, to_status)
+
+        changes = _changes(to_status, timezone.now())
+        if collector is not None:
+            changes['assigned_to'] = collector
+
+        for name, value in changes.items():
+            setattr(report, name, value)
+        try:
+            with transaction.atomic():
+                # Insert the history first, so the report row is only locked
+                # from its UPDATE to the commit
+                ReportUpdate.objects.create(
+                    report=report,
+                    status=to_status,
+                    note=note,
+                    updated_by=actor
+                )
+                _record_transition(report, old_status, old_collector_id)
+                updated = GarbageReport.objects.filter(
+                    pk=report.pk,
+                    status=old_status,
+                    assigned_to_id=old_collector_id
+                ).update(**changes)
+                if not updated:
+                    raise _Stale
+                # Last: the rollup rows are shared by every writer
+                record_report_changed(report, old_status=old_status, old_waste_type=report.waste_type)
+        except _Stale:
+            # Changed since we read it; re-read and re-check
+            continue
+        report.mark_saved(changes)
+        return report
+
+    raise InvalidTransition(f'Report {report_id} is being changed by someone else; try again')
+
+
+def _record_transition(report, old_status, old_collector_id):
+    """What the report post_save receivers would do for this change."""
+    counters.report_status_changed(old_status, report.status)
+    sync.record_report_saved(report, old_collector_id=old_collector_id)
+    response_cache.invalidate_users(
+        [report.reported_by_id, report.assigned_to_id, old_collector_id]
+    )
+    schedule_stats_push()
+    broadcast_report_saved(
+        report,
+        created=False,
+        old_status=old_status,
+        old_collector_id=old_collector_id
+    )
+
+
+def _check_item(report, item, statuses):
+    """
+    Check one item of a bulk change against the report it names.
+
+    Raises:
+        GarbageReport.DoesNotExist: If ``report`` is ``None``
+        InvalidTransition: If the item's status is not allowed here or not
+            reachable from the report's current status
+    """
+    if report is None:
+        raise GarbageReport.DoesNotExist(f"Report {item['id']} not found")
+    if statuses is not None and item['status'] not in statuses:
+        raise InvalidTransition(f"Cannot set {item['status']} here")
+    if item['status'] == Status.ASSIGNED:
+        raise InvalidTransition('Assigning needs a collector; use the assign endpoint')
+    check_transition(report, item['status'])
+
+
+def bulk_transition(items, actor, queryset=None, statuses=None):
+    """
+    Move many reports in one transaction, each to its own status.
+
+    The reports are read and locked with one query, so only reports in
+    ``queryset`` can change. Valid items are written with one bulk UPDATE
+    and one history INSERT; clients hear about them in one event per
+    dashboard, reporter, collector and report subscription. Assigning needs
+    a collector per report and is not supported here.
+
+    Args:
+        items: Dicts with ``id``, ``status`` and an optional ``note``
+        actor: User making the changes, recorded on the history entries
+        queryset: Reports the actor may change (default all)
+        statuses: Statuses the actor may set (default any)
+
+    Returns:
+        list: One ``{id, ok, status}`` or ``{id, ok, error}`` per item, in
+        order
+    """
+    queryset = GarbageReport.objects.all() if queryset is None else queryset
+    now = timezone.now()
+    results = []
+    changed = []
+    old_statuses = {}
+    updates = []
+
+    with transaction.atomic():
+        # Locked in pk order, so concurrent batches cannot deadlock
+        reports = queryset.select_for_update().order_by('pk').in_bulk([item['id'] for item in items])
+        for item in items:
+            report = reports.get(item['id'])
+            try:
+                if report is not None and report.pk in old_statuses:
+                    raise ValueError(f'Report {report.pk} is listed more than once')
+                _check_item(report, item, statuses)
+            except (GarbageReport.DoesNotExist, ValueError) as e:
+                results.append({'id': item['id'], 'ok': False, 'error': str(e)})
+                continue
+
+            old_statuses[report.pk] = report.status
+            for name, value in _changes(item['status'], now).items():
+                setattr(report, name, value)
+            changed.append(report)
+            updates.append(ReportUpdate(
+                report=report,
+                status=report.status,
+                note=item.get('note', ''),
+                updated_by=actor
+            ))
+            results.append({'id': report.pk, 'ok': True, 'status': report.status})
+
+        if changed:
+            GarbageReport.objects.bulk_update(changed, ['status', 'updated_at', 'completed_at'])
+            ReportUpdate.objects.bulk_create(updates)
+            _record_bulk_transition(changed, updates, old_statuses)
+
+    for report in changed:
+        report.mark_saved(['status', 'updated_at', 'completed_at'])
+    return results
+
+
+def _record_bulk_transition(reports, updates, old_statuses):
+    """Signal-receiver bookkeeping for a bulk_transition, grouped by move."""
+    moves = {}
+    for report in reports:
+        moves.setdefault((old_statuses[report.pk], report.status), []).append(report)
+
+    for (old_status, new_status), moved in moves.items():
+        counters.report_status_changed(old_status, new_status, count=len(moved))
+    sync.record_reports_saved(reports)
+    sync.record_updates_created(updates)
+    response_cache.invalidate_users(
+        {report.reported_by_id for report in reports} | {report.assigned_to_id for report in reports}
+    )
+    schedule_stats_push()
+    broadcast_reports_updated(reports, old_statuses)
+    # Last: the rollup rows are shared by every writer
+    for (old_status, new_status), moved in moves.items():
+        record_status_changes(
+            [(report.created_at, report.waste_type) for report in moved],
+            old_status,
+            new_status
+        )
+
+
+def replay_operations(operations, actor, queryset=None, statuses=None):
+    """
+    Apply a batch of status changes queued by an offline app, once each.
+
+    Every operation carries a client-chosen ``key``. Keys the actor has sent
+    before are answered from their recorded result, so replaying a batch
+    after a lost response costs one indexed lookup and writes nothing. New
+    operations are applied in one transaction, in client timestamp order
+    (ties keep the order sent), so a report can be started and completed in
+    the same batch. Operations that fail (the report was reassigned or
+    closed while the app was offline) are recorded too; a retry gets the
+    same answer rather than a second attempt.
+
+    Args:
+        operations: Dicts with ``key``, ``id``, ``status``,
+            ``client_timestamp`` and an optional ``note``
+        actor: User replaying the operations
+        queryset: Reports the actor may change (default all)
+        statuses: Statuses the actor may set (default any)
+
+    Returns:
+        list: One ``{key, id, ok, replayed, status}`` or
+        ``{key, id, ok, replayed, error}`` per operation, in the order sent
+
+    Raises:
+        InvalidTransition: If the same keys kept being recorded by a
+            concurrent request
+    """
+    queryset = GarbageReport.objects.all() if queryset is None else queryset
+    keys = {operation['key'] for operation in operations}
+
+    recorded, fresh = _recorded_operations(actor, keys), set()
+    if len(recorded) < len(keys):
+        for _ in range(MAX_ATTEMPTS):
+            try:
+                recorded, fresh = _apply_operations(operations, actor, queryset, statuses)
+                break
+            except IntegrityError:
+                # A concurrent replay recorded some of these keys first
+                continue
+        else:
+            raise InvalidTransition('These operations are being replayed by another request; try again')
+
+    results = []
+    for operation in operations:
+        recorded_operation = recorded[operation['key']]
+        result = {
+            'key': operation['key'],
+            'id': recorded_operation.report_id,
+            'ok': recorded_operation.applied,
+            'replayed': operation['key'] not in fresh,
+        }
+        if recorded_operation.applied:
+            result['status'] = recorded_operation.status
+        else:
+            result['error'] = recorded_operation.error
+        results.append(result)
+        # Repeats of a key within the batch are replays of its first use
+        fresh.discard(operation['key'])
+    return results
+
+
+def _recorded_operations(actor, keys):
+    """The actor's recorded operations for ``keys``, by key."""
+    return {
+        operation.key: operation
+        for operation in SyncOperation.objects.filter(user=actor, key__in=keys)
+    }
+
+
+def _apply_operations(operations, actor, queryset, statuses):
+    """
+    Apply and record the operations whose keys are new.
+
+    Returns:
+        tuple: Recorded operations by key, and the keys recorded now
+    """
+    now = timezone.now()
+    changed = {}
+    old_statuses = {}
+    updates = []
+    new_operations = []
+
+    with transaction.atomic():
+        # Locked in pk order, so concurrent batches cannot deadlock
+        reports = queryset.select_for_update().order_by('pk').in_bulk(
+            {operation['id'] for operation in operations}
+        )
+        # Looked up again under the locks, so a replay that committed while
+        # we waited is seen
+        recorded = _recorded_operations(actor, {operation['key'] for operation in operations})
+
+        for operation in sorted(operations, key=itemgetter('client_timestamp')):
+            if operation['key'] in recorded:
+                continue
+            report = reports.get(operation['id'])
+            error = ''
+            try:
+                _check_item(report, operation, statuses)
+            except (GarbageReport.DoesNotExist, ValueError) as e:
+                error = str(e)
+            else:
+                old_statuses.setdefault(report.pk, report.status)
+                for name, value in _changes(operation['status'], now).items():
+                    setattr(report, name, value)
+                changed[report.pk] = report
+                updates.append(ReportUpdate(
+                    report=report,
+                    status=report.status,
+                    note=operation.get('note', ''),
+                    updated_by=actor
+                ))
+            recorded[operation['key']] = SyncOperation(
+                user=actor,
+                key=operation['key'],
+                report_id=operation['id'],
+                status=operation['status'],
+                applied=not error,
+                error=error[:255],
+                client_timestamp=operation['client_timestamp']
+            )
+            new_operations.append(recorded[operation['key']])
+
+        SyncOperation.objects.bulk_create(new_operations)
+        if changed:
+            GarbageReport.objects.bulk_update(changed.values(), ['status', 'updated_at', 'completed_at'])
+            ReportUpdate.objects.bulk_create(updates)
+            _record_bulk_transition(list(changed.values()), updates, old_statuses)
+
+    for report in changed.values():
+        report.mark_saved(['status', 'updated_at', 'completed_at'])
+    return recorded, {operation.key for operation in new_operations}
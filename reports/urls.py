@@ -3,16 +3,28 @@ from .views import (
     # Citizen views
     CitizenReportListCreateView,
     CitizenReportDetailView,
+    CitizenSyncView,
     # Collector views
     CollectorTaskListView,
     CollectorTaskDetailView,
     CollectorUpdateStatusView,
+    CollectorBulkStatusView,
+    CollectorSyncView,
+    CollectorSyncOperationsView,
+    CollectorRouteView,
     # Admin views
     AdminReportListView,
+    AdminReportExportView,
+    AdminReportImportView,
+    AdminReportImportDetailView,
     AdminReportDetailView,
     AdminAssignCollectorView,
     AdminRejectReportView,
+    AdminMergeReportsView,
+    AdminAutoAssignView,
+    AdminBulkStatusView,
     AdminDashboardStatsView,
+    AdminResponseCacheStatsView,
     AdminMapDataView,
     AdminReportAnalyticsView,
 )
@@ -21,18 +33,30 @@ urlpatterns = [
     # Citizen endpoints
     path('citizen/reports/', CitizenReportListCreateView.as_view(), name='citizen-reports'),
     path('citizen/reports/<int:pk>/', CitizenReportDetailView.as_view(), name='citizen-report-detail'),
+    path('citizen/sync/', CitizenSyncView.as_view(), name='citizen-sync'),
     
     # Collector endpoints
     path('collector/tasks/', CollectorTaskListView.as_view(), name='collector-tasks'),
+    path('collector/tasks/bulk-update-status/', CollectorBulkStatusView.as_view(), name='collector-bulk-update-status'),
+    path('collector/tasks/route/', CollectorRouteView.as_view(), name='collector-route'),
     path('collector/tasks/<int:pk>/', CollectorTaskDetailView.as_view(), name='collector-task-detail'),
     path('collector/tasks/<int:pk>/update-status/', CollectorUpdateStatusView.as_view(), name='collector-update-status'),
+    path('collector/sync/', CollectorSyncView.as_view(), name='collector-sync'),
+    path('collector/sync/operations/', CollectorSyncOperationsView.as_view(), name='collector-sync-operations'),
     
     # Admin endpoints
     path('admin/reports/', AdminReportListView.as_view(), name='admin-reports'),
+    path('admin/reports/export/', AdminReportExportView.as_view(), name='admin-report-export'),
+    path('admin/reports/import/', AdminReportImportView.as_view(), name='admin-report-import'),
+    path('admin/reports/import/<int:pk>/', AdminReportImportDetailView.as_view(), name='admin-report-import-detail'),
+    path('admin/reports/bulk-update-status/', AdminBulkStatusView.as_view(), name='admin-bulk-update-status'),
+    path('admin/reports/auto-assign/', AdminAutoAssignView.as_view(), name='admin-auto-assign'),
     path('admin/reports/<int:pk>/', AdminReportDetailView.as_view(), name='admin-report-detail'),
     path('admin/reports/<int:pk>/assign/', AdminAssignCollectorView.as_view(), name='admin-assign-collector'),
     path('admin/reports/<int:pk>/reject/', AdminRejectReportView.as_view(), name='admin-reject-report'),
+    path('admin/reports/<int:pk>/merge/', AdminMergeReportsView.as_view(), name='admin-merge-reports'),
     path('admin/dashboard/', AdminDashboardStatsView.as_view(), name='admin-dashboard'),
+    path('admin/response-cache/', AdminResponseCacheStatsView.as_view(), name='admin-response-cache'),
     path('admin/map/', AdminMapDataView.as_view(), name='admin-map'),
     path('admin/analytics/', AdminReportAnalyticsView.as_view(), name='admin-analytics'),
 ]
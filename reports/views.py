@@ -1,21 +1,84 @@
+import io
+import json
+from datetime import timedelta
+
 from rest_framework import generics, status, permissions, filters
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.settings import api_settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.http import parse_http_date_safe
 from django.db import models
-from django.db.models import Count, Q
-from django.db.models.functions import TruncDate
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+from backend.pagination import EstimatedCountKeysetPagination, KeysetPagination
+from backend.search import FullTextSearchFilter
 
-from .models import GarbageReport, ReportUpdate
+from .models import GarbageReport, ReportImport, ReportDailyStats
+from .counters import get_dashboard_stats
+from .exports import EXPORT_DATASETS, EXPORT_FORMATS, iter_export
+from .imports import IMPORT_FORMATS, format_for, get_resumable_import, run_import
+from .filters import REPORT_SEARCH_FIELDS, REPORT_SEARCH_INDEX, filter_reports
+from .geo import (
+    CLUSTER_MAX_ZOOM,
+    apply_spatial_filters,
+    cluster_reports,
+    filter_bbox,
+    parse_bbox,
+)
+from .analytics import GRANULARITIES, bucket_starts, range_bounds, resolution_time_stats
 from .serializers import (
     GarbageReportSerializer,
     GarbageReportCreateSerializer,
+    AdminReportDetailSerializer,
+    DuplicateCandidateSerializer,
+    MergeReportsSerializer,
+    RouteRequestSerializer,
+    AutoAssignSerializer,
     AssignCollectorSerializer,
     UpdateStatusSerializer,
-    ReportUpdateSerializer,
+    BulkStatusUpdateSerializer,
+    SyncOperationBatchSerializer,
+    ReportImportSerializer,
     MapReportSerializer,
+    SyncReportSerializer,
+    SyncReportUpdateSerializer,
+    REPORT_EXPANDABLE,
+    columnar_map_data,
+    prefetch_report_relations,
+)
+from .conditional import (
+    etag_matches,
+    is_not_modified,
+    make_etag,
+    queryset_validator,
+    validator_headers,
+)
+from . import response_cache
+from .renderers import ColumnarJSONRenderer
+from .sync import build_feed
+from .duplicates import duplicates_of_report, merge_reports
+from .assignment import active_collectors, apply_plan, pending_reports, plan_assignments
+from .distances import get_distance_provider
+from .transitions import (
+    COLLECTOR_STATUSES,
+    InvalidTransition,
+    bulk_transition,
+    replay_operations,
+    transition,
+)
+from .routes import (
+    MAX_ROUTE_STOPS,
+    get_average_speed_kmh,
+    get_service_minutes,
+    optimize_route,
 )
 
 User = get_user_model()
@@ -42,11 +105,178 @@ class IsCitizen(permissions.BasePermission):
         return request.user.role == 'citizen'
 
 
+def serialize_report(report, serializer_class=GarbageReportSerializer, context=None):
+    """Re-read a just-written report with its relations and serialize it."""
+    context = context or {}
+    report = prefetch_report_relations(
+        GarbageReport.objects.all(), context.get('expand')
+    ).get(pk=report.pk)
+    return serializer_class(report, context=context).data
+
+
+def _field_names(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def sparse_fields_context(request, serializer_class, default_expand=REPORT_EXPANDABLE):
+    """
+    Serializer context for ``?fields=`` and ``?expand=``.
+    
+    Explicitly expanded relations are always included; default ones only
+    if ``?fields=`` asks for them.
+    
+    Raises:
+        ValidationError: If a name is not a field or relation of the serializer
+    """
+    params = request.query_params
+    fields = None
+    if 'fields' in params:
+        fields = _field_names(params['fields'])
+        unknown = fields - set(serializer_class.Meta.fields)
+        if unknown:
+            raise ValidationError({'error': f"Unknown fields: {', '.join(sorted(unknown))}"})
+    
+    if 'expand' in params:
+        expand = _field_names(params['expand'])
+        unknown = expand - set(REPORT_EXPANDABLE)
+        if unknown:
+            raise ValidationError({'error': f"Cannot expand: {', '.join(sorted(unknown))}"})
+        if fields is not None:
+            fields |= expand
+    else:
+        expand = set(default_expand)
+        if fields is not None:
+            expand &= fields
+    return {'fields': fields, 'expand': expand}
+
+
+class SparseFieldsetMixin:
+    """
+    Adds ?fields= and ?expand= to report views.
+    
+    ``?fields=id,title,status`` limits each report to those fields.
+    ``?expand=updates,reported_by,assigned_to`` nests those relations;
+    unexpanded users are sent as ids and unexpanded history is left out.
+    Only expanded relations are joined or prefetched. Views expand
+    ``default_expand`` when no ``?expand=`` is given.
+    """
+    
+    default_expand = REPORT_EXPANDABLE
+    
+    def get_sparse_fields(self):
+        return sparse_fields_context(self.request, self.get_serializer_class(), self.default_expand)
+    
+    def get_report_queryset(self, queryset):
+        return prefetch_report_relations(queryset, self.get_sparse_fields()['expand'])
+    
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), **self.get_sparse_fields()}
+
+
+class ConditionalGetMixin:
+    """
+    ETag and Last-Modified validators for per-user report lists and details.
+    
+    The validator is the latest ``updated_at`` and row count of the user's
+    filtered reports (one aggregate on the per-user indexes). Requests whose
+    If-None-Match matches get 304 Not Modified before anything is serialized.
+    If-Modified-Since alone is only trusted on detail views, since a list can
+    lose rows without its latest ``updated_at`` changing.
+    """
+    
+    def is_detail(self):
+        return (self.lookup_url_kwarg or self.lookup_field) in self.kwargs
+    
+    def get_validator_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.is_detail():
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+    
+    def get(self, request, *args, **kwargs):
+        validator = queryset_validator(self.get_validator_queryset())
+        last_modified = validator['last_modified']
+        etag = make_etag(
+            request.user.pk,
+            last_modified.isoformat() if last_modified else None,
+            validator['count'],
+            request.get_full_path(),
+            request.accepted_renderer.format
+        )
+        headers = validator_headers(etag, last_modified)
+        
+        # A missing detail skips the check so the lookup can 404
+        exists = validator['count'] or not self.is_detail()
+        if exists and is_not_modified(request, etag, last_modified, trust_date=self.is_detail()):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            for name, value in headers.items():
+                response[name] = value
+        return response
+
+
+class CachedResponseMixin:
+    """
+    Serve GETs from the per-user response cache (see reports.response_cache).
+    
+    Goes in front of ConditionalGetMixin: cached entries keep their ETag and
+    Last-Modified, so a matching poll gets its 304 without touching the
+    database.
+    """
+    
+    def get(self, request, *args, **kwargs):
+        timeout = response_cache.get_cache_seconds()
+        if not timeout:
+            return super().get(request, *args, **kwargs)
+        
+        name = request.resolver_match.url_name
+        key = response_cache.response_key(request, response_cache.get_version(request.user.pk))
+        entry = cache.get(key)
+        if entry is not None:
+            response_cache.record('hits', name)
+            if is_not_modified(request, entry['etag'], entry['last_modified'], trust_date=self.is_detail()):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=entry['headers'])
+            return HttpResponse(entry['content'], content_type=entry['content_type'], headers=entry['headers'])
+        
+        response_cache.record('misses', name)
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            def store(rendered):
+                cache.set(key, {
+                    'content': rendered.content,
+                    'content_type': rendered['Content-Type'],
+                    'etag': rendered.get('ETag'),
+                    'last_modified': parse_http_date_safe(rendered.get('Last-Modified', '')),
+                    'headers': {
+                        header: rendered[header]
+                        for header in ('ETag', 'Last-Modified') if header in rendered
+                    },
+                }, timeout=timeout)
+            response.add_post_render_callback(store)
+        return response
+
+
+class SpatialFilterMixin:
+    """Adds ?bbox=, ?near=lat,lng&radius= and ?order=distance to list views."""
+    
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        try:
+            return apply_spatial_filters(queryset, self.request.query_params)
+        except ValueError as e:
+            raise ValidationError({'error': str(e)})
+
+
 # Citizen Views
-class CitizenReportListCreateView(generics.ListCreateAPIView):
+class CitizenReportListCreateView(CachedResponseMixin, ConditionalGetMixin, SparseFieldsetMixin, SpatialFilterMixin, generics.ListCreateAPIView):
     """API view for citizens to list their reports and create new ones."""
     
     permission_classes = [permissions.IsAuthenticated, IsCitizen]
+    pagination_class = KeysetPagination
+    default_expand = ()
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -54,43 +284,228 @@ class CitizenReportListCreateView(generics.ListCreateAPIView):
         return GarbageReportSerializer
     
     def get_queryset(self):
-        return GarbageReport.objects.filter(reported_by=self.request.user)
+        return self.get_report_queryset(
+            GarbageReport.objects.filter(reported_by=self.request.user)
+        )
     
     def perform_create(self, serializer):
-        serializer.save(reported_by=self.request.user)
+        report = serializer.save(reported_by=self.request.user)
+        self.possible_duplicates = duplicates_of_report(report)
+    
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.data['possible_duplicates'] = DuplicateCandidateSerializer(
+            self.possible_duplicates, many=True, context=self.get_serializer_context()
+        ).data
+        return response
 
 
-class CitizenReportDetailView(generics.RetrieveAPIView):
+class CitizenReportDetailView(CachedResponseMixin, ConditionalGetMixin, SparseFieldsetMixin, generics.RetrieveAPIView):
     """API view for citizens to view their report details."""
     
     serializer_class = GarbageReportSerializer
     permission_classes = [permissions.IsAuthenticated, IsCitizen]
     
     def get_queryset(self):
-        return GarbageReport.objects.filter(reported_by=self.request.user)
+        return self.get_report_queryset(
+            GarbageReport.objects.filter(reported_by=self.request.user)
+        )
+
+
+class ReportSyncView(APIView):
+    """
+    Base change-feed endpoint for the mobile apps.
+    
+    GET with ``?cursor=`` from the previous response returns only the
+    reports, updates and removals since then. Without a cursor, or with an
+    expired one, the full view is returned with ``reset: true``.
+    """
+    
+    # Report field pointing at the syncing user; its reports are the view
+    owner_field = 'reported_by'
+    
+    def get(self, request):
+        feed = build_feed(
+            request.user,
+            GarbageReport.objects.filter(**{self.owner_field: request.user}),
+            cursor=request.query_params.get('cursor')
+        )
+        reports = feed['reports'].select_related('reported_by', 'assigned_to')
+        updates = feed['updates'].select_related('updated_by').order_by('id')
+        return Response({
+            'reports': SyncReportSerializer(
+                reports, many=True, context={'request': request}
+            ).data,
+            'updates': SyncReportUpdateSerializer(updates, many=True).data,
+            'removed': feed['removed'],
+            'cursor': feed['cursor'],
+            'has_more': feed['has_more'],
+            'reset': feed['reset'],
+        })
+
+
+class CitizenSyncView(ReportSyncView):
+    """Change feed of a citizen's own reports."""
+    
+    permission_classes = [permissions.IsAuthenticated, IsCitizen]
 
 
 # Collector Views
-class CollectorTaskListView(generics.ListAPIView):
+class CollectorTaskListView(CachedResponseMixin, ConditionalGetMixin, SparseFieldsetMixin, SpatialFilterMixin, generics.ListAPIView):
     """API view for collectors to view their assigned tasks."""
     
     serializer_class = GarbageReportSerializer
     permission_classes = [permissions.IsAuthenticated, IsCollector]
+    pagination_class = KeysetPagination
+    default_expand = ()
     
     def get_queryset(self):
-        return GarbageReport.objects.filter(
-            assigned_to=self.request.user
+        return self.get_report_queryset(
+            GarbageReport.objects.filter(assigned_to=self.request.user)
         )
 
 
-class CollectorTaskDetailView(generics.RetrieveAPIView):
+class CollectorTaskDetailView(CachedResponseMixin, ConditionalGetMixin, SparseFieldsetMixin, generics.RetrieveAPIView):
     """API view for collectors to view task details."""
     
     serializer_class = GarbageReportSerializer
     permission_classes = [permissions.IsAuthenticated, IsCollector]
     
     def get_queryset(self):
-        return GarbageReport.objects.filter(assigned_to=self.request.user)
+        return self.get_report_queryset(
+            GarbageReport.objects.filter(assigned_to=self.request.user)
+        )
+
+
+class CollectorSyncView(ReportSyncView):
+    """Change feed of a collector's assigned tasks."""
+    
+    permission_classes = [permissions.IsAuthenticated, IsCollector]
+    owner_field = 'assigned_to'
+
+
+class CollectorSyncOperationsView(APIView):
+    """
+    API view for the collector app to replay status changes made offline.
+    
+    POST ``{"operations": [{"key", "id", "status", "note",
+    "client_timestamp"}, ...]}``. Keys already seen are answered from their
+    recorded result without writing again, so the app can resend a batch
+    until it gets a response. Returns one result per operation plus the
+    current state of every task it named; tasks no longer assigned to the
+    collector are listed in ``removed``.
+    """
+    
+    permission_classes = [permissions.IsAuthenticated, IsCollector]
+    
+    def post(self, request):
+        serializer = SyncOperationBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        operations = serializer.validated_data['operations']
+        
+        tasks = GarbageReport.objects.filter(assigned_to=request.user)
+        try:
+            results = replay_operations(
+                operations,
+                actor=request.user,
+                queryset=tasks,
+                statuses=COLLECTOR_STATUSES
+            )
+        except InvalidTransition as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        
+        named = {operation['id'] for operation in operations}
+        reports = list(tasks.filter(pk__in=named).select_related('reported_by', 'assigned_to').order_by('id'))
+        fresh = [result for result in results if not result['replayed']]
+        return Response({
+            'results': results,
+            'applied': sum(1 for result in fresh if result['ok']),
+            'failed': sum(1 for result in fresh if not result['ok']),
+            'replayed': len(results) - len(fresh),
+            'reports': SyncReportSerializer(
+                reports, many=True, context={'request': request}
+            ).data,
+            'removed': sorted(named - {report.pk for report in reports}),
+        })
+
+
+class CollectorRouteView(APIView):
+    """
+    API view for collectors to get an optimised visit order for their tasks.
+    
+    POST the collector's ``latitude``/``longitude`` and optionally
+    ``task_ids`` (defaults to all assigned and in-progress tasks).
+    """
+    
+    permission_classes = [permissions.IsAuthenticated, IsCollector]
+    
+    def post(self, request):
+        serializer = RouteRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        tasks = GarbageReport.objects.filter(assigned_to=request.user)
+        task_ids = data.get('task_ids')
+        if task_ids:
+            tasks = list(tasks.filter(pk__in=task_ids).order_by('id'))
+            missing = set(task_ids) - {task.pk for task in tasks}
+            if missing:
+                return Response(
+                    {'error': f'Tasks not found: {sorted(missing)}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            tasks = list(tasks.filter(
+                status__in=['assigned', 'in_progress']
+            ).order_by('id')[:MAX_ROUTE_STOPS + 1])
+            if len(tasks) > MAX_ROUTE_STOPS:
+                return Response(
+                    {'error': f'Routes are limited to {MAX_ROUTE_STOPS} stops; pass task_ids'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        start = (data['latitude'], data['longitude'])
+        route = optimize_route(
+            start,
+            [(task.geo_lat, task.geo_lng) for task in tasks],
+            time_budget_ms=data.get('time_budget_ms')
+        )
+        
+        # ETAs assume a constant speed plus a fixed stop at each task
+        speed = get_average_speed_kmh() / 3.6
+        service = get_service_minutes() * 60
+        now = timezone.now()
+        travelled = 0.0
+        elapsed = 0.0
+        stops = []
+        for position, (index, leg) in enumerate(zip(route['order'], route['legs_m'])):
+            task = tasks[index]
+            travelled += leg
+            elapsed += leg / speed + (service if position else 0)
+            stops.append({
+                'id': task.id,
+                'title': task.title,
+                'address': task.address,
+                'status': task.status,
+                'waste_type': task.waste_type,
+                'latitude': str(task.latitude),
+                'longitude': str(task.longitude),
+                'leg_distance_m': round(leg, 1),
+                'distance_from_start_m': round(travelled, 1),
+                'eta': (now + timedelta(seconds=elapsed)).isoformat(),
+            })
+        if stops:
+            elapsed += service
+        
+        return Response({
+            'order': [stop['id'] for stop in stops],
+            'stops': stops,
+            'total_distance_m': round(route['total_distance_m'], 1),
+            'greedy_distance_m': round(route['greedy_distance_m'], 1),
+            'distance_provider': get_distance_provider().name,
+            'estimated_duration_minutes': round(elapsed / 60, 1),
+            'eta': (now + timedelta(seconds=elapsed)).isoformat(),
+        })
 
 
 class CollectorUpdateStatusView(APIView):
@@ -99,85 +514,207 @@ class CollectorUpdateStatusView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsCollector]
     
     def post(self, request, pk):
+        # Parsed before writing, so a bad ?fields= cannot fail a done update
+        context = {'request': request, **sparse_fields_context(request, GarbageReportSerializer)}
+        
+        serializer = UpdateStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        new_status = serializer.validated_data['status']
+        if new_status not in COLLECTOR_STATUSES:
+            return Response(
+                {'error': f"Collectors can only set {', '.join(sorted(COLLECTOR_STATUSES))}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         try:
-            report = GarbageReport.objects.get(
-                pk=pk,
-                assigned_to=request.user
+            report = transition(
+                pk,
+                new_status,
+                actor=request.user,
+                note=serializer.validated_data.get('note', ''),
+                queryset=GarbageReport.objects.filter(assigned_to=request.user)
             )
         except GarbageReport.DoesNotExist:
             return Response(
                 {'error': 'Task not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        except InvalidTransition as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
         
-        serializer = UpdateStatusSerializer(data=request.data)
+        return Response(serialize_report(report, context=context))
+
+
+class BulkStatusUpdateView(APIView):
+    """
+    Base view for changing the status of many reports in one request.
+    
+    Takes ``{"items": [{"id", "status", "note"}, ...]}`` and returns one
+    result per item; invalid items do not stop the valid ones.
+    """
+    
+    # Statuses this endpoint may set (None for any)
+    allowed_statuses = None
+    # Report field that must point at the requesting user (None for any report)
+    owner_field = None
+    
+    def post(self, request):
+        serializer = BulkStatusUpdateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        new_status = serializer.validated_data['status']
-        note = serializer.validated_data.get('note', '')
-        
-        # Update report status
-        report.status = new_status
-        if new_status == 'completed':
-            report.completed_at = timezone.now()
-        report.save()
-        
-        # Create status update record
-        ReportUpdate.objects.create(
-            report=report,
-            status=new_status,
-            note=note,
-            updated_by=request.user
+        queryset = GarbageReport.objects.all()
+        if self.owner_field:
+            queryset = queryset.filter(**{self.owner_field: request.user})
+        results = bulk_transition(
+            serializer.validated_data['items'],
+            actor=request.user,
+            queryset=queryset,
+            statuses=self.allowed_statuses
         )
-        
-        return Response(GarbageReportSerializer(report).data)
+        updated = sum(1 for result in results if result['ok'])
+        return Response({
+            'results': results,
+            'updated': updated,
+            'failed': len(results) - updated,
+        })
+
+
+class CollectorBulkStatusView(BulkStatusUpdateView):
+    """API view for collectors to update many of their tasks at once."""
+    
+    permission_classes = [permissions.IsAuthenticated, IsCollector]
+    allowed_statuses = COLLECTOR_STATUSES
+    owner_field = 'assigned_to'
 
 
 # Admin Views
-class AdminReportListView(generics.ListAPIView):
+class AdminReportListView(SparseFieldsetMixin, SpatialFilterMixin, generics.ListAPIView):
     """API view for admins to view all reports with filtering."""
     
     serializer_class = GarbageReportSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminUser]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['title', 'description', 'address']
+    pagination_class = EstimatedCountKeysetPagination
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
+    search_index = REPORT_SEARCH_INDEX
+    search_fields = REPORT_SEARCH_FIELDS
     ordering_fields = ['created_at', 'status', 'waste_type']
+    default_expand = ()
     
     def get_queryset(self):
-        queryset = GarbageReport.objects.all()
+        try:
+            reports = filter_reports(GarbageReport.objects.all(), self.request.query_params)
+        except ValueError as e:
+            raise ValidationError({'error': str(e)})
+        return self.get_report_queryset(reports)
+
+
+class AdminReportExportView(AdminReportListView):
+    """
+    API view for admins to stream a bulk export of reports or their history.
+    
+    Accepts the same filters, search and ordering as AdminReportListView,
+    plus ``dataset`` (reports or updates) and ``export_format`` (csv or ndjson).
+    """
+    
+    def get(self, request):
+        dataset = request.query_params.get('dataset', 'reports')
+        export_format = request.query_params.get('export_format', 'csv')
+        if dataset not in EXPORT_DATASETS or export_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': 'dataset must be reports or updates; export_format must be csv or ndjson'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Filter by status
-        status_filter = self.request.query_params.get('status')
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
-        
-        # Filter by waste type
-        waste_type = self.request.query_params.get('waste_type')
-        if waste_type:
-            queryset = queryset.filter(waste_type=waste_type)
-        
-        # Filter by collector
-        collector_id = self.request.query_params.get('collector')
-        if collector_id:
-            queryset = queryset.filter(assigned_to_id=collector_id)
-        
-        # Filter by date range
-        date_from = self.request.query_params.get('date_from')
-        date_to = self.request.query_params.get('date_to')
-        if date_from:
-            queryset = queryset.filter(created_at__date__gte=date_from)
-        if date_to:
-            queryset = queryset.filter(created_at__date__lte=date_to)
+        # Exports read flat values_list rows; nothing to prefetch
+        reports = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        response = StreamingHttpResponse(
+            iter_export(dataset, reports, export_format),
+            content_type=EXPORT_FORMATS[export_format]
+        )
+        filename = f'{dataset}-{timezone.localdate()}.{export_format}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class AdminReportImportView(APIView):
+    """
+    API view for admins to bulk import reports from a CSV or NDJSON upload.
+    
+    POST a multipart ``file`` with optional ``import_format`` (default from
+    the file name) and ``reporter`` (user id the reports are filed under,
+    default the admin). To continue an interrupted import, send the same
+    file with ``resume`` set to its id. Streams one NDJSON line of import
+    progress per committed chunk; the first line carries the import id.
+    """
+    
+    permission_classes = [permissions.IsAuthenticated, IsAdminUser]
+    parser_classes = [MultiPartParser]
+    
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        return queryset
+        if request.data.get('resume'):
+            try:
+                report_import = get_resumable_import(request.data['resume'])
+            except (ReportImport.DoesNotExist, ValueError, TypeError) as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            import_format = request.data.get('import_format') or format_for(upload.name)
+            if import_format not in IMPORT_FORMATS:
+                return Response(
+                    {'error': 'import_format must be csv or ndjson'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            reporter = request.user
+            if request.data.get('reporter'):
+                try:
+                    reporter = User.objects.filter(pk=request.data['reporter']).first()
+                except ValueError:
+                    reporter = None
+                if reporter is None:
+                    return Response({'error': 'Reporter not found'}, status=status.HTTP_400_BAD_REQUEST)
+            report_import = ReportImport.objects.create(
+                source=upload.name,
+                format=import_format,
+                reported_by=reporter,
+                started_by=request.user
+            )
+        
+        lines = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        return StreamingHttpResponse(
+            self.iter_progress(report_import, lines),
+            content_type=EXPORT_FORMATS['ndjson']
+        )
+    
+    def iter_progress(self, report_import, lines):
+        yield json.dumps(ReportImportSerializer(report_import).data) + '\n'
+        try:
+            for progress in run_import(report_import, lines):
+                yield json.dumps(ReportImportSerializer(progress).data) + '\n'
+        except Exception as e:
+            # The status line has been sent; report the failure in the body
+            yield json.dumps({'id': report_import.pk, 'error': str(e)}) + '\n'
+
+
+class AdminReportImportDetailView(generics.RetrieveAPIView):
+    """API view for admins to check the progress of a bulk import."""
+    
+    queryset = ReportImport.objects.all()
+    serializer_class = ReportImportSerializer
+    permission_classes = [permissions.IsAuthenticated, IsAdminUser]
 
 
-class AdminReportDetailView(generics.RetrieveAPIView):
+class AdminReportDetailView(SparseFieldsetMixin, generics.RetrieveAPIView):
     """API view for admins to view report details."""
     
-    serializer_class = GarbageReportSerializer
+    serializer_class = AdminReportDetailSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminUser]
-    queryset = GarbageReport.objects.all()
+    
+    def get_queryset(self):
+        return self.get_report_queryset(GarbageReport.objects.all())
 
 
 class AdminAssignCollectorView(APIView):
@@ -186,13 +723,7 @@ class AdminAssignCollectorView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsAdminUser]
     
     def post(self, request, pk):
-        try:
-            report = GarbageReport.objects.get(pk=pk)
-        except GarbageReport.DoesNotExist:
-            return Response(
-                {'error': 'Report not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        context = {'request': request, **sparse_fields_context(request, GarbageReportSerializer)}
         
         serializer = AssignCollectorSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -201,19 +732,61 @@ class AdminAssignCollectorView(APIView):
             id=serializer.validated_data['collector_id']
         )
         
-        report.assigned_to = collector
-        report.status = 'assigned'
-        report.save()
+        try:
+            report = transition(
+                pk,
+                GarbageReport.Status.ASSIGNED,
+                actor=request.user,
+                note=f'Assigned to {collector.username}',
+                collector=collector
+            )
+        except GarbageReport.DoesNotExist:
+            return Response(
+                {'error': 'Report not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except InvalidTransition as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
         
-        # Create status update record
-        ReportUpdate.objects.create(
-            report=report,
-            status='assigned',
-            note=f'Assigned to {collector.username}',
-            updated_by=request.user
-        )
+        return Response(serialize_report(report, context=context))
+
+
+class AdminBulkStatusView(BulkStatusUpdateView):
+    """API view for admins to update (e.g. reject) many reports at once."""
+    
+    permission_classes = [permissions.IsAuthenticated, IsAdminUser]
+
+
+class AdminAutoAssignView(APIView):
+    """
+    API view for admins to auto-assign pending reports in one batch.
+    
+    Accepts the admin list filters (waste_type, date_from, date_to, bbox),
+    optional report_ids / collector_ids, a per-collector capacity and
+    dry_run to return the plan without writing it.
+    """
+    
+    permission_classes = [permissions.IsAuthenticated, IsAdminUser]
+    
+    def post(self, request):
+        serializer = AutoAssignSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        try:
+            reports = pending_reports(data, report_ids=data.get('report_ids'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        collectors = active_collectors(data.get('collector_ids'))
+        if not collectors:
+            return Response(
+                {'error': 'No active collectors to assign to'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        return Response(GarbageReportSerializer(report).data)
+        plan = plan_assignments(reports, collectors, capacity=data.get('capacity'))
+        assigned = 0 if data['dry_run'] else apply_plan(plan, request.user)
+        return Response({**plan, 'dry_run': data['dry_run'], 'assigned': assigned})
 
 
 class AdminRejectReportView(APIView):
@@ -222,27 +795,54 @@ class AdminRejectReportView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsAdminUser]
     
     def post(self, request, pk):
+        context = {'request': request, **sparse_fields_context(request, GarbageReportSerializer)}
+        
         try:
-            report = GarbageReport.objects.get(pk=pk)
+            report = transition(
+                pk,
+                GarbageReport.Status.REJECTED,
+                actor=request.user,
+                note=request.data.get('note', 'Report rejected by admin')
+            )
         except GarbageReport.DoesNotExist:
             return Response(
                 {'error': 'Report not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        except InvalidTransition as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
         
-        note = request.data.get('note', 'Report rejected by admin')
-        
-        report.status = 'rejected'
-        report.save()
+        return Response(serialize_report(report, context=context))
+
+
+class AdminMergeReportsView(APIView):
+    """API view for admins to merge duplicate reports into one."""
+    
+    permission_classes = [permissions.IsAuthenticated, IsAdminUser]
+    
+    def post(self, request, pk):
+        context = {'request': request, **sparse_fields_context(request, AdminReportDetailSerializer)}
+        serializer = MergeReportsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         
-        ReportUpdate.objects.create(
-            report=report,
-            status='rejected',
-            note=note,
-            updated_by=request.user
-        )
+        try:
+            report = merge_reports(
+                pk,
+                serializer.validated_data['duplicate_ids'],
+                actor=request.user,
+                note=serializer.validated_data.get('note', '')
+            )
+        except GarbageReport.DoesNotExist:
+            return Response(
+                {'error': 'Report not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except InvalidTransition as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        return Response(GarbageReportSerializer(report).data)
+        return Response(serialize_report(report, AdminReportDetailSerializer, context=context))
 
 
 class AdminDashboardStatsView(APIView):
@@ -251,169 +851,273 @@ class AdminDashboardStatsView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsAdminUser]
     
     def get(self, request):
-        total_reports = GarbageReport.objects.count()
-        pending_reports = GarbageReport.objects.filter(status='pending').count()
-        assigned_reports = GarbageReport.objects.filter(status='assigned').count()
-        in_progress_reports = GarbageReport.objects.filter(status='in_progress').count()
-        completed_reports = GarbageReport.objects.filter(status='completed').count()
-        rejected_reports = GarbageReport.objects.filter(status='rejected').count()
-        
-        total_collectors = User.objects.filter(role='collector').count()
-        total_citizens = User.objects.filter(role='citizen').count()
-        
+        # Served from cache-backed counters kept current by reports.signals
+        return Response(get_dashboard_stats())
+
+
+class AdminResponseCacheStatsView(APIView):
+    """API view for response cache hit/miss counts per endpoint."""
+    
+    permission_classes = [permissions.IsAuthenticated, IsAdminUser]
+    
+    def get(self, request):
         return Response({
-            'reports': {
-                'total': total_reports,
-                'pending': pending_reports,
-                'assigned': assigned_reports,
-                'in_progress': in_progress_reports,
-                'completed': completed_reports,
-                'rejected': rejected_reports
-            },
-            'users': {
-                'collectors': total_collectors,
-                'citizens': total_citizens,
-                'active_collectors': User.objects.filter(role='collector', is_active=True).count()
-            }
+            'enabled': bool(response_cache.get_cache_seconds()),
+            'endpoints': response_cache.get_stats(),
         })
+    
+    def delete(self, request):
+        """Reset the counters."""
+        response_cache.reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class AdminMapDataView(APIView):
-    """API view for map data - all reports with location."""
+    """
+    API view for map data - all reports with location.
+    
+    With ``zoom`` (and optionally ``bbox=min_lng,min_lat,max_lng,max_lat``)
+    the response is grid clusters below CLUSTER_MAX_ZOOM and individual
+    markers at or above it. Without ``zoom`` every marker is returned.
+    ``?format=columnar`` returns markers as parallel arrays. Responses carry
+    an ETag from the latest ``updated_at`` and row count, and matching
+    If-None-Match requests get 304 Not Modified.
+    """
     
     permission_classes = [permissions.IsAuthenticated, IsAdminUser]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
     
     def get(self, request):
-        reports = GarbageReport.objects.exclude(
-            status='rejected'
-        ).select_related('reported_by', 'assigned_to')
+        reports = GarbageReport.objects.exclude(status='rejected')
+        
+        zoom = request.query_params.get('zoom')
+        bbox = request.query_params.get('bbox')
+        try:
+            if bbox:
+                reports = filter_bbox(reports, parse_bbox(bbox))
+            if zoom is not None:
+                if not zoom.isdigit() or not 0 <= int(zoom) <= 22:
+                    raise ValueError('zoom must be an integer between 0 and 22')
+                zoom = int(zoom)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Unchanged maps are answered with 304 before any serialization
+        validator = queryset_validator(reports)
+        etag = make_etag(
+            validator['last_modified'],
+            validator['count'],
+            request.get_full_path(),
+            request.accepted_renderer.format
+        )
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
         
-        serializer = MapReportSerializer(reports, many=True)
-        return Response(serializer.data)
+        if zoom is not None and zoom < CLUSTER_MAX_ZOOM:
+            data = {
+                'mode': 'clusters',
+                'zoom': zoom,
+                'clusters': cluster_reports(reports, zoom)
+            }
+        elif request.accepted_renderer.format == 'columnar':
+            data = columnar_map_data(reports)
+        else:
+            reports = reports.select_related('reported_by', 'assigned_to')
+            data = MapReportSerializer(reports, many=True).data
+            if zoom is not None:
+                data = {
+                    'mode': 'markers',
+                    'zoom': zoom,
+                    'markers': data
+                }
+        return Response(data, headers={'ETag': etag})
 
 
 class AdminReportAnalyticsView(APIView):
-    """API view for detailed analytics."""
+    """
+    API view for detailed analytics.
+    
+    Query params:
+        date_from, date_to: Inclusive YYYY-MM-DD range. The time series
+            default to the 30 days ending today; breakdowns, distributions
+            and collector stats cover all time unless a bound is given.
+        granularity: hour, day (default), week or month for the time series.
+    """
     
     permission_classes = [permissions.IsAuthenticated, IsAdminUser]
     
     def get(self, request):
         from datetime import timedelta
-        from django.db.models import Avg, F, ExpressionWrapper, DurationField
-        from django.db.models.functions import ExtractHour, ExtractWeekDay
+        from django.db.models import DateField
+        from django.db.models.functions import ExtractHour, ExtractWeekDay, Trunc
+        from django.utils.dateparse import parse_date
+        
+        params = request.query_params
+        granularity = params.get('granularity', 'day')
+        if granularity not in GRANULARITIES:
+            return Response(
+                {'error': f"granularity must be one of: {', '.join(GRANULARITIES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            date_to = parse_date(params['date_to']) if params.get('date_to') else timezone.localdate()
+            date_from = parse_date(params['date_from']) if params.get('date_from') else date_to - timedelta(days=29)
+        except ValueError:
+            date_from = date_to = None
+        if not date_from or not date_to or date_from > date_to:
+            return Response(
+                {'error': 'date_from and date_to must be valid YYYY-MM-DD dates in order'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            buckets = bucket_starts(date_from, date_to, granularity)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        start, end = range_bounds(date_from, date_to)
+        bounded = bool(params.get('date_from') or params.get('date_to'))
+        reports = GarbageReport.objects.all()
+        rollup = ReportDailyStats.objects.all()
+        task_filter = Q()
+        if bounded:
+            reports = reports.filter(created_at__gte=start, created_at__lt=end)
+            rollup = rollup.filter(date__gte=date_from, date__lte=date_to)
+            task_filter = Q(assigned_tasks__created_at__gte=start, assigned_tasks__created_at__lt=end)
         
         # Reports by waste type
-        by_waste_type = GarbageReport.objects.values('waste_type').annotate(
-            count=Count('id')
-        ).order_by('-count')
+        by_waste_type = rollup.values('waste_type').annotate(
+            count=Sum('created')
+        ).filter(count__gt=0).order_by('-count')
         
         # Reports by status
-        by_status = GarbageReport.objects.values('status').annotate(
-            count=Count('id')
-        ).order_by('-count')
+        by_status = rollup.values('status').annotate(
+            count=Sum('created')
+        ).filter(count__gt=0).order_by('-count')
         
-        # Reports over time (last 30 days)
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        daily_reports = GarbageReport.objects.filter(
-            created_at__gte=thirty_days_ago
-        ).annotate(
-            date=TruncDate('created_at')
-        ).values('date').annotate(
-            count=Count('id')
-        ).order_by('date')
+        # Created/completed per bucket plus totals before the range; hourly
+        # series come from reports, coarser ones from the daily rollup
+        if granularity == 'hour':
+            baseline = GarbageReport.objects.aggregate(
+                total=Count('id', filter=Q(created_at__lt=start)),
+                completed=Count('id', filter=Q(status='completed', completed_at__lt=start))
+            )
+            created_series = GarbageReport.objects.filter(
+                created_at__gte=start, created_at__lt=end
+            ).annotate(
+                bucket=Trunc('created_at', 'hour')
+            ).values('bucket').annotate(count=Count('id')).order_by('bucket')
+            completed_series = GarbageReport.objects.filter(
+                status='completed', completed_at__gte=start, completed_at__lt=end
+            ).annotate(
+                bucket=Trunc('completed_at', 'hour')
+            ).values('bucket').annotate(count=Count('id')).order_by('bucket')
+        else:
+            baseline = ReportDailyStats.objects.filter(date__lt=date_from).aggregate(
+                total=Coalesce(Sum('created'), 0),
+                completed=Coalesce(Sum('completed'), 0)
+            )
+            series = ReportDailyStats.objects.filter(
+                date__gte=date_from, date__lte=date_to
+            ).annotate(
+                bucket=Trunc('date', granularity, output_field=DateField())
+            ).values('bucket')
+            created_series = series.annotate(count=Sum('created')).order_by('bucket')
+            completed_series = series.annotate(count=Sum('completed')).order_by('bucket')
+        
+        created_by_bucket = {row['bucket']: row['count'] for row in created_series}
+        completed_by_bucket = {row['bucket']: row['count'] for row in completed_series}
+        
+        def bucket_label(bucket):
+            return bucket.isoformat() if granularity == 'hour' else str(bucket)
+        
+        # Reports over time
+        daily_reports = [
+            {'date': bucket_label(bucket), 'count': created_by_bucket[bucket]}
+            for bucket in buckets
+            if created_by_bucket.get(bucket)
+        ]
         
         # Top collectors by completed tasks
         top_collectors = User.objects.filter(
             role='collector'
         ).annotate(
-            completed=Count('assigned_tasks', filter=Q(assigned_tasks__status='completed'))
+            completed=Count('assigned_tasks', filter=task_filter & Q(assigned_tasks__status='completed'))
         ).order_by('-completed')[:5].values('id', 'username', 'first_name', 'last_name', 'completed')
         
-        # NEW: Average resolution time (for completed reports)
-        completed_reports = GarbageReport.objects.filter(
-            status='completed',
-            completed_at__isnull=False
-        ).annotate(
-            resolution_time=ExpressionWrapper(
-                F('completed_at') - F('created_at'),
-                output_field=DurationField()
-            )
-        )
-        avg_resolution_hours = None
-        if completed_reports.exists():
-            total_seconds = sum(
-                (r.resolution_time.total_seconds() for r in completed_reports), 
-                0
-            )
-            avg_resolution_hours = round(total_seconds / completed_reports.count() / 3600, 1)
+        # NEW: Resolution time (for completed reports), computed in SQL
+        resolution_time = resolution_time_stats(reports)
         
         # NEW: Reports by hour of day
-        hourly_distribution = GarbageReport.objects.annotate(
+        hourly_distribution = reports.annotate(
             hour=ExtractHour('created_at')
         ).values('hour').annotate(
             count=Count('id')
         ).order_by('hour')
         
         # NEW: Reports by day of week (1=Sunday, 7=Saturday in Django)
-        weekly_distribution = GarbageReport.objects.annotate(
+        weekly_distribution = reports.annotate(
             weekday=ExtractWeekDay('created_at')
         ).values('weekday').annotate(
             count=Count('id')
         ).order_by('weekday')
         
-        # NEW: Completion rate over time (last 30 days)
+        # NEW: Cumulative completion rate over time
+        total = baseline['total']
+        completed = baseline['completed']
         completion_trend = []
-        for i in range(30):
-            date = timezone.now().date() - timedelta(days=29-i)
-            total = GarbageReport.objects.filter(created_at__date__lte=date).count()
-            completed = GarbageReport.objects.filter(
-                status='completed',
-                completed_at__date__lte=date
-            ).count()
+        for bucket in buckets:
+            total += created_by_bucket.get(bucket) or 0
+            completed += completed_by_bucket.get(bucket) or 0
             rate = round((completed / total * 100), 1) if total > 0 else 0
-            completion_trend.append({'date': str(date), 'rate': rate})
+            completion_trend.append({'date': bucket_label(bucket), 'rate': rate})
         
         # NEW: Collector performance metrics
         collector_performance = User.objects.filter(
             role='collector'
         ).annotate(
-            total_tasks=Count('assigned_tasks'),
-            completed_tasks=Count('assigned_tasks', filter=Q(assigned_tasks__status='completed')),
-            pending_tasks=Count('assigned_tasks', filter=Q(assigned_tasks__status__in=['pending', 'assigned', 'in_progress']))
+            total_tasks=Count('assigned_tasks', filter=task_filter),
+            completed_tasks=Count('assigned_tasks', filter=task_filter & Q(assigned_tasks__status='completed')),
+            pending_tasks=Count('assigned_tasks', filter=task_filter & Q(assigned_tasks__status__in=['pending', 'assigned', 'in_progress']))
         ).filter(total_tasks__gt=0).values(
             'id', 'username', 'first_name', 'last_name', 
             'total_tasks', 'completed_tasks', 'pending_tasks'
         ).order_by('-completed_tasks')[:10]
         
-        # NEW: Recent activity (last 7 days comparison)
-        seven_days_ago = timezone.now() - timedelta(days=7)
-        fourteen_days_ago = timezone.now() - timedelta(days=14)
+        # NEW: Recent activity (last 7 days of the range vs the 7 before)
+        seven_days_ago = date_to - timedelta(days=6)
+        fourteen_days_ago = date_to - timedelta(days=13)
         
-        recent_reports = GarbageReport.objects.filter(created_at__gte=seven_days_ago).count()
-        previous_reports = GarbageReport.objects.filter(
-            created_at__gte=fourteen_days_ago,
-            created_at__lt=seven_days_ago
-        ).count()
+        activity = ReportDailyStats.objects.filter(
+            date__gte=fourteen_days_ago, date__lte=date_to
+        ).aggregate(
+            recent_reports=Coalesce(Sum('created', filter=Q(date__gte=seven_days_ago)), 0),
+            previous_reports=Coalesce(Sum('created', filter=Q(date__lt=seven_days_ago)), 0),
+            recent_completed=Coalesce(Sum('completed', filter=Q(date__gte=seven_days_ago)), 0),
+            previous_completed=Coalesce(Sum('completed', filter=Q(date__lt=seven_days_ago)), 0)
+        )
+        recent_reports = activity['recent_reports']
+        previous_reports = activity['previous_reports']
         report_trend = ((recent_reports - previous_reports) / previous_reports * 100) if previous_reports > 0 else 0
         
-        recent_completed = GarbageReport.objects.filter(
-            status='completed',
-            completed_at__gte=seven_days_ago
-        ).count()
-        previous_completed = GarbageReport.objects.filter(
-            status='completed',
-            completed_at__gte=fourteen_days_ago,
-            completed_at__lt=seven_days_ago
-        ).count()
+        recent_completed = activity['recent_completed']
+        previous_completed = activity['previous_completed']
         completion_trend_percent = ((recent_completed - previous_completed) / previous_completed * 100) if previous_completed > 0 else 0
         
         return Response({
+            'range': {
+                'date_from': str(date_from),
+                'date_to': str(date_to),
+                'granularity': granularity
+            },
             'by_waste_type': list(by_waste_type),
             'by_status': list(by_status),
-            'daily_reports': list(daily_reports),
+            'daily_reports': daily_reports,
             'top_collectors': list(top_collectors),
             # New analytics
-            'avg_resolution_hours': avg_resolution_hours,
+            'avg_resolution_hours': resolution_time['avg'],
+            'resolution_time_hours': resolution_time,
             'hourly_distribution': list(hourly_distribution),
             'weekly_distribution': list(weekly_distribution),
             'completion_trend': completion_trend,